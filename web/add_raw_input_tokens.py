@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Add raw_input_tokens column to llm_calls table
+Records the estimated prompt size before PROMPT_MINIMIZE shrank it, so /api/llm/usage can report the saving
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Get the database path
+DB_PATH = Path(__file__).parent / 'vibe_cv.db'
+
+def add_raw_input_tokens_column():
+    """Add raw_input_tokens column to llm_calls table"""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+
+        # Check if column already exists
+        cursor.execute("PRAGMA table_info(llm_calls)")
+        columns = [col[1] for col in cursor.fetchall()]
+
+        if 'raw_input_tokens' in columns:
+            print("✅ Column 'raw_input_tokens' already exists")
+            return True
+
+        # Add the column
+        cursor.execute("""
+            ALTER TABLE llm_calls
+            ADD COLUMN raw_input_tokens INTEGER
+        """)
+
+        conn.commit()
+        conn.close()
+
+        print("✅ Successfully added 'raw_input_tokens' column to llm_calls table")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = add_raw_input_tokens_column()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Add file_hash and text_hash columns to cv_masters table
+Lets /api/upload-cv recognise a re-uploaded CV and reuse its LaTeX conversion (masters uploaded before this have no hashes)
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Get the database path
+DB_PATH = Path(__file__).parent / 'vibe_cv.db'
+
+def add_upload_dedup_columns():
+    """Add file_hash/text_hash (indexed) to cv_masters table"""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+
+        # Check if columns already exist
+        cursor.execute("PRAGMA table_info(cv_masters)")
+        columns = [col[1] for col in cursor.fetchall()]
+
+        for column in ('file_hash', 'text_hash'):
+            if column in columns:
+                print(f"✅ Column '{column}' already exists")
+                continue
+            cursor.execute(f"""
+                ALTER TABLE cv_masters
+                ADD COLUMN {column} VARCHAR(64)
+            """)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_cv_masters_{column} ON cv_masters ({column})")
+            print(f"✅ Successfully added '{column}' column to cv_masters table")
+
+        conn.commit()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = add_upload_dedup_columns()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Prepare cv_variants for paginated listing
+Adds the has_job_desc column and the (user_id, created_at, id) index, and backfills company/has_job_desc from disk once
+
+Usage: python add_variant_listing.py [--prune [--yes]]
+  --prune  delete rows whose variant folder no longer exists (the old listing hid them), after listing them and asking
+  --yes    with --prune, delete without asking
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Get the database path
+DB_PATH = Path(__file__).parent / 'vibe_cv.db'
+V1_DIR = Path(__file__).parent.parent / 'v1'
+
+
+def company_from_job_desc(job_desc_file):
+    """First non-empty line of job_desc.md (how the listing used to guess the company)"""
+    with open(job_desc_file, 'r', encoding='utf-8') as f:
+        for line in f.read(200).split('\n')[:5]:
+            if line.strip():
+                return line.strip().lstrip('#').strip()
+    return None
+
+
+def confirm(question):
+    """True if the user answers yes (no answer, e.g. stdin not a terminal, counts as no)"""
+    try:
+        return input(f"{question} [y/N] ").strip().lower() in ('y', 'yes')
+    except EOFError:
+        return False
+
+
+def add_variant_listing(prune=False, assume_yes=False):
+    """Add has_job_desc + listing index to cv_variants and backfill from the variant folders"""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+
+        # Check if column already exists
+        cursor.execute("PRAGMA table_info(cv_variants)")
+        columns = [col[1] for col in cursor.fetchall()]
+
+        if 'has_job_desc' in columns:
+            print("✅ Column 'has_job_desc' already exists")
+        else:
+            cursor.execute("""
+                ALTER TABLE cv_variants
+                ADD COLUMN has_job_desc BOOLEAN DEFAULT 0
+            """)
+            print("✅ Added 'has_job_desc' column to cv_variants table")
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_cv_variants_user_created
+            ON cv_variants (user_id, created_at, id)
+        """)
+        print("✅ Index 'ix_cv_variants_user_created' is in place")
+
+        # One-time backfill so the listing never has to touch the filesystem again
+        missing = []
+        updated = 0
+        for variant_id, user_id, folder_name, company in cursor.execute(
+                "SELECT id, user_id, folder_name, company FROM cv_variants").fetchall():
+            variant_dir = V1_DIR / folder_name
+            if not variant_dir.exists():
+                missing.append((variant_id, user_id, folder_name))
+                continue
+            job_desc_file = variant_dir / "job_desc.md"
+            has_job_desc = job_desc_file.exists()
+            if not company and has_job_desc:
+                company = company_from_job_desc(job_desc_file)
+            cursor.execute(
+                "UPDATE cv_variants SET has_job_desc = ?, company = ? WHERE id = ?",
+                (has_job_desc, company, variant_id)
+            )
+            updated += 1
+        print(f"✅ Backfilled {updated} variant(s)")
+
+        if missing:
+            print(f"⚠️  {len(missing)} variant(s) have no folder in {V1_DIR}:")
+            for variant_id, user_id, folder_name in missing:
+                print(f"   - id {variant_id} (user {user_id}): {folder_name}")
+            if not prune:
+                print("   Run with --prune to delete these rows")
+            elif assume_yes or confirm(f"Delete these {len(missing)} row(s) from cv_variants?"):
+                cursor.executemany("DELETE FROM cv_variants WHERE id = ?", [(i,) for i, _, _ in missing])
+                print(f"🗑️  Deleted {len(missing)} variant(s)")
+            else:
+                print("   Nothing deleted")
+
+        conn.commit()
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = add_variant_listing(prune='--prune' in sys.argv[1:], assume_yes='--yes' in sys.argv[1:])
+    sys.exit(0 if success else 1)
@@ -4,20 +4,46 @@ Web UI for Vibe CV Resume Builder
 Automates job-specific CV variant creation with AI optimization
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session, Response, stream_with_context, g
 import os
+import json
+import time
 import subprocess
 import re
-from datetime import datetime
+import shutil
+import base64
+import functools
+import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import quote
 from dotenv import load_dotenv
-import openai
-import anthropic
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-import PyPDF2
-from docx import Document
-from models import db, User, CVMaster, CVVariant
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
+from models import db, User, CVMaster, CVVariant, Job, LLMCall
+from db_config import configure_database, observe_queries, upgrade_schema
+from jobs import JobRunner
+from metrics import CONTENT_TYPE, QUERY_BUCKETS, TOKEN_BUCKETS, MetricsRegistry
+from compile_cache import CompileCache, get_image_digest
+from tex_engine import create_engine
+from compile_scheduler import CompileScheduler, CompileQueueTimeout
+from rate_limit import LLMRateLimiter, estimate_tokens
+from llm_cache import LLMCache
+from llm_client import get_llm_client
+from llm_router import get_llm_router
+from match_scorer import MatchScorer, top_terms_missing
+from latex_patch import PATCH_FORMAT_INSTRUCTIONS, PatchError, apply_patch
+from latex_validator import defined_commands, preflight, split_preamble, validate_latex
+from latex_escape import escape_latex
+from blob_store import BlobStore
+from text_extraction import ExtractionError, TextExtractor, text_fingerprint
+from prompt_budget import minimize_cv, restore_preamble, strip_jd_boilerplate
+from cv_sections import DEFAULT_PREAMBLE, HEADER, assemble, clean_fragment, section_prompts, split_cv_text
 
 # Load environment variables
 load_dotenv()
@@ -25,10 +51,19 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + str(Path(__file__).parent / 'vibe_cv.db')
+# Database configuration (SQLite with WAL by default; DATABASE_URL switches to e.g. Postgres)
+DATABASE_URL = os.getenv('DATABASE_URL') or None
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+configure_database(
+    app, db, Path(__file__).parent / 'vibe_cv.db',
+    url=DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS
+)
 
 # Flask-Login setup
 login_manager = LoginManager()
@@ -41,28 +76,244 @@ AI_PROVIDER = os.getenv('AI_PROVIDER', 'openai')
 AI_MODEL = os.getenv('AI_MODEL', 'gpt-4-turbo')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+# Optional API endpoints (e.g. a proxy or a local fake server for testing)
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+ANTHROPIC_BASE_URL = os.getenv('ANTHROPIC_BASE_URL') or None
+AI_TIMEOUT = float(os.getenv('AI_TIMEOUT', '60'))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '3'))
+# With both API keys set: hedge slow calls to / fail over to the other provider
+AI_HEDGING = os.getenv('AI_HEDGING', 'true').lower() == 'true'
+AI_HEDGE_DELAY = float(os.getenv('AI_HEDGE_DELAY', '0'))  # seconds; 0 = the provider's recent p95
+AI_SECONDARY_MODEL = os.getenv('AI_SECONDARY_MODEL') or None
+AI_BREAKER_FAILURES = int(os.getenv('AI_BREAKER_FAILURES', '5'))
+AI_BREAKER_RESET = int(os.getenv('AI_BREAKER_RESET', '30'))
+# Persistent AI response cache (SQLite file next to vibe_cv.db)
+LLM_CACHE_PATH = Path(os.getenv('LLM_CACHE_PATH', str(Path(__file__).parent / 'llm_cache.db')))
+LLM_CACHE_TTL_HOURS = int(os.getenv('LLM_CACHE_TTL_HOURS', '168'))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+# Per-provider limits shared by all AI calls in this process (0 = unlimited)
+LLM_MAX_CONCURRENCY_OPENAI = int(os.getenv('LLM_MAX_CONCURRENCY_OPENAI', '4'))
+LLM_TPM_OPENAI = int(os.getenv('LLM_TPM_OPENAI', '0'))
+LLM_MAX_CONCURRENCY_ANTHROPIC = int(os.getenv('LLM_MAX_CONCURRENCY_ANTHROPIC', '4'))
+LLM_TPM_ANTHROPIC = int(os.getenv('LLM_TPM_ANTHROPIC', '0'))
 
 # Project paths
 BASE_DIR = Path(__file__).parent.parent
-V1_DIR = BASE_DIR / "v1"
+# Variant folders and the fallback master.tex (VARIANTS_DIR moves them, e.g. for load tests)
+V1_DIR = Path(os.getenv('VARIANTS_DIR', str(BASE_DIR / "v1")))
 MASTER_TEX = V1_DIR / "master.tex"
 PROMPTS_DIR = BASE_DIR / "prompts"
 UPLOAD_FOLDER = BASE_DIR / "web" / "uploads"
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
 
+# Stream AI output into jobs (score and LaTeX chunks reach the browser while generating)
+AI_STREAMING = os.getenv('AI_STREAMING', 'true').lower() == 'true'
+# 'patch': the AI returns section edits against the master CV (falls back to 'full' if they don't apply)
+AI_OUTPUT_MODE = os.getenv('AI_OUTPUT_MODE', 'patch')
+# Shrink optimize prompts: master CV without comments/extra whitespace and with its preamble
+# summarized (re-inserted server-side), job description without benefits/EEO/about-us boilerplate
+PROMPT_MINIMIZE = os.getenv('PROMPT_MINIMIZE', 'true').lower() == 'true'
+
+# Uploaded CV -> LaTeX: 'whole' (one request), 'sections' (one request per CV section, in parallel)
+# or 'auto' (sections once the extracted text is at least CONVERT_SECTIONS_MIN_CHARS long)
+CONVERT_MODE = os.getenv('CONVERT_MODE', 'auto')
+CONVERT_SECTIONS_MIN_CHARS = int(os.getenv('CONVERT_SECTIONS_MIN_CHARS', '3000'))
+CONVERT_SECTION_CONCURRENCY = max(1, int(os.getenv('CONVERT_SECTION_CONCURRENCY', '4')))
+
+# Background jobs (AI -> write -> compile pipeline)
+# LLM fan-out is bounded by the per-provider limits below, so workers can outnumber them
+VARIANTS_PAGE_SIZE = int(os.getenv('VARIANTS_PAGE_SIZE', '20'))
+VARIANTS_MAX_PAGE_SIZE = 100
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '8'))
+JOB_EVENTS_POLL_INTERVAL = 0.5
+JOB_EVENTS_TIMEOUT = 600
+BATCH_MAX_VARIANTS = int(os.getenv('BATCH_MAX_VARIANTS', '50'))
+
+# LaTeX compile configuration
+TEX_IMAGE = os.getenv('TEX_IMAGE', 'texlive/texlive:latest')
+LATEXMK_FLAGS = ['-pdf', '-interaction=nonstopmode', '-f', '-bibtex-']
+COMPILE_TIMEOUT = 60
+COMPILE_CACHE_DIR = Path(os.getenv('COMPILE_CACHE_DIR', str(Path(__file__).parent / '.compile_cache')))
+COMPILE_CACHE_MAX_MB = int(os.getenv('COMPILE_CACHE_MAX_MB', '512'))
+# "pool" keeps warm TeX containers and dispatches compiles with docker exec, "docker" starts one per compile
+TEX_ENGINE = os.getenv('TEX_ENGINE', 'pool')
+TEX_POOL_SIZE = int(os.getenv('TEX_POOL_SIZE', '2'))
+TEX_POOL_MAX_JOBS = int(os.getenv('TEX_POOL_MAX_JOBS', '50'))
+TEX_POOL_HEALTH_INTERVAL = int(os.getenv('TEX_POOL_HEALTH_INTERVAL', '30'))
+# Per-compile scratch dirs live here (mounted into the TeX containers instead of $HOME)
+TEX_WORK_DIR = Path(os.getenv('TEX_WORK_DIR', str(Path(__file__).parent / '.tex_work')))
+# With the pool, each admitted compile needs a warm worker: admitting more than TEX_POOL_SIZE would only
+# move the queue into the pool, where the wait is neither bounded by COMPILE_QUEUE_TIMEOUT nor measured
+MAX_CONCURRENT_COMPILES = int(os.getenv('MAX_CONCURRENT_COMPILES',
+                                        str(TEX_POOL_SIZE if TEX_ENGINE == 'pool' else os.cpu_count() or 2)))
+if TEX_ENGINE == 'pool' and MAX_CONCURRENT_COMPILES > TEX_POOL_SIZE:
+    print(f"⚠️ MAX_CONCURRENT_COMPILES={MAX_CONCURRENT_COMPILES} is more than TEX_POOL_SIZE={TEX_POOL_SIZE}, "
+          f"using {TEX_POOL_SIZE}")
+    MAX_CONCURRENT_COMPILES = TEX_POOL_SIZE
+COMPILE_QUEUE_TIMEOUT = int(os.getenv('COMPILE_QUEUE_TIMEOUT', '120'))
+
+# PDF downloads: '' (Flask streams the file), 'x-sendfile' (Apache/lighttpd) or 'x-accel' (nginx)
+PDF_SENDFILE = os.getenv('PDF_SENDFILE', '').lower()
+# nginx internal location that aliases v1/ (used with PDF_SENDFILE=x-accel)
+PDF_ACCEL_PREFIX = os.getenv('PDF_ACCEL_PREFIX', '/protected-v1/')
+app.config['USE_X_SENDFILE'] = PDF_SENDFILE == 'x-sendfile'
+
+# LaTeX documents live in the blobs table (compressed, deduplicated); also write v1/<folder>/main.tex
+# for editing or compiling variants by hand
+STORE_TEX_FILES = os.getenv('STORE_TEX_FILES', 'false').lower() == 'true'
+
+# CV text extraction runs in worker processes (0 = in the request thread)
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', str(min(4, os.cpu_count() or 2))))
+EXTRACT_MAX_MB = int(os.getenv('EXTRACT_MAX_MB', '10'))
+EXTRACT_MAX_PAGES = int(os.getenv('EXTRACT_MAX_PAGES', '20'))
+EXTRACT_PAGES_PER_TASK = int(os.getenv('EXTRACT_PAGES_PER_TASK', '4'))
+EXTRACT_TIMEOUT = int(os.getenv('EXTRACT_TIMEOUT', '30'))
+# Request bodies over this are refused before they are read (1 MB on top of the file for form fields)
+app.config['MAX_CONTENT_LENGTH'] = (EXTRACT_MAX_MB + 1) * 1024 * 1024
+
+# Prometheus metrics at /metrics; with METRICS_DIR, worker processes (e.g. gunicorn -w 4) share their
+# metrics through files there and any of them serves the total. Clear it when the server restarts.
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Bearer token the scraper must send (unset = /metrics is open, e.g. behind a private network)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
 # Create upload folder if not exists
 UPLOAD_FOLDER.mkdir(exist_ok=True)
 
-# Initialize database
-with app.app_context():
-    db.create_all()
-    # Create default admin if no users exist
-    if User.query.count() == 0:
-        admin = User(email='admin@vibe-cv.com')
-        admin.set_password('admin123')
-        db.session.add(admin)
-        db.session.commit()
-        print("✅ Created default admin user: admin@vibe-cv.com / admin123")
+# Compiled PDFs keyed on LaTeX source, TeX image and latexmk flags
+compile_cache = CompileCache(COMPILE_CACHE_DIR, max_bytes=COMPILE_CACHE_MAX_MB * 1024 * 1024)
+
+# Uploaded CV -> text (worker processes are started on the first upload)
+text_extractor = TextExtractor(
+    max_workers=EXTRACT_WORKERS,
+    max_bytes=EXTRACT_MAX_MB * 1024 * 1024,
+    max_pages=EXTRACT_MAX_PAGES,
+    pages_per_task=EXTRACT_PAGES_PER_TASK,
+    timeout=EXTRACT_TIMEOUT
+)
+
+# Master and variant LaTeX, content-addressed (zstd if installed, else zlib)
+blob_store = BlobStore()
+
+# Background job workers
+job_runner = JobRunner(app, max_workers=JOB_WORKERS)
+
+# AI responses keyed on prompt inputs, model and temperature
+llm_cache = LLMCache(LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL_HOURS * 3600, max_entries=LLM_CACHE_MAX_ENTRIES)
+
+# Offline keyword scorer (triage and fallback when the AI omits MATCH_SCORE)
+match_scorer = MatchScorer()
+
+# LLM concurrency / tokens-per-minute limits
+llm_limiter = LLMRateLimiter({
+    'openai': (LLM_MAX_CONCURRENCY_OPENAI, LLM_TPM_OPENAI),
+    'anthropic': (LLM_MAX_CONCURRENCY_ANTHROPIC, LLM_TPM_ANTHROPIC)
+})
+
+# TeX compile engine (containers are started lazily on first compile)
+compile_scheduler = CompileScheduler(
+    TEX_WORK_DIR,
+    max_concurrent=MAX_CONCURRENT_COMPILES,
+    queue_timeout=COMPILE_QUEUE_TIMEOUT
+)
+tex_engine = create_engine(
+    TEX_ENGINE, TEX_IMAGE, TEX_WORK_DIR,
+    pool_size=TEX_POOL_SIZE,
+    max_jobs=TEX_POOL_MAX_JOBS,
+    health_interval=TEX_POOL_HEALTH_INTERVAL
+)
+
+# Prometheus metrics (see /metrics)
+metrics = MetricsRegistry(METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL)
+llm_latency = metrics.histogram('vibe_llm_request_duration_seconds', 'AI provider call latency',
+                                ('provider', 'model', 'kind'))
+llm_input_tokens = metrics.histogram('vibe_llm_input_tokens', 'Input tokens per AI call',
+                                     ('provider', 'model', 'kind'), buckets=TOKEN_BUCKETS)
+llm_output_tokens = metrics.histogram('vibe_llm_output_tokens', 'Output tokens per AI call',
+                                      ('provider', 'model', 'kind'), buckets=TOKEN_BUCKETS)
+llm_tokens = metrics.counter('vibe_llm_tokens_total', 'AI tokens by type (input, output, cache_read, cache_write)',
+                             ('provider', 'model', 'type'))
+compile_latency = metrics.histogram('vibe_compile_duration_seconds', 'PDF compile time by outcome, including queueing',
+                                    ('outcome',))
+compile_queue_wait = metrics.histogram('vibe_compile_queue_wait_seconds', 'Time spent waiting for a compile slot')
+extraction_latency = metrics.histogram('vibe_text_extraction_seconds', 'Uploaded CV text extraction time',
+                                       ('format', 'outcome'))
+db_query_latency = metrics.histogram('vibe_db_query_duration_seconds', 'Database statement time',
+                                     ('operation',), buckets=QUERY_BUCKETS)
+http_in_flight = metrics.gauge('vibe_http_requests_in_flight', 'Requests being served (SSE streams included)',
+                               ('route',))
+http_latency = metrics.histogram('vibe_http_request_duration_seconds', 'Request time by route',
+                                 ('route', 'method', 'status'))
+queue_depth = metrics.gauge('vibe_queue_depth', 'Work waiting or running in the in-process queues and pools',
+                            ('queue', 'state'))
+observe_queries(app, db, db_query_latency)
+
+@metrics.add_collector
+def collect_queue_depths():
+    """Copy compile/job/TeX pool/LLM limiter state into vibe_queue_depth before a scrape"""
+    scheduler = compile_scheduler.stats()
+    queue_depth.set(scheduler['waiting'], queue='compile', state='waiting')
+    queue_depth.set(scheduler['running'], queue='compile', state='running')
+    jobs = job_runner.stats()
+    queue_depth.set(jobs['queued'], queue='jobs', state='waiting')
+    queue_depth.set(jobs['running'], queue='jobs', state='running')
+    engine = tex_engine.stats()
+    if engine['engine'] == 'pool':
+        queue_depth.set(engine['idle'], queue='tex_pool', state='idle')
+        queue_depth.set(engine['live'] - engine['idle'], queue='tex_pool', state='busy')
+    limiter = llm_limiter.stats()
+    for provider, waiting in limiter['waiting'].items():
+        queue_depth.set(waiting, queue=f'llm_{provider}', state='waiting')
+        queue_depth.set(limiter['in_flight'].get(provider, 0), queue=f'llm_{provider}', state='running')
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_start = time.perf_counter()
+    http_in_flight.inc(route=g.metrics_route)
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.before_request
+def reject_large_requests():
+    # Before any route reads the body (their catch-all handlers would turn a 413 into a 500)
+    if (request.content_length or 0) > app.config['MAX_CONTENT_LENGTH']:
+        raise RequestEntityTooLarge()
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({'error': f'Request is too large (max {EXTRACT_MAX_MB} MB)'}), 413
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # Runs once the response is sent (for streams, once the stream ends)
+    route = g.pop('metrics_route', None)
+    if route is None:
+        return
+    http_in_flight.dec(route=route)
+    status = g.pop('metrics_status', 500 if exc else 200)
+    http_latency.observe(time.perf_counter() - g.pop('metrics_start'), route=route, method=request.method,
+                         status=status)
+
+# Initialize database (not in text extraction workers, which re-import this script as __mp_main__
+# when it is run directly)
+if __name__ != '__mp_main__':
+    with app.app_context():
+        db.create_all()
+        for column in upgrade_schema(app, db):
+            print(f"✅ Added missing column {column}")
+        # Create default admin if no users exist
+        if User.query.count() == 0:
+            admin = User(email='admin@vibe-cv.com')
+            admin.set_password('admin123')
+            db.session.add(admin)
+            db.session.commit()
+            print("✅ Created default admin user: admin@vibe-cv.com / admin123")
 
 # User Storage Functions (kept for compatibility)
 def save_users(users):
@@ -113,54 +364,173 @@ def user_owns_variant(variant_folder, user_id):
     owner = get_variant_owner(variant_dir)
     return owner == str(user_id)
 
-def get_existing_variants(user_id=None):
-    """Get list of existing CV variants from database (filtered by user if provided)"""
-    query = CVVariant.query
+def encode_variant_cursor(variant):
+    """Opaque keyset cursor for the listing position after this variant"""
+    raw = f"{variant.created_at.isoformat()}|{variant.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_variant_cursor(cursor):
+    """(created_at, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, variant_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(variant_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def get_existing_variants(user_id=None, limit=None, cursor=None):
+    """Get a page of CV variants from the database, newest first (filtered by user if provided)
+
+    Keyset pagination on (created_at, id), served by ix_cv_variants_user_created;
+    only listing columns are loaded and the filesystem is never touched.
+    Returns (variants, next_cursor) - next_cursor is None on the last page.
+    """
+    limit = min(limit or VARIANTS_PAGE_SIZE, VARIANTS_MAX_PAGE_SIZE)
+    query = CVVariant.query.options(load_only(
+        CVVariant.id, CVVariant.folder_name, CVVariant.company, CVVariant.role, CVVariant.has_tex,
+        CVVariant.has_pdf, CVVariant.has_job_desc, CVVariant.match_score, CVVariant.created_at
+    ))
     if user_id:
-        query = query.filter_by(user_id=user_id)
+        query = query.filter(CVVariant.user_id == user_id)
+    if cursor:
+        created_at, variant_id = decode_variant_cursor(cursor)
+        query = query.filter(tuple_(CVVariant.created_at, CVVariant.id) < tuple_(created_at, variant_id))
     
-    variants = []
-    for variant in query.order_by(CVVariant.created_at.desc()).all():
-        variant_dir = V1_DIR / variant.folder_name
-        if not variant_dir.exists():
+    rows = query.order_by(CVVariant.created_at.desc(), CVVariant.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_variant_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [variant.to_list_item() for variant in rows[:limit]], next_cursor
+
+def get_ai_client():
+    """Shared, connection-pooled client for the configured AI provider (None if no API key)
+
+    With AI_HEDGING and a key for the other provider too, this is an LLMRouter
+    that prefers AI_PROVIDER and hedges slow calls / fails over to the other one.
+    """
+    endpoints = {
+        'openai': (OPENAI_API_KEY, OPENAI_BASE_URL),
+        'anthropic': (ANTHROPIC_API_KEY, ANTHROPIC_BASE_URL)
+    }
+    if AI_PROVIDER not in endpoints or not endpoints[AI_PROVIDER][0]:
+        return None
+    clients = []
+    for provider in [AI_PROVIDER] + [p for p in endpoints if p != AI_PROVIDER]:
+        api_key, base_url = endpoints[provider]
+        if not api_key or (clients and not AI_HEDGING):
             continue
-            
-        job_desc_file = variant_dir / "job_desc.md"
-        
-        # Read company name from job_desc if exists
-        company_name = variant.company or variant.folder_name
-        if not variant.company and job_desc_file.exists():
-            with open(job_desc_file, 'r', encoding='utf-8') as f:
-                first_lines = f.read(200)
-                # Try to extract company name from first few lines
-                for line in first_lines.split('\n')[:5]:
-                    if line.strip():
-                        company_name = line.strip()
-                        break
-        
-        variants.append({
-            'folder': variant.folder_name,
-            'company': company_name,
-            'has_tex': variant.has_tex,
-            'has_pdf': variant.has_pdf,
-            'has_job_desc': job_desc_file.exists(),
-            'match_score': variant.match_score,
-            'created': variant.created_at.strftime('%Y-%m-%d')
-        })
-    
-    return variants
+        model = AI_MODEL
+        if clients:
+            # AI_MODEL names the primary's model; anthropic clients map non-Claude names themselves
+            model = AI_SECONDARY_MODEL or ('gpt-4-turbo' if provider == 'openai' and AI_MODEL.startswith('claude') else AI_MODEL)
+        clients.append(get_llm_client(
+            provider,
+            api_key=api_key,
+            model=model,
+            base_url=base_url,
+            timeout=AI_TIMEOUT,
+            max_retries=AI_MAX_RETRIES,
+            limiter=llm_limiter
+        ))
+    if len(clients) == 1:
+        return clients[0]
+    return get_llm_router(
+        clients,
+        hedge_delay=AI_HEDGE_DELAY or None,
+        failure_threshold=AI_BREAKER_FAILURES,
+        reset_timeout=AI_BREAKER_RESET
+    )
+
+def llm_cache_keys(client, temperature, system_prompt, user_prompt):
+    """Cache keys of a prompt for every provider/model that may answer it through client (preferred first)"""
+    members = getattr(client, 'clients', None) or [client]
+    return [llm_cache.make_key(c.provider, c.model, temperature, system_prompt, user_prompt) for c in members]
+
+def cache_llm_response(kind, client, usage, temperature, system_prompt, user_prompt, text):
+    """Cache a response under the provider/model that answered it (client and usage as in record_llm_call)"""
+    usage = usage or {}
+    provider = usage.get('provider', client.provider)
+    model = usage.get('model', client.model)
+    llm_cache.put(llm_cache.make_key(provider, model, temperature, system_prompt, user_prompt), text, kind=kind, model=model)
+
+def record_llm_call(kind, client, usage, latency, raw_input_tokens=None):
+    """Store token usage (including prompt-cache reads/writes) for one provider call
 
-def call_ai_to_optimize_cv(master_tex_content, job_desc_content, prompt_template):
-    """Call AI API to optimize CV based on job description"""
+    client is whatever served the call: an LLMResponse, or the client of a
+    stream (a routed stream names the provider that won in usage).
+    raw_input_tokens is the estimated input size before the prompt was minimized.
+    """
+    usage = usage or {}
+    provider = usage.get('provider', client.provider)
+    model = usage.get('model', client.model)
+    print(f"🧾 {kind} ({provider}/{model}): {usage.get('input_tokens', 0)} in "
+          f"({usage.get('cache_read_tokens', 0)} cache read, {usage.get('cache_write_tokens', 0)} cache write), "
+          f"{usage.get('output_tokens', 0)} out, {latency:.1f}s"
+          + (f" (~{raw_input_tokens} in before minimizing)" if raw_input_tokens else ''))
+    llm_latency.observe(latency, provider=provider, model=model, kind=kind)
+    llm_input_tokens.observe(usage.get('input_tokens', 0), provider=provider, model=model, kind=kind)
+    llm_output_tokens.observe(usage.get('output_tokens', 0), provider=provider, model=model, kind=kind)
+    for token_type in ('input', 'output', 'cache_read', 'cache_write'):
+        llm_tokens.inc(usage.get(f'{token_type}_tokens', 0), provider=provider, model=model, type=token_type)
+    try:
+        db.session.add(LLMCall(
+            kind=kind,
+            provider=provider,
+            model=model,
+            input_tokens=usage.get('input_tokens', 0),
+            output_tokens=usage.get('output_tokens', 0),
+            cache_read_tokens=usage.get('cache_read_tokens', 0),
+            cache_write_tokens=usage.get('cache_write_tokens', 0),
+            raw_input_tokens=raw_input_tokens,
+            latency_ms=int(latency * 1000)
+        ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Could not record LLM call: {e}")
+
+def build_optimize_prompts(master_tex_content, job_desc_content, prompt_template, output_mode='full', minimize=False):
+    """Build the (system, user) prompts for CV optimization
+
+    output_mode 'full' asks for the complete LaTeX document, 'patch' for
+    section edits against the master CV (see latex_patch.py).
+
+    Everything that stays the same while one master CV is tailored to many
+    jobs - instructions, the job_desc_match.md template and the master CV -
+    goes into the system prompt, in that order, so it forms a reusable prefix
+    for provider prompt caching. The job description is the only thing in the
+    user message, at the very end.
+
+    minimize sends the master CV without comments and extra whitespace, with
+    its preamble summarized (restore_preamble puts the real one back), and
+    the job description without boilerplate (see prompt_budget.py).
+    """
+    master_cv = master_tex_content
+    preamble = None
+    if minimize:
+        preamble, body = minimize_cv(master_tex_content)
+        master_cv = body
+        if preamble:
+            master_cv = (f"PREAMBLE (kept on the server and re-inserted automatically, summarized here):\n"
+                         f"{preamble}\n\nDOCUMENT:\n{body}")
+        job_desc_content = strip_jd_boilerplate(job_desc_content)
     
-    system_prompt = f"""You are an expert CV optimization assistant. You will:
-1. Read the master CV (LaTeX format)
-2. Read the job description
-3. Calculate a realistic match percentage (0-100%)
-4. Optimize the CV to match the job requirements
-5. Return BOTH the match score AND the optimized LaTeX code
+    if output_mode == 'patch':
+        output_format = '\n' + PATCH_FORMAT_INSTRUCTIONS
+    elif preamble:
+        output_format = """- Do NOT output the preamble: it is kept from the master CV and re-inserted automatically
 
-{prompt_template}
+CRITICAL OUTPUT FORMAT:
+First line MUST be: MATCH_SCORE: XX%
+Then a blank line
+Then the LaTeX document from \\begin{document} to \\end{document}
+
+Example:
+MATCH_SCORE: 75%
+
+\\begin{document}
+...rest of LaTeX...
+\\end{document}"""
+    else:
+        output_format = """- COPY THE ENTIRE PREAMBLE from master CV including all \\newcommand definitions
 
 CRITICAL OUTPUT FORMAT:
 First line MUST be: MATCH_SCORE: XX%
@@ -170,16 +540,17 @@ Then the complete LaTeX code starting with \\documentclass
 Example:
 MATCH_SCORE: 75%
 
-\\documentclass[a4paper,11pt]{{article}}
+\\documentclass[a4paper,11pt]{article}
 ...rest of LaTeX..."""
     
-    user_prompt = f"""Please analyze and optimize this CV for the following job:
-
-JOB DESCRIPTION:
-{job_desc_content}
+    system_prompt = f"""You are an expert CV optimization assistant. You will:
+1. Read the master CV (LaTeX format)
+2. Read the job description
+3. Calculate a realistic match percentage (0-100%)
+4. Optimize the CV to match the job requirements
+5. Return BOTH the match score AND the optimized LaTeX code
 
-MASTER CV (LaTeX):
-{master_tex_content}
+{prompt_template}
 
 Tasks:
 1. Calculate match percentage based on:
@@ -194,96 +565,119 @@ Tasks:
    - Add keywords from job description (only if they reflect existing experience)
    - Emphasize relevant skills and technologies
    - Keep ALL formatting, packages, and custom commands intact (especially \\myuline definition)
-- COPY THE ENTIRE PREAMBLE from master CV including all \\newcommand definitions"""
-    
-    try:
-        if AI_PROVIDER == 'openai' and OPENAI_API_KEY:
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
-                model=AI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
-            return response.choices[0].message.content.strip()
-        
-        elif AI_PROVIDER == 'anthropic' and ANTHROPIC_API_KEY:
-            client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-            response = client.messages.create(
-                model=AI_MODEL if AI_MODEL.startswith('claude') else 'claude-3-sonnet-20240229',
-                max_tokens=4000,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-            return response.content[0].text.strip()
-        
-        else:
-            return None
+{output_format}
+
+MASTER CV (LaTeX):
+{master_cv}"""
     
-    except Exception as e:
-        print(f"AI API Error: {e}")
-        return None
+    user_prompt = f"""Please analyze and optimize the master CV for the following job:
 
-def allowed_file(filename):
-    """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+JOB DESCRIPTION:
+{job_desc_content}"""
+    return system_prompt, user_prompt
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF file"""
-    try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
-    except Exception as e:
-        print(f"PDF extraction error: {e}")
-        return None
+def optimize_prompts(master_tex_content, job_desc_content, prompt_template, output_mode='full'):
+    """(system_prompt, user_prompt, raw_input_tokens) for the optimize call
+
+    With PROMPT_MINIMIZE the prompts are minimized and raw_input_tokens is the
+    estimated size of the unminimized prompts (None otherwise).
+    """
+    args = (master_tex_content, job_desc_content, prompt_template, output_mode)
+    system_prompt, user_prompt = build_optimize_prompts(*args, minimize=PROMPT_MINIMIZE)
+    if not PROMPT_MINIMIZE:
+        return system_prompt, user_prompt, None
+    before = estimate_tokens(''.join(build_optimize_prompts(*args)))
+    after = estimate_tokens(system_prompt + user_prompt)
+    print(f"✂️ Optimize prompt minimized: ~{before} -> ~{after} tokens ({100 - after * 100 // before}% smaller)")
+    return system_prompt, user_prompt, before
+
+def call_ai_to_optimize_cv(master_tex_content, job_desc_content, prompt_template, use_cache=True, output_mode='full', cache_if=None):
+    """Call AI API to optimize CV based on job description (use_cache=False forces a fresh response)
 
-def extract_text_from_docx(docx_path):
-    """Extract text from DOCX file"""
+    cache_if(response) -> bool keeps responses the caller will reject (e.g. patches
+    that don't apply) out of the cache, so a retry asks the AI again.
+    """
+    system_prompt, user_prompt, raw_input_tokens = optimize_prompts(master_tex_content, job_desc_content, prompt_template, output_mode)
+    kind = 'optimize_patch' if output_mode == 'patch' else 'optimize'
+    
+    client = get_ai_client()
+    if not client:
+        return None
+    
+    if use_cache:
+        cached = llm_cache.get_any(llm_cache_keys(client, 0.7, system_prompt, user_prompt))
+        if cached is not None:
+            print(f"⚡ LLM cache hit ({kind})")
+            return cached
+    
     try:
-        doc = Document(docx_path)
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        return text.strip()
+        response = client.complete(system_prompt, user_prompt, temperature=0.7, max_tokens=4000, cache_prefix=True)
+        record_llm_call(kind, response, response.usage, response.latency, raw_input_tokens)
+        content = response.text
+        if cache_if is None or cache_if(content):
+            cache_llm_response(kind, response, response.usage, 0.7, system_prompt, user_prompt, content)
+        return content
+    
     except Exception as e:
-        print(f"DOCX extraction error: {e}")
+        print(f"AI API Error: {e}")
         return None
 
-def extract_match_score(ai_response):
-    """Extract match score percentage from AI response"""
-    import re
+def stream_ai_to_optimize_cv(master_tex_content, job_desc_content, prompt_template, use_cache=True, output_mode='full', cache_if=None):
+    """Streaming variant of call_ai_to_optimize_cv: yields response text chunks as they are generated
+
+    A cache hit is yielded as a single chunk. The full response is cached once the
+    stream completes (and cache_if accepts it).
+    """
+    system_prompt, user_prompt, raw_input_tokens = optimize_prompts(master_tex_content, job_desc_content, prompt_template, output_mode)
+    kind = 'optimize_patch' if output_mode == 'patch' else 'optimize'
     
-    if not ai_response:
-        return None
+    client = get_ai_client()
+    if not client:
+        return
     
-    # Look for patterns like "Overall Match Percentage: 75%" or "Match: 75%"
-    patterns = [
-        r'Overall Match(?:\s+Percentage)?[:\s]+([0-9]{1,3})%',
-        r'Match(?:\s+Score)?[:\s]+([0-9]{1,3})%',
-        r'Score[:\s]+([0-9]{1,3})%',
-        r'([0-9]{1,3})%\s+match',
-    ]
+    if use_cache:
+        cached = llm_cache.get_any(llm_cache_keys(client, 0.7, system_prompt, user_prompt))
+        if cached is not None:
+            print(f"⚡ LLM cache hit ({kind})")
+            yield cached
+            return
     
-    for pattern in patterns:
-        match = re.search(pattern, ai_response, re.IGNORECASE)
-        if match:
-            score = int(match.group(1))
-            if 0 <= score <= 100:
-                return score
+    chunks = []
+    usage = {}
+    start = time.monotonic()
+    for text in client.stream(system_prompt, user_prompt, temperature=0.7, max_tokens=4000, cache_prefix=True, usage=usage):
+        chunks.append(text)
+        yield text
+    record_llm_call(kind, client, usage, time.monotonic() - start, raw_input_tokens)
     
-    return None
+    content = ''.join(chunks).strip()
+    if content and (cache_if is None or cache_if(content)):
+        cache_llm_response(kind, client, usage, 0.7, system_prompt, user_prompt, content)
+
+def check_preamble(latex_content, master_tex_content):
+    """Check an (in-progress) LaTeX document's preamble against the master CV
+
+    Returns a list of problems: missing \\documentclass and any \\newcommand
+    defined in the master's preamble that the new preamble dropped.
+    """
+    problems = []
+    preamble = latex_content.split('\\begin{document}', 1)[0]
+    if '\\documentclass' not in preamble:
+        problems.append('Missing \\documentclass')
+    
+    master_preamble = master_tex_content.split('\\begin{document}', 1)[0]
+    defined = defined_commands(preamble)
+    for name in sorted(defined_commands(master_preamble)):
+        if name not in defined:
+            problems.append(f'Missing \\newcommand \\{name} from master preamble')
+    return problems
+
+def allowed_file(filename):
+    """Check if file extension is allowed"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def extract_match_score(ai_response):
     """Extract match score percentage from AI response"""
-    import re
-    
     if not ai_response:
         return None
     
@@ -312,26 +706,83 @@ def extract_match_score(ai_response):
     return None
 
 def fix_latex_special_chars(latex_content):
-    """Fix common LaTeX special character issues"""
-    import re
-    
-    # Don't fix escaped characters
-    # Fix unescaped & (but not \\& or in table alignment)
-    latex_content = re.sub(r'(?<!\\)&(?![&\s]*\\\\)', r'\\&', latex_content)
-    
-    # Fix unescaped % (but not \\%)
-    latex_content = re.sub(r'(?<!\\)%(?!.*\\)', r'\\%', latex_content)
-    
-    # Fix unescaped _ (but not \\_ or in math mode)
-    latex_content = re.sub(r'(?<!\\)_(?![_\s]*[\$\\])', r'\\_', latex_content)
-    
-    # Fix unescaped # (but not \\#)
-    latex_content = re.sub(r'(?<!\\)#(?![\d])', r'\\#', latex_content)
-    
-    return latex_content
+    """Fix common LaTeX special character issues (stray & % _ # $, see latex_escape.py)"""
+    return escape_latex(latex_content)
+
+def convert_cv_to_latex(cv_text, use_cache=True):
+    """Convert CV text to LaTeX format using AI (use_cache=False forces a fresh response)
+
+    Long CVs (see CONVERT_MODE) are converted section by section in parallel;
+    if that fails, the whole text is converted in one request as before.
+    """
+    if CONVERT_MODE != 'whole':
+        sections = split_cv_text(cv_text)
+        long_enough = CONVERT_MODE == 'sections' or len(cv_text) >= CONVERT_SECTIONS_MIN_CHARS
+        if long_enough and sum(1 for section in sections if section.key != HEADER) >= 2:
+            latex = convert_cv_sections(sections, use_cache=use_cache)
+            if latex:
+                return latex
+            print("⚠️ Section conversion failed, converting the whole CV in one request")
+    return convert_cv_whole(cv_text, use_cache=use_cache)
+
+def convert_cv_sections(sections, use_cache=True):
+    """Convert CV sections concurrently and assemble them on a shared preamble (None if that fails)
 
-def convert_cv_to_latex(cv_text):
-    """Convert CV text to LaTeX format using AI"""
+    The preamble is master.tex's, so the converted CV uses the same commands
+    as the default template. The assembled document must pass the LaTeX
+    pre-flight check.
+    """
+    preamble = DEFAULT_PREAMBLE
+    if MASTER_TEX.exists():
+        preamble = split_preamble(MASTER_TEX.read_text(encoding='utf-8'))[0]
+    client = get_ai_client()
+    if not client:
+        return None
+
+    def convert(section):
+        prompts = section_prompts(section, preamble)
+        if use_cache:
+            cached = llm_cache.get_any(llm_cache_keys(client, 0.3, *prompts))
+            if cached is not None:
+                return cached, None, prompts
+        response = client.complete(*prompts, temperature=0.3, max_tokens=4000)
+        return response.text, response, prompts
+
+    start = time.time()
+    # Each call still goes through the per-provider concurrency/TPM limiter
+    with ThreadPoolExecutor(max_workers=min(len(sections), CONVERT_SECTION_CONCURRENCY)) as pool:
+        futures = [pool.submit(convert, section) for section in sections]
+    results = []
+    failed = False
+    for section, future in zip(sections, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            print(f"AI conversion error ({section.key}): {e}")
+            failed = True
+
+    # LLMCall rows are written here, on the request thread that has the app context,
+    # also for the sections that completed when another one failed
+    for _, response, _ in results:
+        if response:
+            record_llm_call('convert_section', response, response.usage, response.latency)
+    if failed:
+        return None
+
+    latex = assemble(preamble, [clean_fragment(text) for text, _, _ in results])
+    problems = validate_latex(latex)
+    if problems:
+        print(f"❌ Assembled CV failed the pre-flight check: {problems}")
+        return None
+    # Sections are only cached once they are known to assemble into a valid document
+    for text, response, prompts in results:
+        if response:
+            cache_llm_response('convert_section', response, response.usage, 0.3, *prompts, text)
+    print(f"🧩 Converted {len(sections)} CV sections in {time.time() - start:.1f}s")
+    return latex
+
+def convert_cv_whole(cv_text, use_cache=True):
+    """Convert the whole CV text in one AI request"""
     system_prompt = """You are an expert LaTeX CV converter. You will:
 1. Read a CV in plain text format
 2. Convert it to professional LaTeX format matching the provided template structure
@@ -360,43 +811,96 @@ Generate a complete LaTeX CV using moderncv style. Include:
 - Use \\documentclass{{moderncv}} or similar professional template
 - Return ONLY the LaTeX code, no explanations"""
 
-    try:
-        if AI_PROVIDER == 'openai' and OPENAI_API_KEY:
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
-                model=AI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
-            return response.choices[0].message.content.strip()
-        
-        elif AI_PROVIDER == 'anthropic' and ANTHROPIC_API_KEY:
-            client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-            response = client.messages.create(
-                model=AI_MODEL if AI_MODEL.startswith('claude') else 'claude-3-sonnet-20240229',
-                max_tokens=4000,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-            return response.content[0].text.strip()
-        
+    client = get_ai_client()
+    if not client:
         return None
     
+    if use_cache:
+        cached = llm_cache.get_any(llm_cache_keys(client, 0.3, system_prompt, user_prompt))
+        if cached is not None:
+            print("⚡ LLM cache hit (convert)")
+            return cached
+    
+    try:
+        response = client.complete(system_prompt, user_prompt, temperature=0.3, max_tokens=4000)
+        record_llm_call('convert', response, response.usage, response.latency)
+        content = response.text
+        cache_llm_response('convert', response, response.usage, 0.3, system_prompt, user_prompt, content)
+        return content
+    
     except Exception as e:
         print(f"AI conversion error: {e}")
         return None
 
+def get_master_latex(cv_master):
+    """LaTeX of a CVMaster row (from its blob, or the inline column for rows not yet backfilled)"""
+    if cv_master.content_hash:
+        return blob_store.get(cv_master.content_hash)
+    return cv_master.latex_content
+
+def upload_digest(file):
+    """sha256 of an uploaded file's bytes (the stream is rewound for file.save)"""
+    h = hashlib.sha256()
+    for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+        h.update(chunk)
+    file.stream.seek(0)
+    return h.hexdigest()
+
+def find_converted_master(user_id, **digest):
+    """The user's newest CVMaster matching file_hash= or text_hash=
+
+    Only the user's own uploads count: a hit is reported to the client, which
+    must not learn that someone else uploaded the same CV. Other users' uploads
+    of the same text still reuse the AI conversion through llm_cache.
+    """
+    return CVMaster.query.filter_by(user_id=user_id, **digest).order_by(CVMaster.version.desc()).first()
+
+def reuse_converted_master(cached, user_id, filename, reactivate=True, **digests):
+    """Re-upload of an already converted CV: reactivate that version (or add one sharing its blob), no AI call"""
+    if reactivate:
+        CVMaster.query.filter_by(user_id=user_id, is_active=True).update({'is_active': False})
+        cached.is_active = True
+        for name, value in digests.items():
+            if value and not getattr(cached, name):
+                setattr(cached, name, value)
+        db.session.commit()
+        return cached
+
+    CVMaster.query.filter_by(user_id=user_id, is_active=True).update({'is_active': False})
+    cv_master = CVMaster(
+        user_id=user_id,
+        latex_content='',
+        content_hash=cached.content_hash or blob_store.put(cached.latex_content),
+        original_filename=filename,
+        version=CVMaster.query.filter_by(user_id=user_id).count() + 1,
+        **digests
+    )
+    db.session.add(cv_master)
+    db.session.commit()
+    return cv_master
+
+def write_variant_tex(variant, latex, master_tex_content=None):
+    """Store a variant's LaTeX as a blob (delta against its master) and point the row at it"""
+    variant.tex_hash = blob_store.put(latex, base=master_tex_content)
+    variant.has_tex = True
+    if STORE_TEX_FILES:
+        with open(V1_DIR / variant.folder_name / "main.tex", 'w', encoding='utf-8') as f:
+            f.write(latex)
+
+def read_variant_tex(folder_name):
+    """A variant's LaTeX source as bytes: v1/<folder>/main.tex if present (hand edits win), else its blob"""
+    main_tex = V1_DIR / folder_name / "main.tex"
+    if main_tex.exists():
+        return main_tex.read_bytes()
+    variant = CVVariant.query.filter_by(folder_name=folder_name).first()
+    latex = blob_store.get(variant.tex_hash) if variant else None
+    return latex.encode('utf-8') if latex is not None else None
+
 def get_user_master_tex(user_id):
     """Get user's personal master.tex content from database, or default from file"""
     cv_master = CVMaster.query.filter_by(user_id=user_id, is_active=True).first()
     if cv_master:
-        return cv_master.latex_content
+        return get_master_latex(cv_master)
     
     # Fallback to default master.tex file
     if MASTER_TEX.exists():
@@ -404,78 +908,307 @@ def get_user_master_tex(user_id):
             return f.read()
     return None
 
-def compile_cv_internal(folder_name):
-    """Internal function to compile CV (used by auto-optimize)"""
+def compile_variant_pdf(folder_name):
+    """Compile a variant's main.tex to main.pdf, serving repeat sources from the compile cache
+
+    Returns a (success, error_message) tuple. The time taken is recorded in
+    vibe_compile_duration_seconds by outcome.
+    """
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        success, error, outcome = _compile_variant_pdf(folder_name)
+        return success, error
+    finally:
+        compile_latency.observe(time.perf_counter() - start, outcome=outcome)
+
+def _compile_variant_pdf(folder_name):
+    """compile_variant_pdf's work; returns (success, error_message, outcome)"""
     variant_dir = V1_DIR / folder_name
-    main_tex = variant_dir / "main.tex"
+    tex_source = read_variant_tex(folder_name)
     
-    if not main_tex.exists():
+    if tex_source is None:
         print(f"❌ main.tex not found for {folder_name}")
-        return False
+        return False, 'main.tex not found. Please optimize CV first.', 'missing'
+    
+    output_pdf = variant_dir / "main.pdf"
     
-    # Use Docker to compile
-    home_dir = Path.home()
-    # Use hash of folder_name to avoid special characters in filename
-    import hashlib
-    safe_name = hashlib.md5(folder_name.encode()).hexdigest()[:12]
-    temp_tex = home_dir / f"cv-{safe_name}.tex"
+    # Byte-identical source + same TeX image + same flags -> same PDF
+    cache_key = compile_cache.make_key(tex_source, get_image_digest(TEX_IMAGE), LATEXMK_FLAGS)
+    if compile_cache.get(cache_key, output_pdf):
+        print(f"⚡ Compile cache hit for {folder_name}")
+        return True, None, 'cache_hit'
+    
+    # Reject documents that can never compile before they take a compile slot
+    problems = validate_latex(tex_source.decode('utf-8', errors='replace'))
+    if problems:
+        print(f"❌ LaTeX pre-flight check failed for {folder_name}: {problems}")
+        error_log = variant_dir / "compile_error.log"
+        with open(error_log, 'w') as f:
+            f.write("Pre-flight check failed:\n" + '\n'.join(f'- {p}' for p in problems) + '\n')
+        return False, f"LaTeX pre-flight check failed: {'; '.join(problems[:3])}", 'preflight_error'
     
     try:
-        # Copy tex file to home directory
-        subprocess.run(['cp', str(main_tex), str(temp_tex)], check=True)
-        print(f"📄 Compiling {folder_name}...")
-        
-        # Compile with Docker (disable bibtex, force compilation)
-        result = subprocess.run([
-            'docker', 'run', '--rm',
-            '-v', f'{home_dir}:/workspace',
-            '-w', '/workspace',
-            'texlive/texlive:latest',
-            'latexmk', '-pdf', '-interaction=nonstopmode', '-f', '-bibtex-', f'cv-{safe_name}.tex'
-        ], capture_output=True, timeout=60, text=True)
-        
-        if result.returncode != 0:
-            print(f"❌ LaTeX compilation failed for {folder_name}")
-            print(f"STDERR: {result.stderr[:500]}")
-            # Save error log for debugging
-            error_log = variant_dir / "compile_error.log"
-            with open(error_log, 'w') as f:
-                f.write(f"STDOUT:\n{result.stdout}\n\nSTDERR:\n{result.stderr}")
-            return False
-        
-        # Copy PDF back
-        temp_pdf = home_dir / f"cv-{safe_name}.pdf"
-        output_pdf = variant_dir / "main.pdf"
-        
-        if temp_pdf.exists():
-            subprocess.run(['cp', str(temp_pdf), str(output_pdf)], check=True)
+        # Each compile runs in its own scratch dir; at most MAX_CONCURRENT_COMPILES at once
+        queued_at = time.perf_counter()
+        with compile_scheduler.slot() as workdir:
+            compile_queue_wait.observe(time.perf_counter() - queued_at)
+            # Write the exact bytes we hashed, so the cache entry matches what was compiled
+            (workdir / "main.tex").write_bytes(tex_source)
+            print(f"📄 Compiling {folder_name}...")
+            
+            # Compile on the TeX engine (disable bibtex, force compilation)
+            result = tex_engine.run(workdir, ['latexmk', *LATEXMK_FLAGS, 'main.tex'], COMPILE_TIMEOUT)
+            
+            if result.returncode != 0:
+                print(f"❌ LaTeX compilation failed for {folder_name}")
+                print(f"STDERR: {result.stderr[:500]}")
+                # Save error log for debugging
+                error_log = variant_dir / "compile_error.log"
+                with open(error_log, 'w') as f:
+                    f.write(f"STDOUT:\n{result.stdout}\n\nSTDERR:\n{result.stderr}")
+                return False, f'Compilation failed: {result.stderr[:200]}', 'latex_error'
+            
+            temp_pdf = workdir / "main.pdf"
+            if not temp_pdf.exists():
+                print(f"❌ PDF file not generated for {folder_name}")
+                return False, 'PDF not generated', 'no_pdf'
+            
+            # Copy PDF back atomically so downloads never see a half-written file
+            partial_pdf = variant_dir / f".main.pdf.{workdir.name}"
+            shutil.copyfile(temp_pdf, partial_pdf)
+            os.replace(partial_pdf, output_pdf)
+            compile_cache.put(cache_key, output_pdf)
             print(f"✅ PDF compiled successfully: {output_pdf}")
-            # Cleanup temp files
-            for ext in ['tex', 'pdf', 'aux', 'log', 'out', 'fls', 'fdb_latexmk']:
-                temp_file = home_dir / f"cv-{safe_name}.{ext}"
-                if temp_file.exists():
-                    temp_file.unlink()
-            return True
-        else:
-            print(f"❌ PDF file not generated for {folder_name}")
-        
-        return False
+            return True, None, 'success'
     
+    except CompileQueueTimeout:
+        print(f"⏳ Compile queue full, gave up on {folder_name}")
+        return False, 'Compile queue is full, please try again shortly', 'queue_timeout'
     except subprocess.TimeoutExpired:
         print(f"⏱️ Compilation timeout for {folder_name}")
-        return False
+        return False, f'Compilation timeout ({COMPILE_TIMEOUT}s)', 'timeout'
+
+def compile_cv_internal(folder_name):
+    """Internal function to compile CV (used by auto-optimize)"""
+    try:
+        success, _ = compile_variant_pdf(folder_name)
+        return success
     except Exception as e:
         print(f"❌ Compilation error for {folder_name}: {e}")
         import traceback
         traceback.print_exc()
         return False
 
+def clean_ai_latex(ai_response):
+    """Strip the MATCH_SCORE line and markdown code fences from an AI response, then fix special chars"""
+    optimized_latex = ai_response
+    if 'MATCH_SCORE:' in optimized_latex:
+        lines = optimized_latex.split('\n')
+        # Skip first line (MATCH_SCORE) and any blank lines after it
+        start_idx = 0
+        for i, line in enumerate(lines):
+            if line.strip() and not line.startswith('MATCH_SCORE:'):
+                start_idx = i
+                break
+        optimized_latex = '\n'.join(lines[start_idx:])
+    
+    # Clean markdown code blocks if present
+    if '```latex' in optimized_latex:
+        optimized_latex = optimized_latex.split('```latex')[1].split('```')[0].strip()
+    elif '```' in optimized_latex:
+        optimized_latex = optimized_latex.split('```')[1].split('```')[0].strip()
+    
+    # Fix common LaTeX special character issues
+    return fix_latex_special_chars(optimized_latex)
+
+def stream_optimize_into_job(reporter, master_tex_content, job_desc_content, prompt_template, use_cache=True, output_mode='full', cache_if=None):
+    """Stream the optimize call into a job: match score, LaTeX chunks and preamble check are published as they arrive
+
+    Returns the full AI response (or None on error), like call_ai_to_optimize_cv.
+    """
+    parts = []
+    head = ''  # text received before the MATCH_SCORE line is complete
+    score_sent = False
+    preamble_checked = False
+    
+    try:
+        for chunk in stream_ai_to_optimize_cv(master_tex_content, job_desc_content, prompt_template, use_cache=use_cache,
+                                              output_mode=output_mode, cache_if=cache_if):
+            parts.append(chunk)
+            
+            if not score_sent:
+                head += chunk
+                if '\n' not in head and len(head) < 200:
+                    continue
+                first_line, _, rest = head.partition('\n')
+                if 'MATCH_SCORE:' in first_line:
+                    match_score = extract_match_score(first_line)
+                    reporter.finish('score', f'Match: {match_score}%' if match_score else 'Match score unavailable', match_score=match_score)
+                    chunk = rest.lstrip('\n')
+                else:
+                    chunk = head
+                score_sent = True
+            
+            reporter.stream(chunk)
+            
+            # Validate the preamble as soon as it is complete, while the body is still generating
+            if not preamble_checked and '\\begin{document}' in ''.join(parts[-3:]):
+                preamble_checked = True
+                streamed = ''.join(parts)
+                if PROMPT_MINIMIZE:
+                    streamed = restore_preamble(streamed, split_preamble(master_tex_content)[0])
+                problems = check_preamble(streamed, master_tex_content)
+                reporter.finish('preamble', 'Preamble OK' if not problems else '; '.join(problems), ok=not problems, problems=problems)
+        
+        if not score_sent and head:
+            reporter.stream(head)
+        reporter.flush_output()
+    
+    except Exception as e:
+        print(f"AI API Error: {e}")
+        return None
+    
+    return ''.join(parts).strip() or None
+
+def run_variant_pipeline(reporter, variant_id, use_cache=True):
+    """Background job: AI optimize -> write main.tex -> compile PDF for a new variant"""
+    variant = db.session.get(CVVariant, variant_id)
+    folder_name = variant.folder_name
+    variant_dir = V1_DIR / folder_name
+    result = {'folder_name': folder_name, 'has_tex': False, 'has_pdf': False, 'match_score': None}
+    messages = [f'Created variant folder: {folder_name}']
+    
+    def done():
+        result['message'] = ' | '.join(messages)
+        return result
+    
+    # Stage 1: AI optimization
+    reporter.start('ai')
+    master_tex_content = get_user_master_tex(variant.user_id)
+    if not master_tex_content:
+        messages.append('No master CV found')
+        reporter.finish('ai', 'No master CV found')
+        return done()
+    
+    # Read prompt template
+    prompt_file = PROMPTS_DIR / "job_desc_match.md"
+    prompt_template = ""
+    if prompt_file.exists():
+        with open(prompt_file, 'r', encoding='utf-8') as f:
+            prompt_template = f.read()
+    
+    def patch_applies(ai_response):
+        try:
+            apply_patch(master_tex_content, ai_response, fix_body=fix_latex_special_chars)
+            return True
+        except PatchError:
+            return False
+    
+    def optimize(output_mode):
+        # Section edits are only cached once they apply, else every retry would replay the broken patch
+        cache_if = patch_applies if output_mode == 'patch' else None
+        if AI_STREAMING:
+            return stream_optimize_into_job(reporter, master_tex_content, variant.job_description, prompt_template, use_cache=use_cache, output_mode=output_mode, cache_if=cache_if)
+        return call_ai_to_optimize_cv(master_tex_content, variant.job_description, prompt_template, use_cache=use_cache, output_mode=output_mode, cache_if=cache_if)
+    
+    optimized_latex = None
+    ai_response = optimize(AI_OUTPUT_MODE)
+    if ai_response and AI_OUTPUT_MODE == 'patch':
+        try:
+            optimized_latex = apply_patch(master_tex_content, ai_response, fix_body=fix_latex_special_chars)
+            reporter.finish('patch', 'Section edits applied', ok=True)
+        except PatchError as e:
+            # Edits that don't apply cleanly are never written; regenerate the whole document instead
+            print(f"⚠️ Section edits did not apply ({e}), falling back to full output")
+            reporter.finish('patch', f'Section edits did not apply ({e})', ok=False)
+            # The rejected edits (and their score) were streamed already: clear them before the full CV streams
+            reporter.reset_output('regenerate', 'Section edits failed, regenerating the full CV')
+            reporter.start('ai')
+            ai_response = optimize('full')
+    if not ai_response:
+        messages.append('AI optimization skipped (no API response)')
+        reporter.finish('ai', 'AI optimization skipped (no API response)')
+        return done()
+    
+    match_score = extract_match_score(ai_response)
+    if match_score is None:
+        # The model left out MATCH_SCORE - fall back to the local keyword scorer
+        match_score = match_scorer.score(master_tex_content, variant.job_description)
+        messages.append(f'Match: {match_score}% (local estimate)')
+    else:
+        messages.append(f'Match: {match_score}%')
+    variant.match_score = match_score
+    result['match_score'] = match_score
+    if optimized_latex is None:
+        optimized_latex = clean_ai_latex(ai_response)
+        if PROMPT_MINIMIZE:
+            optimized_latex = restore_preamble(optimized_latex, split_preamble(master_tex_content)[0])
+    reporter.finish('ai', 'AI optimized successfully', match_score=match_score)
+    
+    # Repair what can be repaired (e.g. a dropped preamble), reject what can never compile
+    optimized_latex, repairs, problems = preflight(optimized_latex, master_tex_content)
+    if problems:
+        reporter.finish('validate', '; '.join(problems), ok=False, problems=problems, repairs=repairs)
+    else:
+        reporter.finish('validate', '; '.join(repairs) or 'LaTeX OK', ok=True, problems=[], repairs=repairs)
+    
+    # Stage 2: write optimized LaTeX
+    reporter.start('write')
+    write_variant_tex(variant, optimized_latex, master_tex_content)
+    db.session.commit()
+    result['has_tex'] = True
+    messages.append('AI optimized successfully')
+    reporter.finish('write', 'LaTeX written', has_tex=True)
+    
+    if problems:
+        messages.append(f"Skipped compile, LaTeX pre-flight check failed: {'; '.join(problems[:3])}")
+        reporter.finish('compile', f"Skipped compile, LaTeX pre-flight check failed: {'; '.join(problems[:3])}", has_pdf=False)
+        return done()
+    
+    # Stage 3: auto-compile PDF
+    reporter.start('compile')
+    try:
+        compile_success, compile_error = compile_variant_pdf(folder_name)
+    except Exception as e:
+        compile_success, compile_error = False, str(e)
+    if compile_success:
+        variant.has_pdf = True
+        db.session.commit()
+        result['has_pdf'] = True
+        messages.append('PDF compiled successfully')
+        reporter.finish('compile', 'PDF compiled successfully', has_pdf=True)
+    else:
+        messages.append(f'PDF compilation failed: {compile_error}')
+        reporter.finish('compile', f'PDF compilation failed: {compile_error}', has_pdf=False)
+    
+    return done()
+
 @app.route('/')
 @login_required
 def index():
     """Render main page"""
-    variants = get_existing_variants(user_id=current_user.id)
-    return render_template('index.html', variants=variants, user=current_user)
+    variants, next_cursor = get_existing_variants(user_id=current_user.id)
+    return render_template('index.html', variants=variants, next_cursor=next_cursor, user=current_user)
+
+@app.route('/api/variants')
+@login_required
+def list_variants():
+    """Paginated variant listing: ?limit=N&cursor=<next_cursor from the previous page>"""
+    try:
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        variants, next_cursor = get_existing_variants(
+            user_id=current_user.id,
+            limit=limit,
+            cursor=request.args.get('cursor') or None
+        )
+        return jsonify({'variants': variants, 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -567,28 +1300,66 @@ def upload_cv():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Only PDF and DOC/DOCX files are allowed'}), 400
         
-        # Save file temporarily
+        # use_cache=false in the form bypasses the re-upload and AI response caches;
+        # reactivate=false adds a new version instead of switching back to the matching one
+        use_cache = request.form.get('use_cache', 'true').lower() != 'false'
+        reactivate = request.form.get('reactivate', 'true').lower() != 'false'
         filename = secure_filename(file.filename)
         file_ext = filename.rsplit('.', 1)[1].lower()
+        
+        # Same file converted before: skip extraction and the AI round trip
+        file_hash = upload_digest(file)
+        cached = find_converted_master(current_user.id, file_hash=file_hash) if use_cache else None
+        if cached:
+            print(f"⚡ Re-upload cache hit (file) for user {current_user.id}")
+            cv_master = reuse_converted_master(cached, current_user.id, filename, reactivate, file_hash=file_hash)
+            return jsonify({
+                'success': True,
+                'message': f'CV already converted, using version {cv_master.version}',
+                'master_file': f"database_id_{cv_master.id}",
+                'cached': True
+            })
+        
+        # Save file temporarily
         temp_file_path = UPLOAD_FOLDER / f"user_{current_user.id}_{filename}"
         file.save(temp_file_path)
         
-        # Extract text from file
-        if file_ext == 'pdf':
-            cv_text = extract_text_from_pdf(temp_file_path)
-        else:  # doc or docx
-            cv_text = extract_text_from_docx(temp_file_path)
+        # Extract text from file (in a worker process; this thread just waits)
+        extract_start = time.perf_counter()
+        try:
+            cv_text = text_extractor.extract(temp_file_path, file_ext)
+        except ExtractionError as e:
+            extraction_latency.observe(time.perf_counter() - extract_start, format=file_ext, outcome='error')
+            print(f"❌ Text extraction failed: {e}")
+            temp_file_path.unlink()
+            return jsonify({'error': str(e)}), 400
+        extraction_latency.observe(time.perf_counter() - extract_start, format=file_ext, outcome='ok')
         
         if not cv_text:
             temp_file_path.unlink()  # Clean up
             return jsonify({'error': 'Failed to extract text from file'}), 500
         
+        # Same CV text (e.g. re-exported PDF) converted before
+        text_hash = text_fingerprint(cv_text)
+        cached = find_converted_master(current_user.id, text_hash=text_hash) if use_cache else None
+        if cached:
+            print(f"⚡ Re-upload cache hit (text) for user {current_user.id}")
+            temp_file_path.unlink()
+            cv_master = reuse_converted_master(cached, current_user.id, filename, reactivate,
+                                               file_hash=file_hash, text_hash=text_hash)
+            return jsonify({
+                'success': True,
+                'message': f'CV already converted, using version {cv_master.version}',
+                'master_file': f"database_id_{cv_master.id}",
+                'cached': True
+            })
+        
         # Convert to LaTeX using AI
-        if not (OPENAI_API_KEY or ANTHROPIC_API_KEY):
+        if get_ai_client() is None:
             temp_file_path.unlink()
             return jsonify({'error': 'AI API key not configured'}), 500
         
-        latex_content = convert_cv_to_latex(cv_text)
+        latex_content = convert_cv_to_latex(cv_text, use_cache=use_cache)
         
         if not latex_content:
             temp_file_path.unlink()
@@ -603,19 +1374,17 @@ def upload_cv():
         # Fix common LaTeX special character issues
         latex_content = fix_latex_special_chars(latex_content)
         
-        # Save as user's master.tex
-        user_master = V1_DIR / f"user_{current_user.id}_master.tex"
-        with open(user_master, 'w', encoding='utf-8') as f:
-            f.write(latex_content)
-        
-        # Store in database
+        # Store in database (re-uploading the same CV reuses the existing blob)
         # Deactivate previous masters
         CVMaster.query.filter_by(user_id=current_user.id, is_active=True).update({'is_active': False})
         
         # Create new master record
         cv_master = CVMaster(
             user_id=current_user.id,
-            latex_content=latex_content,
+            latex_content='',
+            content_hash=blob_store.put(latex_content),
+            file_hash=file_hash,
+            text_hash=text_hash,
             original_filename=filename,
             version=CVMaster.query.filter_by(user_id=current_user.id).count() + 1
         )
@@ -628,9 +1397,12 @@ def upload_cv():
         return jsonify({
             'success': True,
             'message': 'CV uploaded and converted successfully',
-            'master_file': f"user_{current_user.id}_master.tex"
+            'master_file': f"database_id_{cv_master.id}",
+            'cached': False
         })
     
+    except RequestEntityTooLarge as e:
+        return request_too_large(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -654,6 +1426,7 @@ def create_variant():
         role_name = data.get('role_name', '').strip()
         job_description = data.get('job_description', '').strip()
         auto_optimize = data.get('auto_optimize', True)
+        use_cache = data.get('use_cache', True)  # False = bypass the AI response cache
         
         if not company_name or not role_name or not job_description:
             return jsonify({'error': 'All fields are required'}), 400
@@ -676,7 +1449,8 @@ def create_variant():
             folder_name=folder_name,
             company=company_name,
             role=role_name,
-            job_description=job_description
+            job_description=job_description,
+            has_job_desc=True
         )
         db.session.add(variant)
         db.session.commit()
@@ -696,90 +1470,230 @@ def create_variant():
             'message': f'Created variant folder: {folder_name}'
         }
         
-        # AI Optimization (if enabled and API key available)
-        if auto_optimize and (OPENAI_API_KEY or ANTHROPIC_API_KEY):
-            try:
-                # Read user's master.tex or default
-                master_tex_content = get_user_master_tex(current_user.id)
-                
-                if not master_tex_content:
-                    result['message'] += ' | No master CV found'
-                    return jsonify(result)
-                
-                # Read prompt template
-                prompt_file = PROMPTS_DIR / "job_desc_match.md"
-                prompt_template = ""
-                if prompt_file.exists():
-                    with open(prompt_file, 'r', encoding='utf-8') as f:
-                        prompt_template = f.read()
-                
-                # Call AI
-                ai_response = call_ai_to_optimize_cv(master_tex_content, job_description, prompt_template)
-                
-                if ai_response:
-                    # Extract match score from response
-                    match_score = extract_match_score(ai_response)
-                    if match_score:
-                        variant.match_score = match_score
-                        result['match_score'] = match_score
-                        result['message'] += f' | Match: {match_score}%'
-                    
-                    # Remove MATCH_SCORE line if present
-                    optimized_latex = ai_response
-                    if 'MATCH_SCORE:' in optimized_latex:
-                        lines = optimized_latex.split('\n')
-                        # Skip first line (MATCH_SCORE) and any blank lines after it
-                        start_idx = 0
-                        for i, line in enumerate(lines):
-                            if line.strip() and not line.startswith('MATCH_SCORE:'):
-                                start_idx = i
-                                break
-                        optimized_latex = '\n'.join(lines[start_idx:])
-                    
-                    # Clean markdown code blocks if present
-                    if '```latex' in optimized_latex:
-                        optimized_latex = optimized_latex.split('```latex')[1].split('```')[0].strip()
-                    elif '```' in optimized_latex:
-                        optimized_latex = optimized_latex.split('```')[1].split('```')[0].strip()
-                    
-                    # Fix common LaTeX special character issues
-                    optimized_latex = fix_latex_special_chars(optimized_latex)
-                    
-                    # Write optimized LaTeX
-                    main_tex = variant_dir / "main.tex"
-                    with open(main_tex, 'w', encoding='utf-8') as f:
-                        f.write(optimized_latex)
-                    
-                    # Update database
-                    variant.has_tex = True
-                    db.session.commit()
-                    
-                    result['message'] += ' | AI optimized successfully'
-                    
-                    # Auto-compile PDF
-                    try:
-                        compile_success = compile_cv_internal(folder_name)
-                        if compile_success:
-                            variant.has_pdf = True
-                            db.session.commit()
-                            result['has_pdf'] = True
-                            result['message'] += ' | PDF compiled successfully'
-                        else:
-                            result['message'] += ' | PDF compilation failed'
-                    except Exception as compile_error:
-                        result['message'] += f' | PDF compilation failed: {str(compile_error)}'
-                
-                else:
-                    result['message'] += ' | AI optimization skipped (no API response)'
-            
-            except Exception as ai_error:
-                result['message'] += f' | AI optimization failed: {str(ai_error)}'
+        # AI Optimization (if enabled and the AI provider has a key) runs as a background job
+        if auto_optimize and get_ai_client() is not None:
+            job = job_runner.create(current_user.id, 'create_variant', variant_id=variant.id)
+            job_runner.submit(job.id, run_variant_pipeline, variant.id, use_cache)
+            result.update({
+                'job_id': job.id,
+                'status_url': url_for('job_status', job_id=job.id),
+                'events_url': url_for('job_events', job_id=job.id),
+                'message': result['message'] + ' | AI optimization queued'
+            })
+            return jsonify(result), 202
         
         return jsonify(result)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/create-variants-batch', methods=['POST'])
+@login_required
+def create_variants_batch():
+    """Create many CV variants at once; AI optimization and compiles fan out as background jobs"""
+    try:
+        data = request.json or {}
+        entries = data.get('variants') or []
+        auto_optimize = data.get('auto_optimize', True)
+        use_cache = data.get('use_cache', True)  # False = bypass the AI response cache
+        
+        if not isinstance(entries, list) or not entries:
+            return jsonify({'error': 'variants must be a non-empty list'}), 400
+        if len(entries) > BATCH_MAX_VARIANTS:
+            return jsonify({'error': f'At most {BATCH_MAX_VARIANTS} variants per batch'}), 400
+        
+        # Validate everything up front so the batch is created all-or-nothing
+        rows = []
+        seen = set()
+        errors = []
+        for i, entry in enumerate(entries):
+            company_name = (entry.get('company') or '').strip()
+            role_name = (entry.get('role') or '').strip()
+            job_description = (entry.get('job_description') or '').strip()
+            if not company_name or not role_name or not job_description:
+                errors.append({'index': i, 'error': 'company, role and job_description are required'})
+                continue
+            folder_name = sanitize_folder_name(f"{company_name}-{role_name}")
+            if folder_name in seen:
+                errors.append({'index': i, 'error': f'Duplicate variant "{folder_name}" in batch'})
+                continue
+            seen.add(folder_name)
+            rows.append((folder_name, company_name, role_name, job_description))
+        
+        existing = {
+            v.folder_name for v in CVVariant.query.filter(
+                CVVariant.user_id == current_user.id,
+                CVVariant.folder_name.in_(seen)
+            )
+        }
+        for folder_name in existing:
+            errors.append({'folder_name': folder_name, 'error': f'Variant "{folder_name}" already exists'})
+        
+        if errors:
+            return jsonify({'error': 'Invalid batch', 'details': errors}), 400
+        
+        # One transaction for every variant row (and its job)
+        variants = []
+        for folder_name, company_name, role_name, job_description in rows:
+            variant = CVVariant(
+                user_id=current_user.id,
+                folder_name=folder_name,
+                company=company_name,
+                role=role_name,
+                job_description=job_description,
+                has_job_desc=True
+            )
+            db.session.add(variant)
+            variants.append(variant)
+        db.session.flush()
+        
+        run_ai = auto_optimize and get_ai_client() is not None
+        jobs = []
+        if run_ai:
+            jobs = [job_runner.create(current_user.id, 'create_variant', variant_id=v.id, commit=False) for v in variants]
+        db.session.commit()
+        
+        results = []
+        for i, variant in enumerate(variants):
+            variant_dir = V1_DIR / variant.folder_name
+            variant_dir.mkdir(parents=True, exist_ok=True)
+            with open(variant_dir / "job_desc.md", 'w', encoding='utf-8') as f:
+                f.write(f"# {variant.company}\n")
+                f.write(f"**Role:** {variant.role}\n\n")
+                f.write(f"---\n\n")
+                f.write(variant.job_description)
+            
+            item = {'folder_name': variant.folder_name}
+            if run_ai:
+                # LLM calls inside the jobs are bounded by the per-provider limiter,
+                # and each finished .tex goes straight on to the compile scheduler
+                job_runner.submit(jobs[i].id, run_variant_pipeline, variant.id, use_cache)
+                item.update({
+                    'job_id': jobs[i].id,
+                    'status_url': url_for('job_status', job_id=jobs[i].id),
+                    'events_url': url_for('job_events', job_id=jobs[i].id)
+                })
+            results.append(item)
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'variants': results,
+            'message': f'Created {len(results)} variants' + (' | AI optimization queued' if run_ai else '')
+        }), 202 if run_ai else 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/match-scores', methods=['POST'])
+@login_required
+def match_scores():
+    """Instant local match scores of the user's master CV against many job descriptions
+
+    Body: {"job_descriptions": ["...", ...]} to triage new JDs, or {} to score every stored variant's JD.
+    """
+    try:
+        data = request.json or {}
+        master_tex_content = get_user_master_tex(current_user.id)
+        if not master_tex_content:
+            return jsonify({'error': 'No master CV found'}), 400
+        
+        job_descriptions = data.get('job_descriptions')
+        if job_descriptions is not None:
+            if not isinstance(job_descriptions, list):
+                return jsonify({'error': 'job_descriptions must be a list'}), 400
+            labels = [{'index': i} for i in range(len(job_descriptions))]
+        else:
+            rows = CVVariant.query.with_entities(CVVariant.folder_name, CVVariant.job_description) \
+                .filter_by(user_id=current_user.id).all()
+            labels = [{'folder_name': folder_name} for folder_name, _ in rows]
+            job_descriptions = [jd or '' for _, jd in rows]
+        
+        scores = match_scorer.score_many(master_tex_content, job_descriptions)
+        results = []
+        for label, jd, score in zip(labels, job_descriptions, scores):
+            item = {**label, 'match_score': int(score)}
+            if data.get('explain'):
+                item['missing_terms'] = top_terms_missing(master_tex_content, jd)
+            results.append(item)
+        results.sort(key=lambda r: -r['match_score'])
+        
+        return jsonify({'success': True, 'scores': results})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """Get status, finished stages and result of a background job"""
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    """Server-Sent Events stream reporting each job stage as it finishes
+
+    Events: chunk (streamed AI output), stage, status, reset (discard the
+    chunks and score received so far, they are regenerated), done/failed/timeout.
+    """
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    def generate():
+        sent = 0
+        sent_output = 0
+        last_stage = None
+        idle_polls = 0
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT
+        while True:
+            # Job state is written by worker threads/processes - always re-read it
+            db.session.expire_all()
+            job = db.session.get(Job, job_id)
+            
+            # Stages first: a reset_output stage means the output was cleared and is streamed again from the start
+            progress = job.get_progress()
+            for entry in progress[sent:]:
+                yield sse('stage', entry)
+                if entry.get('reset_output'):
+                    yield sse('reset', entry)
+                    sent_output = 0
+            
+            output = job.output or ''
+            if len(output) > sent_output:
+                yield sse('chunk', {'text': output[sent_output:]})
+                sent_output = len(output)
+            if job.stage != last_stage and not job.is_finished:
+                yield sse('status', {'status': job.status, 'stage': job.stage})
+                last_stage = job.stage
+            idle_polls = 0 if len(progress) > sent else idle_polls + 1
+            sent = len(progress)
+            
+            if job.is_finished:
+                yield sse('done' if job.status == 'succeeded' else 'failed', job.to_dict())
+                return
+            if time.monotonic() > deadline:
+                yield sse('timeout', {'status': job.status, 'stage': job.stage})
+                return
+            if idle_polls % 30 == 29:
+                yield ": keep-alive\n\n"
+            
+            time.sleep(JOB_EVENTS_POLL_INTERVAL)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/compile-cv', methods=['POST'])
 @login_required
 def compile_cv():
@@ -800,83 +1714,154 @@ def compile_cv():
             return jsonify({'error': 'Access denied'}), 403
         
         variant_dir = V1_DIR / folder_name
-        main_tex = variant_dir / "main.tex"
+        output_pdf = variant_dir / "main.pdf"
         
         print(f"📂 Variant dir: {variant_dir}")
-        print(f"📄 main.tex exists: {main_tex.exists()}")
-        
-        if not main_tex.exists():
-            return jsonify({'error': 'main.tex not found. Please optimize CV first.'}), 400
-        
-        # Use Docker to compile
-        home_dir = Path.home()
-        # Use hash of folder_name to avoid special characters in filename
-        import hashlib
-        safe_name = hashlib.md5(folder_name.encode()).hexdigest()[:12]
-        temp_tex = home_dir / f"cv-{safe_name}.tex"
-        
-        print(f"🔨 Temp file: {temp_tex}")
-        
-        # Copy tex file to home directory (Docker can access it)
-        subprocess.run(['cp', str(main_tex), str(temp_tex)], check=True)
-        
-        print(f"🐳 Running Docker compilation...")
-        
-        # Compile with Docker (disable bibtex, force compilation)
-        result = subprocess.run([
-            'docker', 'run', '--rm',
-            '-v', f'{home_dir}:/workspace',
-            '-w', '/workspace',
-            'texlive/texlive:latest',
-            'latexmk', '-pdf', '-interaction=nonstopmode', '-f', '-bibtex-', f'cv-{safe_name}.tex'
-        ], capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            print(f"❌ Compilation failed with return code: {result.returncode}")
-            print(f"STDERR: {result.stderr[:500]}")
-            # Save error log
-            error_log = variant_dir / "compile_error.log"
-            with open(error_log, 'w') as f:
-                f.write(f"STDOUT:\n{result.stdout}\n\nSTDERR:\n{result.stderr}")
-            return jsonify({'error': f'Compilation failed: {result.stderr[:200]}'}), 500
-        
-        # Copy PDF back
-        temp_pdf = home_dir / f"cv-{safe_name}.pdf"
-        output_pdf = variant_dir / "main.pdf"
         
-        print(f"📦 PDF exists: {temp_pdf.exists()}")
+        success, error = compile_variant_pdf(folder_name)
+        if not success:
+            status = 400 if not variant.has_tex else 500
+            return jsonify({'error': error}), status
         
-        if temp_pdf.exists():
-            subprocess.run(['cp', str(temp_pdf), str(output_pdf)], check=True)
-            print(f"✅ PDF copied to: {output_pdf}")
-            # Cleanup temp files
-            for ext in ['tex', 'pdf', 'aux', 'log', 'out', 'fls', 'fdb_latexmk']:
-                temp_file = home_dir / f"cv-{safe_name}.{ext}"
-                if temp_file.exists():
-                    temp_file.unlink()
-            
-            # Update database
-            variant.has_pdf = True
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'CV compiled successfully',
-                'pdf_path': str(output_pdf)
-            })
-        else:
-            print(f"❌ PDF file not generated")
-            return jsonify({'error': 'PDF not generated'}), 500
+        # Update database
+        variant.has_pdf = True
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'CV compiled successfully',
+            'pdf_path': str(output_pdf)
+        })
     
-    except subprocess.TimeoutExpired:
-        print(f"⏱️ Compilation timeout")
-        return jsonify({'error': 'Compilation timeout (60s)'}), 500
     except Exception as e:
         print(f"❌ Exception in compile_cv: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/compile-cache/stats')
+@login_required
+def compile_cache_stats():
+    """Compile cache hit/miss counters and disk usage"""
+    return jsonify(compile_cache.stats())
+
+@app.route('/api/llm-cache/stats')
+@login_required
+def llm_cache_stats():
+    """AI response cache hit/miss counters and size"""
+    return jsonify(llm_cache.stats())
+
+@app.route('/api/llm/usage')
+@login_required
+def llm_usage():
+    """Token usage per call kind, including how much input was served from the provider prompt cache
+
+    For minimized prompts, raw_input_tokens is the estimated input they would
+    have used unminimized and input_reduction the share that was saved.
+    """
+    rows = db.session.query(
+        LLMCall.kind,
+        db.func.count(LLMCall.id),
+        db.func.sum(LLMCall.input_tokens),
+        db.func.sum(LLMCall.output_tokens),
+        db.func.sum(LLMCall.cache_read_tokens),
+        db.func.sum(LLMCall.cache_write_tokens),
+        db.func.avg(LLMCall.latency_ms),
+        db.func.sum(LLMCall.raw_input_tokens),
+        db.func.sum(db.case((LLMCall.raw_input_tokens.isnot(None), LLMCall.input_tokens), else_=0))
+    ).group_by(LLMCall.kind).all()
+    usage = {}
+    for kind, calls, input_tokens, output_tokens, cache_read, cache_write, avg_latency, raw_input, minimized_input in rows:
+        input_tokens = input_tokens or 0
+        usage[kind] = {
+            'calls': calls,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens or 0,
+            'cache_read_tokens': cache_read or 0,
+            'cache_write_tokens': cache_write or 0,
+            'cache_read_ratio': round((cache_read or 0) / input_tokens, 3) if input_tokens else 0.0,
+            'avg_latency_ms': int(avg_latency or 0),
+            'raw_input_tokens': raw_input or 0,
+            'input_reduction': round(1 - (minimized_input or 0) / raw_input, 3) if raw_input else 0.0
+        }
+    return jsonify(usage)
+
+@app.route('/api/llm/routing')
+@login_required
+def llm_routing():
+    """Per-provider circuit breaker state, latency histograms and hedge/fail-over counters"""
+    client = get_ai_client()
+    if client is None:
+        return jsonify({'error': 'AI API key not configured'}), 404
+    if not hasattr(client, 'stats'):
+        return jsonify({'providers': {client.provider: {'model': client.model}}, 'order': [client.provider],
+                        'hedging': False})
+    return jsonify({**client.stats(), 'hedging': True})
+
+@app.route('/api/tex-engine/stats')
+@login_required
+def tex_engine_stats():
+    """TeX worker pool size, utilisation and recycling counters, plus the compile queue"""
+    return jsonify({**tex_engine.stats(), 'scheduler': compile_scheduler.stats()})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint (all worker processes when METRICS_DIR is set)
+
+    Not behind the login: set METRICS_TOKEN to require "Authorization: Bearer <token>".
+    """
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return Response('Unauthorized\n', status=401, content_type='text/plain')
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+@functools.lru_cache(maxsize=1024)
+def pdf_etag(path, mtime_ns, size):
+    """Strong ETag from the PDF's content hash (recomputed only when the file changes)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:32]
+
+def send_pdf(pdf_file, download_name):
+    """Send a PDF with ETag/Last-Modified validators, 304s and Range support
+
+    With PDF_SENDFILE=x-sendfile or x-accel only headers are returned and the
+    front proxy (Apache/lighttpd or nginx) serves the bytes.
+    """
+    stat = pdf_file.stat()
+    etag = pdf_etag(str(pdf_file), stat.st_mtime_ns, stat.st_size)
+    last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+    
+    if PDF_SENDFILE == 'x-accel':
+        # nginx serves the file (and handles Range) from an internal location mapped to V1_DIR
+        response = Response(mimetype='application/pdf')
+        response.headers['X-Accel-Redirect'] = PDF_ACCEL_PREFIX + pdf_file.relative_to(V1_DIR).as_posix()
+        # Same Content-Disposition send_file would produce (filename* for non-ASCII folder names)
+        ascii_name = download_name.encode('ascii', 'ignore').decode() or 'cv.pdf'
+        response.headers.set('Content-Disposition', 'attachment', filename=ascii_name,
+                             **{'filename*': f"UTF-8''{quote(download_name)}"})
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response = response.make_conditional(request)
+    else:
+        # conditional=True answers If-None-Match/If-Modified-Since with 304 and Range with 206;
+        # USE_X_SENDFILE (PDF_SENDFILE=x-sendfile) hands the body to the proxy
+        response = send_file(
+            pdf_file,
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=etag,
+            last_modified=last_modified
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+    # Per-user content: browsers may keep it but must revalidate (cheap 304s)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 @login_required
 @app.route('/api/download-pdf/<folder_name>')
 @login_required
@@ -893,7 +1878,7 @@ def download_pdf(folder_name):
         if not pdf_file.exists():
             return jsonify({'error': 'PDF not found'}), 404
         
-        return send_file(pdf_file, as_attachment=True, download_name=f'{folder_name}-cv.pdf')
+        return send_pdf(pdf_file, f'{folder_name}-cv.pdf')
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -920,20 +1905,21 @@ def get_job_desc(folder_name):
 @app.route('/api/delete-variant/<folder_name>', methods=['DELETE'])
 @login_required
 def delete_variant(folder_name):
-    """Delete a variant folder"""
+    """Delete a variant folder and its database row"""
     try:
         # Check ownership
-        if not user_owns_variant(folder_name, current_user.id):
+        variant = CVVariant.query.filter_by(user_id=current_user.id, folder_name=folder_name).first()
+        if not variant:
             return jsonify({'error': 'Access denied'}), 403
         
+        # Delete folder and all contents (a row whose folder is already gone is still removed)
         variant_dir = V1_DIR / folder_name
+        if variant_dir.exists():
+            shutil.rmtree(variant_dir)
         
-        if not variant_dir.exists():
-            return jsonify({'error': 'Variant not found'}), 404
-        
-        # Delete folder and all contents
-        import shutil
-        shutil.rmtree(variant_dir)
+        Job.query.filter_by(variant_id=variant.id).update({'variant_id': None})
+        db.session.delete(variant)
+        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -954,12 +1940,18 @@ if __name__ == '__main__':
     print(f"📄 Master CV: {MASTER_TEX}")
     
     # Check AI API configuration
-    if OPENAI_API_KEY:
-        print(f"🤖 AI Provider: OpenAI ({AI_MODEL})")
-    elif ANTHROPIC_API_KEY:
-        print(f"🤖 AI Provider: Anthropic ({AI_MODEL})")
+    ai_client = get_ai_client()
+    if ai_client:
+        print(f"🤖 AI Provider: {ai_client.provider} ({ai_client.model})")
     else:
-        print("⚠️  No AI API key configured - auto-optimization disabled")
+        print(f"⚠️  No API key for AI_PROVIDER={AI_PROVIDER} - auto-optimization disabled")
+    
+    print(f"🐳 TeX engine: {TEX_ENGINE}" + (f" ({TEX_POOL_SIZE} warm workers)" if TEX_ENGINE == 'pool' else ''))
+    
+    # Warm the TeX pool in the background (only in the reloader child that actually serves requests)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        import threading
+        threading.Thread(target=tex_engine.warm_up, daemon=True).start()
     
     print(f"🌐 Starting server at: http://localhost:5000")
     print("=" * 60)
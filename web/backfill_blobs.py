@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Move master and variant LaTeX into the blobs table
+Adds cv_masters.content_hash and cv_variants.tex_hash, stores existing documents as compressed blobs (variants as deltas against their master)
+
+Usage: python backfill_blobs.py [--clear-inline] [--prune-files] [--gc]
+  --clear-inline empty cv_masters.latex_content once the master is in a blob (saves space, but code older than
+                 the blob store, or a copy of the database without its blobs, then sees empty masters)
+  --prune-files  delete v1/<folder>/main.tex and v1/user_<id>_master.tex once their content is safely in a blob
+  --gc           delete blobs no master or variant refers to any more (e.g. after variants were deleted)
+"""
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from flask import Flask
+
+from blob_store import BlobStore, content_hash
+from db_config import configure_database, upgrade_schema
+from models import db, Blob, CVMaster, CVVariant
+
+# Get the database path
+DB_PATH = Path(__file__).parent / 'vibe_cv.db'
+V1_DIR = Path(__file__).parent.parent / 'v1'
+MASTER_TEX = V1_DIR / 'master.tex'
+
+
+def backfill_masters(store, clear_inline=False):
+    """Store inline cv_masters.latex_content as blobs (clearing the column only if clear_inline)"""
+    moved = 0
+    cleared = 0
+    for cv_master in CVMaster.query.filter(CVMaster.latex_content != '').all():
+        if not cv_master.content_hash:
+            cv_master.content_hash = store.put(cv_master.latex_content)
+            moved += 1
+        if clear_inline and store.get(cv_master.content_hash) == cv_master.latex_content:
+            cv_master.latex_content = ''
+            cleared += 1
+    db.session.commit()
+    print(f"✅ Stored {moved} master CV(s) as blobs")
+    if clear_inline:
+        print(f"🗑️  Cleared the inline copy of {cleared} master CV(s)")
+
+
+def master_for(store, user_id, default_master):
+    """The user's active master LaTeX (variant delta base), or v1/master.tex"""
+    cv_master = CVMaster.query.filter_by(user_id=user_id, is_active=True).first()
+    if cv_master and cv_master.content_hash:
+        return store.get(cv_master.content_hash)
+    return default_master
+
+
+def backfill_variants(store):
+    """Store v1/<folder>/main.tex of variants without a tex_hash as blobs"""
+    default_master = MASTER_TEX.read_text(encoding='utf-8') if MASTER_TEX.exists() else None
+    moved = 0
+    missing = 0
+    for variant in CVVariant.query.filter(CVVariant.tex_hash.is_(None)).all():
+        main_tex = V1_DIR / variant.folder_name / 'main.tex'
+        if not main_tex.exists():
+            if variant.has_tex:
+                missing += 1
+            continue
+        latex = main_tex.read_text(encoding='utf-8')
+        variant.tex_hash = store.put(latex, base=master_for(store, variant.user_id, default_master))
+        variant.has_tex = True
+        moved += 1
+    db.session.commit()
+    print(f"✅ Moved {moved} variant main.tex file(s) into blobs")
+    if missing:
+        print(f"⚠️  {missing} variant(s) are marked has_tex but have no main.tex")
+
+
+def prune_files():
+    """Delete LaTeX files whose exact content is stored in a blob"""
+    candidates = list(V1_DIR.glob('user_*_master.tex'))
+    for variant in CVVariant.query.filter(CVVariant.tex_hash.isnot(None)).all():
+        main_tex = V1_DIR / variant.folder_name / 'main.tex'
+        if main_tex.exists():
+            candidates.append(main_tex)
+
+    pruned = 0
+    kept = []
+    for path in candidates:
+        if db.session.get(Blob, content_hash(path.read_bytes())) is None:
+            kept.append(path)  # edited by hand since it was stored, or never stored
+            continue
+        path.unlink()
+        pruned += 1
+    print(f"🗑️  Deleted {pruned} file(s) now stored as blobs")
+    if kept:
+        print(f"⚠️  Kept {len(kept)} file(s) that differ from every stored blob: "
+              f"{', '.join(str(p.relative_to(V1_DIR)) for p in kept)}")
+
+
+def collect_garbage():
+    """Delete blobs that are neither referenced nor the delta base of a referenced blob"""
+    live = {h for (h,) in db.session.query(CVMaster.content_hash).filter(CVMaster.content_hash.isnot(None))}
+    live |= {h for (h,) in db.session.query(CVVariant.tex_hash).filter(CVVariant.tex_hash.isnot(None))}
+    live |= {h for (h,) in db.session.query(Blob.base_hash).filter(Blob.hash.in_(live), Blob.base_hash.isnot(None))}
+    dead = [h for (h,) in db.session.query(Blob.hash) if h not in live]
+    for i in range(0, len(dead), 500):
+        Blob.query.filter(Blob.hash.in_(dead[i:i + 500])).delete(synchronize_session=False)
+    db.session.commit()
+    print(f"🗑️  Deleted {len(dead)} unreferenced blob(s)")
+
+
+def backfill_blobs(clear_inline=False, prune=False, gc=False):
+    """Add the hash columns, move existing documents into blobs and optionally prune files/blobs"""
+    try:
+        load_dotenv()
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        uri = configure_database(app, db, DB_PATH, url=os.getenv('DATABASE_URL') or None)
+
+        with app.app_context():
+            db.create_all()  # blobs table
+            for column in upgrade_schema(app, db):  # content_hash, tex_hash and any other missing column
+                print(f"✅ Added '{column}' column")
+            store = BlobStore()
+            backfill_masters(store, clear_inline=clear_inline)
+            backfill_variants(store)
+            if prune:
+                prune_files()
+            if gc:
+                collect_garbage()
+
+            stats = store.stats()
+            print(f"📦 {stats['blobs']} blob(s) ({stats['deltas']} deltas, {stats['codec']}): "
+                  f"{stats['bytes'] / 1024:.1f} KB stored in {stats['stored_bytes'] / 1024:.1f} KB")
+
+            if clear_inline and uri.startswith('sqlite'):
+                # Give the space of the cleared latex_content column back to the filesystem
+                db.session.remove()
+                with db.engine.connect() as conn:
+                    conn.exec_driver_sql('VACUUM')
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = backfill_blobs(clear_inline='--clear-inline' in sys.argv[1:], prune='--prune-files' in sys.argv[1:],
+                             gc='--gc' in sys.argv[1:])
+    sys.exit(0 if success else 1)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent variant-create and compile-status writes from several worker processes, with SSE-style readers
+Compares SQLite with default settings against the db_config.py setup (WAL, busy timeout, pooling)
+
+Usage (from web/): python benchmarks/bench_db_concurrency.py [--processes 4] [--threads 4] [--ops 200]
+                   [--readers 2] [--mode default|tuned|both] [--url postgresql://...]
+"""
+import argparse
+import multiprocessing
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+WEB_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_DIR))
+
+from flask import Flask  # noqa: E402
+from db_config import configure_database  # noqa: E402
+from models import db, User, CVVariant, Job  # noqa: E402
+
+
+def make_app(mode, sqlite_path, url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if mode == 'default':
+        # What app.py did before db_config.py
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + str(sqlite_path)
+        db.init_app(app)
+    else:
+        configure_database(app, db, sqlite_path, url=url)
+    return app
+
+
+def create_variant(user_id, worker):
+    """Like /api/create-variant: variant row + queued job in one commit"""
+    folder_name = f'bench-{worker}-{uuid.uuid4().hex[:12]}'
+    variant = CVVariant(user_id=user_id, folder_name=folder_name, company='Bench', role='Role',
+                        job_description='x' * 2000, has_job_desc=True)
+    db.session.add(variant)
+    db.session.flush()
+    db.session.add(Job(id=uuid.uuid4().hex, user_id=user_id, kind='create_variant', variant_id=variant.id))
+    db.session.commit()
+    return variant.id
+
+
+def compile_update(variant_id):
+    """Like run_variant_pipeline after a compile: job progress + has_tex/has_pdf flags"""
+    variant = db.session.get(CVVariant, variant_id)
+    job = Job.query.filter_by(variant_id=variant_id).first()
+    job.stage = 'compile'
+    job.progress = '[{"stage": "compile", "message": "PDF compiled successfully"}]'
+    db.session.commit()
+    variant.has_tex = True
+    variant.has_pdf = True
+    job.status = 'succeeded'
+    db.session.commit()
+
+
+def poll_jobs(user_id):
+    """Like the /api/jobs/<id>/events poller and the variant listing"""
+    Job.query.filter_by(user_id=user_id).order_by(Job.created_at.desc()).limit(20).all()
+    CVVariant.query.filter_by(user_id=user_id).order_by(CVVariant.created_at.desc()).limit(20).all()
+    db.session.expire_all()
+
+
+def run_worker(mode, sqlite_path, url, user_id, threads, readers, ops, results):
+    app = make_app(mode, sqlite_path, url)
+    latencies, errors = [], []
+    reads = [0]
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def reader_main():
+        with app.app_context():
+            while not done.is_set():
+                try:
+                    poll_jobs(user_id)
+                    with lock:
+                        reads[0] += 1
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append('read ' + type(e).__name__ + ': ' + str(e).splitlines()[0][:80])
+                time.sleep(0.01)
+            db.session.remove()
+
+    def thread_main(worker):
+        mine = []
+        with app.app_context():
+            for _ in range(ops):
+                start = time.perf_counter()
+                try:
+                    if mine and random.random() < 0.5:
+                        compile_update(random.choice(mine))
+                    else:
+                        mine.append(create_variant(user_id, worker))
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(type(e).__name__ + ': ' + str(e).splitlines()[0][:80])
+            db.session.remove()
+
+    workers = [threading.Thread(target=thread_main, args=(f'{multiprocessing.current_process().pid}-{i}',))
+               for i in range(threads)]
+    pollers = [threading.Thread(target=reader_main) for _ in range(readers)]
+    for t in workers + pollers:
+        t.start()
+    for t in workers:
+        t.join()
+    done.set()
+    for t in pollers:
+        t.join()
+    results.put((latencies, errors, reads[0]))
+
+
+def run(mode, args):
+    tmp = tempfile.mkdtemp(prefix='vibe-db-bench-')
+    sqlite_path = Path(tmp) / 'bench.db'
+    url = args.url if mode == 'tuned' else None
+
+    app = make_app(mode, sqlite_path, url)
+    with app.app_context():
+        db.create_all()
+        user = User(email=f'bench-{uuid.uuid4().hex[:8]}@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        db.session.remove()
+        db.engine.dispose()
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=run_worker,
+                                args=(mode, sqlite_path, url, user_id, args.threads, args.readers, args.ops, results))
+        for _ in range(args.processes)
+    ]
+    start = time.perf_counter()
+    for p in processes:
+        p.start()
+    latencies, errors, reads = [], [], 0
+    for _ in processes:
+        lat, err, n = results.get()
+        latencies += lat
+        errors += err
+        reads += n
+    for p in processes:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+    label = mode if not url else f'{mode} ({url.split("://")[0]})'
+    print(f"{label:<22} {len(latencies):>6} {len(errors):>7} {len(latencies) / elapsed:>9.1f} {reads / elapsed:>8.1f} "
+          f"{statistics.median(latencies) * 1000 if latencies else 0:>8.1f} {pct(0.95):>8.1f} {pct(0.99):>8.1f}")
+    for message in sorted(set(errors))[:3]:
+        print(f"    {errors.count(message)}x {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=200, help='operations per thread')
+    parser.add_argument('--readers', type=int, default=2, help='polling reader threads per process')
+    parser.add_argument('--mode', choices=['default', 'tuned', 'both'], default='both')
+    parser.add_argument('--url', help='DATABASE_URL for the tuned run (default: a temporary SQLite file)')
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.threads} threads x {args.ops} ops (50% create, 50% compile update)")
+    print(f"{'mode':<22} {'ok':>6} {'errors':>7} {'writes/s':>9} {'reads/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for mode in (['default', 'tuned'] if args.mode == 'both' else [args.mode]):
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pure-Python hot paths of app.py on the v1/ corpus, with a saved baseline and regression check
+Covers escaping, match-score parsing, folder names, AI response cleanup and the variant listing on a seeded 10k-row database
+
+Usage (from web/): python benchmarks/bench_hot_paths.py [--repeat 7] [--min-time 0.2] [-k listing] [--variants 10000]
+                   [--save benchmarks/baseline_hot_paths.json] [--compare benchmarks/baseline_hot_paths.json]
+                   [--threshold 0.25]
+--compare exits with status 1 if any case got slower than the baseline by more than --threshold (after
+scaling by a fixed calibration loop, so a baseline from another machine is still roughly comparable).
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+WEB_DIR = Path(__file__).resolve().parent.parent
+V1_DIR = WEB_DIR.parent / 'v1'
+sys.path.insert(0, str(WEB_DIR))
+
+# app.py reads its settings at import time: give it a scratch database and scratch folders
+_SCRATCH = Path(tempfile.mkdtemp(prefix='vibe-bench-'))
+atexit.register(shutil.rmtree, _SCRATCH, ignore_errors=True)
+os.environ.update({
+    'DATABASE_URL': f'sqlite:///{_SCRATCH / "bench.db"}',
+    'VARIANTS_DIR': str(_SCRATCH / 'variants'),
+    'LLM_CACHE_PATH': str(_SCRATCH / 'llm_cache.db'),
+    'COMPILE_CACHE_DIR': str(_SCRATCH / 'compile_cache'),
+    'TEX_WORK_DIR': str(_SCRATCH / 'tex_work'),
+})
+
+import app as appmod  # noqa: E402
+from models import db, User, CVVariant  # noqa: E402
+
+
+def load_corpus():
+    """(documents, job descriptions, company/role names) from v1/"""
+    documents = [(V1_DIR / 'master.tex').read_text(encoding='utf-8')]
+    documents += [p.read_text(encoding='utf-8') for p in sorted(V1_DIR.glob('*/main.tex'))]
+    job_descs = [p.read_text(encoding='utf-8') for p in sorted(V1_DIR.glob('*/job_desc.md'))]
+    names = []
+    for job_desc in job_descs:
+        lines = job_desc.splitlines()
+        company = lines[0].lstrip('#').strip() if lines else 'Company'
+        role = next((l.split('**Role:**', 1)[1].strip() for l in lines if '**Role:**' in l), 'Business Analyst')
+        names.append(f'{company}-{role}')
+    return documents, job_descs, names
+
+
+def unescape_body(document):
+    """AI-style LaTeX: the escapes dropped in the document body"""
+    preamble, sep, body = document.partition('\\begin{document}')
+    return preamble + sep + body.replace('\\&', '&').replace('\\_', '_').replace('\\#', '#')
+
+
+def ai_responses(documents):
+    """Responses shaped like the optimize call's: score line, optional code fence, unescaped body"""
+    responses = []
+    for i, document in enumerate(documents):
+        latex = unescape_body(document)
+        if i % 2:
+            latex = f'```latex\n{latex}\n```'
+        responses.append(f'MATCH_SCORE: {60 + i}%\n\n{latex}')
+    return responses
+
+
+def seed_variants(count, users=10):
+    """count variants spread over `users` users and a year of created_at; returns the busiest user's id"""
+    rng = random.Random(42)
+    with appmod.app.app_context():
+        user_ids = []
+        for i in range(users):
+            user = User(email=f'bench-{i}@example.com')
+            user.set_password('bench123')
+            db.session.add(user)
+            db.session.flush()
+            user_ids.append(user.id)
+        start = datetime(2025, 1, 1)
+        rows = [{
+            'user_id': user_ids[0] if i % 2 else rng.choice(user_ids),  # half of them for one heavy user
+            'folder_name': f'company-{i}-analyst',
+            'company': f'Company {i}',
+            'role': 'Analyst',
+            'job_description': 'Requirements: SQL, stakeholder management, UAT.',
+            'match_score': rng.randint(40, 95),
+            'has_tex': True,
+            'has_pdf': i % 3 != 0,
+            'has_job_desc': True,
+            'created_at': start + timedelta(minutes=rng.randint(0, 525600))
+        } for i in range(count)]
+        db.session.execute(CVVariant.__table__.insert(), rows)
+        db.session.commit()
+        return user_ids[0]
+
+
+def build_cases(args):
+    """name -> zero-argument callable; each call is one unit of work"""
+    documents, job_descs, names = load_corpus()
+    responses = ai_responses(documents)
+    unscored = [r.split('\n', 2)[2] for r in responses]  # model left out MATCH_SCORE: every pattern is tried
+
+    def over(fn, items):
+        return lambda: [fn(item) for item in items]
+
+    cases = {
+        'fix_latex_special_chars (corpus)': over(appmod.fix_latex_special_chars, [unescape_body(d) for d in documents]),
+        'extract_match_score (MATCH_SCORE line)': over(appmod.extract_match_score, responses),
+        'extract_match_score (no score, full scan)': over(appmod.extract_match_score, unscored),
+        'sanitize_folder_name (corpus names)': over(appmod.sanitize_folder_name, names),
+        'clean_ai_latex (score + fence stripping)': over(appmod.clean_ai_latex, responses),
+    }
+    if job_descs:
+        cases['match_scorer.score (master vs JDs)'] = over(
+            lambda jd: appmod.match_scorer.score(documents[0], jd), job_descs)
+
+    if args.variants:
+        user_id = seed_variants(args.variants)
+        with appmod.app.app_context():
+            _, cursor = appmod.get_existing_variants(user_id=user_id, limit=100)
+            for _ in range(args.variants // 400):  # about halfway down the heavy user's list
+                _, cursor = appmod.get_existing_variants(user_id=user_id, limit=100, cursor=cursor)
+
+        def listing(**kwargs):
+            def run():
+                with appmod.app.app_context():
+                    appmod.get_existing_variants(**kwargs)
+            return run
+
+        cases[f'get_existing_variants (first page, {args.variants} rows)'] = listing(user_id=user_id)
+        cases[f'get_existing_variants (deep cursor, {args.variants} rows)'] = listing(user_id=user_id, cursor=cursor)
+        cases[f'get_existing_variants (all users, {args.variants} rows)'] = listing()
+    return cases
+
+
+def calibration():
+    """Seconds for a fixed pure-Python workload, used to scale baselines between machines"""
+    def work():
+        total = 0
+        for i in range(200000):
+            total += i % 7
+        return total
+    return measure(work, 7, 0.1)[0]
+
+
+def measure(fn, repeat, min_time):
+    """(min, median) seconds per call and the loop count; loops per repeat grow until one repeat takes min_time"""
+    fn()  # warm-up (regex compile, SQLAlchemy statement cache)
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed * 10 > min_time else 10
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    return min(samples), statistics.median(samples), loops
+
+
+def compare(results, calibration_s, baseline, threshold):
+    """Print the change per case against baseline; returns the names of regressed cases
+
+    Compares the best (min) time per call, which is the least sensitive to other load on the machine.
+    """
+    scale = calibration_s / baseline['calibration_s'] if baseline.get('calibration_s') else 1.0
+    regressions = []
+    print(f"\nvs baseline ({baseline.get('created', '?')}, machine speed factor {scale:.2f}):")
+    print(f"{'case':<52} {'baseline us':>12} {'now us':>10} {'change':>8}")
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<52} {'-':>12} {result['min_us']:>10.1f} {'new':>8}")
+            continue
+        ratio = result['min_us'] / (base['min_us'] * scale)
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  ❌ regression'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = '  ✅ faster'
+        print(f"{name:<52} {base['min_us']:>12.1f} {result['min_us']:>10.1f} {ratio - 1:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per repeat (loops are scaled up to it)')
+    parser.add_argument('-k', dest='filter', help='only cases whose name contains this')
+    parser.add_argument('--variants', type=int, default=10000, help='rows to seed for the listing cases (0 skips them)')
+    parser.add_argument('--save', help='write results to this baseline JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown that counts as a regression')
+    args = parser.parse_args()
+
+    cases = build_cases(args)
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if args.filter.lower() in name.lower()}
+    calibration_s = calibration()
+
+    print(f"{'case':<52} {'min us':>10} {'median us':>10} {'loops':>8}")
+    results = {}
+    for name, fn in cases.items():
+        best, median, loops = measure(fn, args.repeat, args.min_time)
+        results[name] = {'min_us': round(best * 1e6, 2), 'median_us': round(median * 1e6, 2), 'loops': loops}
+        print(f"{name:<52} {best * 1e6:>10.1f} {median * 1e6:>10.1f} {loops:>8}")
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'calibration_s': round(calibration_s, 6),
+            'results': results
+        }, indent=2) + '\n')
+        print(f"\n💾 Baseline written to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, calibration_s, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\n✅ No regressions over {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
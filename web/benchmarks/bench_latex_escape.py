@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LaTeX special character escaping on the v1/ CV corpus
+Compares the old four-regex fix_latex_special_chars with latex_escape.escape_latex (speed and correctness)
+
+Usage (from web/): python benchmarks/bench_latex_escape.py [--iterations 200]
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+WEB_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_DIR))
+
+from latex_escape import escape_latex  # noqa: E402
+
+V1_DIR = WEB_DIR.parent / 'v1'
+
+
+def legacy_fix_latex_special_chars(latex_content):
+    """fix_latex_special_chars as it was before latex_escape.py"""
+    latex_content = re.sub(r'(?<!\\)&(?![&\s]*\\\\)', r'\\&', latex_content)
+    latex_content = re.sub(r'(?<!\\)%(?!.*\\)', r'\\%', latex_content)
+    latex_content = re.sub(r'(?<!\\)_(?![_\s]*[\$\\])', r'\\_', latex_content)
+    latex_content = re.sub(r'(?<!\\)#(?![\d])', r'\\#', latex_content)
+    return latex_content
+
+
+def unescape_body(latex):
+    """Simulate typical AI output: drop the escapes in the document body"""
+    preamble, sep, body = latex.partition('\\begin{document}')
+    for escaped in ('\\&', '\\_', '\\#'):
+        body = body.replace(escaped, escaped[1])
+    body = re.sub(r'(\d)\\%', r'\1%', body)
+    return preamble + sep + body
+
+
+def time_it(fn, text, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def changed_lines(a, b):
+    return sum(1 for x, y in zip(a.splitlines(), b.splitlines()) if x != y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    files = [V1_DIR / 'master.tex'] + sorted(V1_DIR.glob('*/main.tex'))
+    print(f"{'document':<40} {'KB':>6} {'legacy us':>10} {'new us':>8} {'speedup':>8} "
+          f"{'legacy mangled':>15} {'new mangled':>12} {'legacy restored':>16} {'new restored':>13}")
+
+    totals = {'legacy': 0.0, 'new': 0.0}
+    restored = {'legacy': 0, 'new': 0}
+    for path in files:
+        original = path.read_text(encoding='utf-8')
+        dirty = unescape_body(original)
+        name = str(path.relative_to(V1_DIR))[:40]
+
+        legacy_time = time_it(legacy_fix_latex_special_chars, dirty, args.iterations)
+        new_time = time_it(escape_latex, dirty, args.iterations)
+        totals['legacy'] += legacy_time
+        totals['new'] += new_time
+
+        # A document that already compiles must come out unchanged
+        legacy_mangled = changed_lines(original, legacy_fix_latex_special_chars(original))
+        new_mangled = changed_lines(original, escape_latex(original))
+        # AI-style output with the escapes dropped should be fixed back to the original
+        legacy_ok = legacy_fix_latex_special_chars(dirty) == original
+        new_ok = escape_latex(dirty) == original
+        restored['legacy'] += legacy_ok
+        restored['new'] += new_ok
+
+        print(f"{name:<40} {len(original) / 1024:>6.1f} {legacy_time * 1e6:>10.0f} {new_time * 1e6:>8.0f} "
+              f"{legacy_time / new_time:>7.1f}x {legacy_mangled:>15} {new_mangled:>12} "
+              f"{str(legacy_ok):>16} {str(new_ok):>13}")
+
+    print(f"\nTotal per pass over {len(files)} documents: legacy {totals['legacy'] * 1e3:.2f} ms, "
+          f"new {totals['new'] * 1e3:.2f} ms ({totals['legacy'] / totals['new']:.1f}x)")
+    print(f"Documents restored exactly from AI-style output: legacy {restored['legacy']}/{len(files)}, "
+          f"new {restored['new']}/{len(files)}")
+
+
+if __name__ == '__main__':
+    main()
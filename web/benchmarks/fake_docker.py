@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Fake `docker` CLI for load tests
+Emulates the run/exec/rm/image-inspect calls tex_engine.py and compile_cache.py make, with latexmk replaced by a timed stand-in
+
+loadtest.py puts a `docker` wrapper for this script first on the app's PATH. Timing and outcome come from the environment:
+  FAKE_TEX_MEDIAN_MS (1800)    median latexmk time for an ~8 KB CV (scales with the square root of the source size)
+  FAKE_TEX_SIGMA (0.3)         log-normal spread of that time
+  FAKE_TEX_STARTUP_MS (1200)   container start-up (docker run), paid per compile without the warm pool
+  FAKE_TEX_ERROR_RATE (0)      share of compiles that fail with a LaTeX error
+  FAKE_TEX_HANG_RATE (0)       share of compiles that never finish (hit COMPILE_TIMEOUT)
+  FAKE_DOCKER_STATE            directory for container name -> workspace records
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+STATE_DIR = Path(os.getenv('FAKE_DOCKER_STATE') or Path(tempfile.gettempdir()) / 'fake-docker')
+MEDIAN = float(os.getenv('FAKE_TEX_MEDIAN_MS', '1800')) / 1000
+SIGMA = float(os.getenv('FAKE_TEX_SIGMA', '0.3'))
+STARTUP = float(os.getenv('FAKE_TEX_STARTUP_MS', '1200')) / 1000
+ERROR_RATE = float(os.getenv('FAKE_TEX_ERROR_RATE', '0'))
+HANG_RATE = float(os.getenv('FAKE_TEX_HANG_RATE', '0'))
+REFERENCE_SIZE = 8000
+
+# Smallest well-formed one-page PDF
+PDF = (b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+       b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF\n')
+
+
+def options(args, with_value=('-v', '-w', '--name', '-e')):
+    """Split `docker run/exec` arguments into ({flag: value}, rest)"""
+    found, i = {}, 0
+    while i < len(args) and args[i].startswith('-'):
+        if args[i] in with_value:
+            found[args[i]] = args[i + 1]
+            i += 2
+        else:
+            found[args[i]] = True
+            i += 1
+    return found, args[i:]
+
+
+def host_dir(workspace, container_dir):
+    rel = container_dir[len('/workspace'):].lstrip('/')
+    return Path(workspace) / rel if rel else Path(workspace)
+
+
+def latexmk(workdir, command):
+    """Stand-in for `latexmk ... main.tex`: sleep like TeX would, then write main.pdf or fail like TeX would"""
+    tex_file = workdir / command[-1]
+    try:
+        source = tex_file.read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        print(f"! I can't find file `{command[-1]}'.", file=sys.stderr)
+        return 11
+    rng = random.Random()
+    if rng.random() < HANG_RATE:
+        time.sleep(3600)
+    scale = math.sqrt(max(len(source), 1000) / REFERENCE_SIZE)
+    time.sleep(MEDIAN * scale * math.exp(rng.gauss(0, SIGMA)))
+    if '\\end{document}' not in source or rng.random() < ERROR_RATE:
+        print('! LaTeX Error: \\begin{document} ended by \\end{itemize}.')
+        print("Latexmk: Errors, so I did not complete making targets", file=sys.stderr)
+        return 12
+    (workdir / (tex_file.stem + '.pdf')).write_bytes(PDF)
+    print('Latexmk: All targets are up-to-date')
+    return 0
+
+
+def main(argv):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    if not argv:
+        return 1
+    command, args = argv[0], argv[1:]
+
+    if command == 'image':
+        print('sha256:' + 'f' * 64)
+        return 0
+
+    if command == 'rm':
+        for name in (a for a in args if not a.startswith('-')):
+            (STATE_DIR / name).unlink(missing_ok=True)
+        return 0
+
+    if command == 'run':
+        opts, rest = options(args)
+        workspace = opts['-v'].split(':', 1)[0]
+        time.sleep(STARTUP)
+        if '-d' in opts:
+            (STATE_DIR / opts['--name']).write_text(workspace)
+            print(os.urandom(32).hex())
+            return 0
+        return latexmk(host_dir(workspace, opts.get('-w', '/workspace')), rest[1:])
+
+    if command == 'exec':
+        opts, rest = options(args)
+        name, inner = rest[0], rest[1:]
+        record = STATE_DIR / name
+        if not record.exists():
+            print(f'Error response from daemon: No such container: {name}', file=sys.stderr)
+            return 1
+        if inner == ['true']:
+            return 0
+        return latexmk(host_dir(record.read_text(), opts.get('-w', '/workspace')), inner)
+
+    print(f'fake docker: unsupported command {command}', file=sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
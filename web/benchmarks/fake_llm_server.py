@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI / Anthropic API for load tests
+Answers /v1/chat/completions and /v1/messages (blocking and streaming) with plausible CV LaTeX after a simulated delay, reporting prompt-cache reads/writes like the real APIs
+
+Usage (from web/): python benchmarks/fake_llm_server.py [--port 8090] [--ttft-ms 800] [--tokens-per-sec 60]
+                   [--response-tokens 600] [--sigma 0.4] [--error-rate 0.0] [--seed 1] [--cache-min-tokens 1024]
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8090/v1 or ANTHROPIC_BASE_URL=http://127.0.0.1:8090
+"""
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+WEB_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_DIR))
+
+from cv_sections import DEFAULT_PREAMBLE  # noqa: E402
+
+_SECTION = re.compile(r'\\section\*?\{([^{}]*)\}')
+_WORDS = ('led', 'delivered', 'designed', 'migrated', 'core banking', 'CRM', 'stakeholders', 'requirements',
+          'roadmap', 'SQL', 'Python', 'reduced', 'costs', 'by 30\\%', 'across', 'teams', 'platform',
+          'automation', 'analytics', 'UAT', 'vendors', 'budget', 'compliance', 'data', 'cloud')
+
+
+def lognormal(median, sigma, rng):
+    """A sample whose median is `median` (sigma 0 gives exactly median)"""
+    return median * math.exp(rng.gauss(0, sigma)) if sigma else median
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def item_list(n_tokens, rng):
+    """\\resumeItemListStart ... \\resumeItemListEnd with about n_tokens tokens of bullets"""
+    items = []
+    while sum(map(estimate_tokens, items)) < n_tokens:
+        words = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(12, 24)))
+        items.append(f'\\resumeItem{{{words[0].upper()}{words[1:]}.}}')
+    return '\\resumeItemListStart\n' + '\n'.join(items) + '\n\\resumeItemListEnd'
+
+
+def document_body(titles, n_tokens, rng):
+    titles = titles or ['Professional Experience', 'Education', 'Skills']
+    per_section = max(20, n_tokens // len(titles))
+    parts = ['\\begin{document}', '\\noindent\\textbf{\\LARGE Load Test} \\\\ \\small loadtest@example.com']
+    for title in titles:
+        parts.append(f'\\section{{{title}}}\n\\resumeSubHeadingListStart\n'
+                     f'\\item\n{item_list(per_section, rng)}\n\\resumeSubHeadingListEnd')
+    parts.append('\\end{document}')
+    return '\n\n'.join(parts)
+
+
+def fake_response(system_prompt, user_prompt, n_tokens, rng):
+    """Text shaped like what the app asked for: section edits, a full CV, a converted CV or one section"""
+    titles = list(dict.fromkeys(_SECTION.findall(system_prompt)))
+    score = f'MATCH_SCORE: {rng.randint(45, 95)}%\n\n'
+    if '=== REPLACE:' in system_prompt:
+        title = rng.choice(titles) if titles else 'HEADER'
+        return f'{score}=== REPLACE: {title} ===\n{item_list(n_tokens, rng)}\n=== END ===\n'
+    if 'MATCH_SCORE' in system_prompt:
+        if 're-inserted automatically' in system_prompt or '\\documentclass' not in system_prompt:
+            return score + document_body(titles, n_tokens, rng)
+        preamble = system_prompt[system_prompt.index('\\documentclass'):].split('\\begin{document}', 1)[0]
+        return score + preamble + document_body(titles, n_tokens, rng)
+    if 'ONE section of a CV' in system_prompt:
+        return f'\\section{{Section}}\n{item_list(n_tokens, rng)}'
+    return DEFAULT_PREAMBLE + '\n' + document_body([], n_tokens, rng)
+
+
+class FakeLLM:
+    """Latency, size and error model shared by all request threads
+
+    errors is a list of HTTP statuses to answer the next requests with (in
+    order) before error_rate applies, e.g. [429, 503] for a retry test.
+    received keeps every request body seen.
+
+    Prompt caching: a prefix of at least cache_min_tokens is written on first
+    use and read afterwards - for Anthropic the system blocks up to the last
+    one marked cache_control, for OpenAI (automatic) the system message.
+    """
+
+    def __init__(self, ttft_ms=800, tokens_per_sec=60, response_tokens=600, sigma=0.4, error_rate=0.0, seed=None,
+                 errors=(), cache_min_tokens=1024):
+        self.ttft = ttft_ms / 1000
+        self.tokens_per_sec = tokens_per_sec
+        self.response_tokens = response_tokens
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.scripted_errors = list(errors)
+        self.received = []
+        self.cache_min_tokens = cache_min_tokens
+        self._cached_prefixes = set()
+
+    def plan(self, system_prompt, user_prompt):
+        """(error status or None, time to first token, seconds per chunk, response text)"""
+        with self._lock:
+            self.requests += 1
+            if self.scripted_errors:
+                self.errors += 1
+                return self.scripted_errors.pop(0), 0, 0, ''
+            rng = random.Random(self._rng.random())
+            if rng.random() < self.error_rate:
+                self.errors += 1
+                return rng.choice((429, 500, 503)), 0, 0, ''
+        n_tokens = max(10, int(lognormal(self.response_tokens, self.sigma, rng)))
+        text = fake_response(system_prompt, user_prompt, n_tokens, rng)
+        ttft = lognormal(self.ttft, self.sigma, rng)
+        return None, ttft, 4 / self.tokens_per_sec, text
+
+
+    def prompt_cache(self, provider, prefix):
+        """(tokens read from, tokens written to) the prompt cache for a request starting with prefix"""
+        tokens = estimate_tokens(prefix) if prefix else 0
+        if tokens < self.cache_min_tokens:
+            return 0, 0
+        if provider == 'openai':
+            tokens -= tokens % 128  # OpenAI caches in 128-token steps
+        with self._lock:
+            if (provider, prefix) in self._cached_prefixes:
+                return tokens, 0
+            self._cached_prefixes.add((provider, prefix))
+        return 0, tokens
+
+
+def chunks(text, size=16):
+    """~4-token pieces, like a provider's stream deltas"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    llm = None  # set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _sse_start(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+    def _sse(self, data, event=None):
+        head = f'event: {event}\n' if event else ''
+        self.wfile.write(f'{head}data: {json.dumps(data) if not isinstance(data, str) else data}\n\n'.encode())
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        self.llm.received.append(body)
+        if self.path.endswith('/chat/completions'):
+            messages = body.get('messages', [])
+            system = ''.join(m['content'] for m in messages if m['role'] == 'system')
+            user = ''.join(m['content'] for m in messages if m['role'] == 'user')
+            prefix = system
+            handler = self._openai
+        elif self.path.endswith('/messages'):
+            system = body.get('system') or ''
+            prefix = ''
+            if isinstance(system, list):
+                marked = [i for i, block in enumerate(system) if block.get('cache_control')]
+                if marked:
+                    prefix = ''.join(block.get('text', '') for block in system[:marked[-1] + 1])
+                system = ''.join(block.get('text', '') for block in system)
+            user = ''.join(m['content'] if isinstance(m['content'], str) else
+                           ''.join(b.get('text', '') for b in m['content']) for m in body.get('messages', []))
+            handler = self._anthropic
+        else:
+            return self._json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+        error, ttft, per_chunk, text = self.llm.plan(system, user)
+        if error:
+            time.sleep(ttft)
+            return self._json(error, {'error': {'type': 'fake_error', 'message': f'Injected {error}'}})
+        cache = self.llm.prompt_cache('openai' if handler == self._openai else 'anthropic', prefix)
+        handler(body, estimate_tokens(system + user), cache, text, ttft, per_chunk)
+
+    def _openai(self, body, input_tokens, cache, text, ttft, per_chunk):
+        rid, model, created = f'chatcmpl-{uuid.uuid4().hex}', body.get('model', 'fake'), int(time.time())
+        usage = {'prompt_tokens': input_tokens, 'completion_tokens': estimate_tokens(text),
+                 'total_tokens': input_tokens + estimate_tokens(text),
+                 'prompt_tokens_details': {'cached_tokens': cache[0]}}
+        if not body.get('stream'):
+            time.sleep(ttft + per_chunk * len(chunks(text)))
+            return self._json(200, {
+                'id': rid, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                'usage': usage
+            })
+
+        def event(delta, finish=None):
+            return {'id': rid, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}]}
+
+        self._sse_start()
+        time.sleep(ttft)
+        self._sse(event({'role': 'assistant', 'content': ''}))
+        for piece in chunks(text):
+            self._sse(event({'content': piece}))
+            time.sleep(per_chunk)
+        self._sse(event({}, 'stop'))
+        if (body.get('stream_options') or {}).get('include_usage'):
+            self._sse({'id': rid, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                       'choices': [], 'usage': usage})
+        self._sse('[DONE]')
+
+    def _anthropic(self, body, input_tokens, cache, text, ttft, per_chunk):
+        rid, model = f'msg_{uuid.uuid4().hex}', body.get('model', 'fake')
+        output_tokens = estimate_tokens(text)
+        # input_tokens excludes what was read from or written to the cache
+        usage = {'input_tokens': max(1, input_tokens - sum(cache)), 'cache_read_input_tokens': cache[0],
+                 'cache_creation_input_tokens': cache[1]}
+        if not body.get('stream'):
+            time.sleep(ttft + per_chunk * len(chunks(text)))
+            return self._json(200, {
+                'id': rid, 'type': 'message', 'role': 'assistant', 'model': model,
+                'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn', 'stop_sequence': None,
+                'usage': {**usage, 'output_tokens': output_tokens}
+            })
+
+        self._sse_start()
+        time.sleep(ttft)
+        self._sse({'type': 'message_start', 'message': {
+            'id': rid, 'type': 'message', 'role': 'assistant', 'model': model, 'content': [],
+            'stop_reason': None, 'stop_sequence': None, 'usage': {**usage, 'output_tokens': 1}
+        }}, 'message_start')
+        self._sse({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}},
+                  'content_block_start')
+        for piece in chunks(text):
+            self._sse({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': piece}},
+                      'content_block_delta')
+            time.sleep(per_chunk)
+        self._sse({'type': 'content_block_stop', 'index': 0}, 'content_block_stop')
+        self._sse({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                   'usage': {'output_tokens': output_tokens}}, 'message_delta')
+        self._sse({'type': 'message_stop'}, 'message_stop')
+
+    def do_GET(self):
+        if self.path == '/stats':
+            return self._json(200, {'requests': self.llm.requests, 'errors': self.llm.errors})
+        self._json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+
+def serve(port, llm, host='127.0.0.1'):
+    """Start the fake API; returns the server (call shutdown() to stop it)"""
+    handler = type('FakeLLMHandler', (Handler,), {'llm': llm})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--ttft-ms', type=float, default=800, help='median time to first token')
+    parser.add_argument('--tokens-per-sec', type=float, default=60, help='output speed after the first token')
+    parser.add_argument('--response-tokens', type=int, default=600, help='median response length')
+    parser.add_argument('--sigma', type=float, default=0.4, help='log-normal spread of latency and length')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered 429/500/503')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--cache-min-tokens', type=int, default=1024, help='shortest prompt prefix that is cached')
+    args = parser.parse_args()
+
+    llm = FakeLLM(args.ttft_ms, args.tokens_per_sec, args.response_tokens, args.sigma, args.error_rate, args.seed,
+                  cache_min_tokens=args.cache_min_tokens)
+    server = serve(args.port, llm, args.host)
+    print(f"🤖 Fake LLM API on http://{args.host}:{args.port} (ttft {args.ttft_ms:.0f}ms, "
+          f"{args.tokens_per_sec:.0f} tok/s, ~{args.response_tokens} tokens, {args.error_rate:.0%} errors)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Load test: N concurrent logged-in users creating variants, compiling, uploading CVs and listing variants
+Runs the app against a fake LLM API (fake_llm_server.py) and a fake Docker (fake_docker.py), entirely offline
+
+Usage (from web/): python benchmarks/loadtest.py [--users 10] [--duration 60] [--mix create=4,compile=3,upload=1,list=4]
+                   [--think-ms 1000] [--ttft-ms 800] [--tokens-per-sec 60] [--response-tokens 600] [--llm-error-rate 0]
+                   [--providers openai|anthropic|both] [--tex-engine pool|docker] [--tex-median-ms 1800]
+                   [--tex-error-rate 0] [--json report.json] [--target http://host:port] [--keep]
+With --target the app (and its AI/TeX backends) are not started; the users run against that server instead.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+WEB_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+V1_DIR = WEB_DIR.parent / 'v1'
+PASSWORD = 'loadtest123'
+JOB_POLL_INTERVAL = 0.25
+JOB_TIMEOUT = 600
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, process, timeout=60):
+    """Poll url until it answers; fail early if the process that should serve it died"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'{url} did not start (exit code {process.returncode})')
+        try:
+            httpx.get(url, timeout=2)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{url} did not answer within {timeout}s')
+
+
+def load_corpus():
+    """Job descriptions and CV bullet text from the v1/ variants"""
+    job_descs = [p.read_text(encoding='utf-8') for p in sorted(V1_DIR.glob('*/job_desc.md'))]
+    master = (V1_DIR / 'master.tex').read_text(encoding='utf-8')
+    bullets = [re.sub(r'\\[a-zA-Z]+|[{}\\]', '', b).strip() for b in re.findall(r'\\resumeItem\{(.+)\}', master)]
+    return job_descs or ['Business Analyst. Requirements: SQL, stakeholder management, UAT.'], bullets
+
+
+def make_cv_docx(name, bullets):
+    """A DOCX CV (bytes) with the usual headings and the corpus bullets"""
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph(name)
+    doc.add_paragraph(f'{name.lower().replace(" ", ".")}@example.com | +84 900 000 000 | Ho Chi Minh City')
+    doc.add_paragraph('Summary')
+    doc.add_paragraph('IT leader with 15 years in banking and finance, ' + (bullets[0] if bullets else ''))
+    doc.add_paragraph('Professional Experience')
+    for bullet in bullets[1:]:
+        doc.add_paragraph(bullet, style='List Bullet')
+    doc.add_paragraph('Education')
+    doc.add_paragraph('MSc Information Systems, 2008')
+    doc.add_paragraph('Skills')
+    doc.add_paragraph('SQL, Python, Jira, Confluence, BPMN, Core Banking, CRM')
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+class Stats:
+    """Latencies and outcomes per route, shared by all user threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route, seconds, ok, status):
+        with self._lock:
+            self.samples[route].append(seconds)
+            self.statuses[route][str(status)] += 1
+            if not ok:
+                self.errors[route] += 1
+
+    def summary(self, elapsed):
+        report = {}
+        with self._lock:
+            for route, samples in sorted(self.samples.items()):
+                ordered = sorted(samples)
+
+                def pct(q):
+                    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+                report[route] = {
+                    'requests': len(samples),
+                    'errors': self.errors[route],
+                    'error_rate': round(self.errors[route] / len(samples), 4),
+                    'throughput_rps': round(len(samples) / elapsed, 3),
+                    'mean_ms': round(statistics.fmean(samples) * 1000, 1),
+                    'p50_ms': pct(0.50),
+                    'p95_ms': pct(0.95),
+                    'p99_ms': pct(0.99),
+                    'max_ms': round(ordered[-1] * 1000, 1),
+                    'statuses': dict(self.statuses[route])
+                }
+        return report
+
+
+class User:
+    """One simulated user with its own session cookie"""
+
+    def __init__(self, index, base_url, stats, corpus, run_id, think, timeout):
+        self.index = index
+        self.email = f'loadtest-{run_id}-{index}@example.com'
+        self.stats = stats
+        self.job_descs, self.bullets = corpus
+        self.think = think
+        self.client = httpx.Client(base_url=base_url, timeout=timeout)
+        self.folders = []
+        self.seq = 0
+        self.rng = random.Random(index)
+
+    def call(self, route, method, url, ok_statuses=(200,), **kwargs):
+        start = time.monotonic()
+        try:
+            response = self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(route, time.monotonic() - start, False, type(e).__name__)
+            return None
+        self.stats.record(route, time.monotonic() - start, response.status_code in ok_statuses, response.status_code)
+        return response
+
+    def sign_in(self):
+        form = {'email': self.email, 'password': PASSWORD}
+        self.call('POST /register', 'POST', '/register', ok_statuses=(200, 302), data={**form, 'confirm_password': PASSWORD})
+        response = self.call('POST /login', 'POST', '/login', ok_statuses=(302,), data=form)
+        return response is not None and response.status_code == 302
+
+    def upload(self):
+        self.seq += 1
+        name = f'Load Tester {self.index} {self.seq}'
+        files = {'cv_file': (f'cv_{self.index}_{self.seq}.docx', make_cv_docx(name, self.bullets),
+                             'application/vnd.openxmlformats-officedocument.wordprocessingml.document')}
+        self.call('POST /api/upload-cv', 'POST', '/api/upload-cv', files=files, data={'use_cache': 'false'})
+
+    def create(self):
+        self.seq += 1
+        tag = f'{self.index}-{self.seq}-{uuid.uuid4().hex[:6]}'
+        job_desc = self.rng.choice(self.job_descs) + f'\n\nRef: {tag}'  # unique, so the LLM cache never answers
+        response = self.call('POST /api/create-variant', 'POST', '/api/create-variant', ok_statuses=(200, 202), json={
+            'company_name': f'Load {tag}', 'role_name': 'Analyst', 'job_description': job_desc
+        })
+        if response is None or response.status_code not in (200, 202):
+            return
+        job_id = response.json().get('job_id')
+        start = time.monotonic()
+        while time.monotonic() - start < JOB_TIMEOUT:
+            time.sleep(JOB_POLL_INTERVAL)
+            poll = self.call('GET /api/jobs/<id>', 'GET', f'/api/jobs/{job_id}')
+            if poll is None or poll.status_code != 200:
+                continue
+            job = poll.json()
+            if job.get('status') in ('succeeded', 'failed'):
+                result = job.get('result') or {}
+                ok = job['status'] == 'succeeded' and result.get('has_pdf')
+                self.stats.record('job: create-variant (AI + compile)', time.monotonic() - start, ok,
+                                  job['status'] if ok or job['status'] == 'failed' else 'no_pdf')
+                if result.get('has_tex'):
+                    self.folders.append(result['folder_name'])
+                return
+        self.stats.record('job: create-variant (AI + compile)', time.monotonic() - start, False, 'timeout')
+
+    def compile(self):
+        if not self.folders:
+            return self.create()
+        self.call('POST /api/compile-cv', 'POST', '/api/compile-cv', json={'folder_name': self.rng.choice(self.folders)})
+
+    def list(self):
+        self.call('GET /api/variants', 'GET', '/api/variants')
+
+    def run(self, mix, deadline):
+        if not self.sign_in():
+            return
+        self.upload()  # create-variant needs a master CV
+        actions, weights = zip(*mix.items())
+        while time.monotonic() < deadline:
+            getattr(self, self.rng.choices(actions, weights)[0])()
+            if self.think:
+                time.sleep(min(self.rng.expovariate(1 / self.think), max(0, deadline - time.monotonic())))
+        self.client.close()
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        action, _, weight = part.partition('=')
+        if action not in ('create', 'compile', 'upload', 'list'):
+            raise argparse.ArgumentTypeError(f'Unknown action {action!r}')
+        mix[action] = float(weight or 1)
+    return mix
+
+
+def start_stack(args, workdir):
+    """Start the fake LLM API and the app (on fake Docker); returns (base_url, processes, llm_url)"""
+    processes = []
+    llm_port, app_port = free_port(), free_port()
+    llm_log = open(workdir / 'fake_llm.log', 'w')
+    llm = subprocess.Popen([
+        sys.executable, str(BENCH_DIR / 'fake_llm_server.py'), '--port', str(llm_port),
+        '--ttft-ms', str(args.ttft_ms), '--tokens-per-sec', str(args.tokens_per_sec),
+        '--response-tokens', str(args.response_tokens), '--sigma', str(args.sigma),
+        '--error-rate', str(args.llm_error_rate), '--seed', '1'
+    ], stdout=llm_log, stderr=subprocess.STDOUT)
+    processes.append(llm)
+    llm_url = f'http://127.0.0.1:{llm_port}'
+    wait_for(llm_url + '/stats', llm)
+
+    bin_dir = workdir / 'bin'
+    bin_dir.mkdir()
+    docker = bin_dir / 'docker'
+    docker.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{BENCH_DIR / "fake_docker.py"}" "$@"\n')
+    docker.chmod(0o755)
+
+    variants_dir = workdir / 'variants'
+    variants_dir.mkdir()
+    shutil.copy(V1_DIR / 'master.tex', variants_dir / 'master.tex')
+    openai_key = 'loadtest' if args.providers in ('openai', 'both') else ''
+    anthropic_key = 'loadtest' if args.providers in ('anthropic', 'both') else ''
+    env = {
+        **os.environ,
+        'PATH': f'{bin_dir}{os.pathsep}{os.environ.get("PATH", "")}',
+        'FLASK_SKIP_DOTENV': '1',
+        'AI_PROVIDER': 'anthropic' if args.providers == 'anthropic' else 'openai',
+        'OPENAI_API_KEY': openai_key,
+        'OPENAI_BASE_URL': f'{llm_url}/v1',
+        'ANTHROPIC_API_KEY': anthropic_key,
+        'ANTHROPIC_BASE_URL': llm_url,
+        'DATABASE_URL': f'sqlite:///{workdir / "loadtest.db"}',
+        'VARIANTS_DIR': str(variants_dir),
+        'LLM_CACHE_PATH': str(workdir / 'llm_cache.db'),
+        'COMPILE_CACHE_DIR': str(workdir / 'compile_cache'),
+        'TEX_WORK_DIR': str(workdir / 'tex_work'),
+        'TEX_ENGINE': args.tex_engine,
+        'FAKE_DOCKER_STATE': str(workdir / 'docker_state'),
+        'FAKE_TEX_MEDIAN_MS': str(args.tex_median_ms),
+        'FAKE_TEX_ERROR_RATE': str(args.tex_error_rate),
+    }
+    app_log = open(workdir / 'app.log', 'w')
+    app = subprocess.Popen([
+        sys.executable, '-m', 'flask', '--app', 'app', 'run', '--host', '127.0.0.1', '--port', str(app_port),
+        '--with-threads', '--no-reload', '--no-debugger'
+    ], cwd=WEB_DIR, env=env, stdout=app_log, stderr=subprocess.STDOUT, start_new_session=True)
+    processes.append(app)
+    base_url = f'http://127.0.0.1:{app_port}'
+    wait_for(base_url + '/login', app)
+    return base_url, processes, llm_url
+
+
+def print_report(report, elapsed, users):
+    print(f"\n📊 {users} users, {elapsed:.0f}s")
+    print(f"{'route':<38} {'reqs':>6} {'err%':>6} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in report.items():
+        print(f"{route:<38} {r['requests']:>6} {r['error_rate'] * 100:>5.1f}% {r['throughput_rps']:>7.2f} "
+              f"{r['p50_ms']:>9.0f} {r['p95_ms']:>9.0f} {r['p99_ms']:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=60, help='seconds of load after ramp-up starts')
+    parser.add_argument('--ramp-up', type=float, default=5, help='seconds over which users start')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('create=4,compile=3,upload=1,list=4'),
+                        help='relative weights of create, compile, upload and list')
+    parser.add_argument('--think-ms', type=float, default=1000, help='mean pause between a user\'s actions')
+    parser.add_argument('--timeout', type=float, default=300, help='per-request timeout (seconds)')
+    parser.add_argument('--target', help='run against this already-running server instead of starting one')
+    parser.add_argument('--ttft-ms', type=float, default=800)
+    parser.add_argument('--tokens-per-sec', type=float, default=60)
+    parser.add_argument('--response-tokens', type=int, default=600)
+    parser.add_argument('--sigma', type=float, default=0.4)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--providers', choices=('openai', 'anthropic', 'both'), default='openai')
+    parser.add_argument('--tex-engine', choices=('pool', 'docker'), default='pool')
+    parser.add_argument('--tex-median-ms', type=float, default=1800)
+    parser.add_argument('--tex-error-rate', type=float, default=0.0)
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--keep', action='store_true', help='keep the temp dir (app.log, database, variants)')
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='vibe-loadtest-'))
+    processes = []
+    llm_url = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip('/')
+        else:
+            print(f"🚀 Starting fake LLM API and app in {workdir}")
+            base_url, processes, llm_url = start_stack(args, workdir)
+
+        stats = Stats()
+        corpus = load_corpus()
+        run_id = uuid.uuid4().hex[:8]
+        start = time.monotonic()
+        deadline = start + args.duration
+        threads = []
+        for i in range(args.users):
+            user = User(i, base_url, stats, corpus, run_id, args.think_ms / 1000, args.timeout)
+            thread = threading.Thread(target=user.run, args=(args.mix, deadline), daemon=True)
+            thread.start()
+            threads.append(thread)
+            time.sleep(args.ramp_up / max(1, args.users))
+        print(f"👥 {args.users} users running for {args.duration:.0f}s against {base_url}")
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        report = stats.summary(elapsed)
+        print_report(report, elapsed, args.users)
+        result = {'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'elapsed_s': round(elapsed, 1),
+                  'routes': report}
+        if llm_url:
+            result['fake_llm'] = httpx.get(llm_url + '/stats').json()
+            print(f"🤖 Fake LLM: {result['fake_llm']['requests']} requests, {result['fake_llm']['errors']} injected errors")
+        if args.json:
+            Path(args.json).write_text(json.dumps(result, indent=2))
+            print(f"💾 Report written to {args.json}")
+    finally:
+        for process in reversed(processes):
+            # The app runs in its own process group so its text-extraction workers go with it
+            stop = (lambda sig: os.killpg(process.pid, sig)) if process is processes[-1] else process.send_signal
+            try:
+                stop(signal.SIGTERM)
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                stop(signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if args.keep:
+            print(f"📁 Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Content-addressed LaTeX blob storage for Vibe CV Resume Builder
+Documents are stored once per sha256, compressed with zstd (zlib if zstandard is not installed) and optionally as a delta against a base document
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Blob
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 19
+# zlib only looks back 32 KB, so only the tail of a longer base helps as a dictionary
+ZLIB_WINDOW = 32 * 1024
+
+
+def content_hash(text):
+    """sha256 hex digest of a document (its blob key)"""
+    if isinstance(text, str):
+        text = text.encode('utf-8')
+    return hashlib.sha256(text).hexdigest()
+
+
+def default_codec():
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+def compress(data, codec, dictionary=None):
+    """Compress bytes, using dictionary (the base document) as shared history if given"""
+    if codec == 'zstd':
+        if dictionary:
+            zdict = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zdict).compress(data)
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == 'zlib':
+        if dictionary:
+            compressor = zlib.compressobj(ZLIB_LEVEL, zdict=dictionary[-ZLIB_WINDOW:])
+        else:
+            compressor = zlib.compressobj(ZLIB_LEVEL)
+        return compressor.compress(data) + compressor.flush()
+    if codec == 'raw':
+        return data
+    raise ValueError(f'Unknown blob codec: {codec}')
+
+
+def decompress(data, codec, dictionary=None):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('Blob is zstd-compressed but the zstandard package is not installed')
+        if dictionary:
+            zdict = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+            return zstandard.ZstdDecompressor(dict_data=zdict).decompress(data)
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'zlib':
+        if dictionary:
+            decompressor = zlib.decompressobj(zdict=dictionary[-ZLIB_WINDOW:])
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+    if codec == 'raw':
+        return data
+    raise ValueError(f'Unknown blob codec: {codec}')
+
+
+class BlobStore:
+    """Immutable text blobs in the blobs table, keyed by sha256 of the content
+
+    put() is idempotent: storing a document that is already there costs one
+    primary-key lookup and no write. A variant is stored as a delta against
+    its master (the master is used as the compression dictionary), so a
+    tailored CV usually takes a few hundred bytes. Bases are always stored
+    whole, so reading any blob decompresses at most two rows. Decoded texts
+    are kept in a small in-process LRU since compiles re-read the same ones.
+    """
+
+    def __init__(self, codec=None, cache_entries=128):
+        self.codec = codec or default_codec()
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, text, base=None):
+        """Store text (optionally delta-compressed against base text) and return its hash
+
+        Does not commit; the caller commits together with the row referencing the blob.
+        """
+        digest = content_hash(text)
+        if db.session.get(Blob, digest) is not None:
+            return digest
+
+        data = text.encode('utf-8')
+        base_hash = None
+        payload = compress(data, self.codec)
+        if base and base != text:
+            base_hash = self.put(base)
+            delta = compress(data, self.codec, dictionary=base.encode('utf-8'))
+            if len(delta) < len(payload):
+                payload = delta
+            else:
+                base_hash = None
+
+        blob = Blob(hash=digest, codec=self.codec, base_hash=base_hash, data=payload,
+                    size=len(data), stored_size=len(payload))
+        try:
+            with db.session.begin_nested():
+                db.session.add(blob)
+        except IntegrityError:
+            # Another worker stored the same document first; theirs is identical
+            pass
+        self._remember(digest, text)
+        return digest
+
+    def get(self, digest):
+        """Text of a blob, or None if there is no such blob"""
+        if not digest:
+            return None
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+
+        blob = db.session.get(Blob, digest)
+        if blob is None:
+            return None
+        dictionary = None
+        if blob.base_hash:
+            base = self.get(blob.base_hash)
+            if base is None:
+                raise RuntimeError(f'Blob {digest[:12]} is missing its base {blob.base_hash[:12]}')
+            dictionary = base.encode('utf-8')
+        text = decompress(blob.data, blob.codec, dictionary).decode('utf-8')
+        self._remember(digest, text)
+        return text
+
+    def _remember(self, digest, text):
+        with self._lock:
+            self._cache[digest] = text
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def stats(self):
+        """Blob count and logical vs stored bytes"""
+        count, size, stored = db.session.query(
+            db.func.count(Blob.hash),
+            db.func.coalesce(db.func.sum(Blob.size), 0),
+            db.func.coalesce(db.func.sum(Blob.stored_size), 0)
+        ).one()
+        deltas = Blob.query.filter(Blob.base_hash.isnot(None)).count()
+        return {
+            'codec': self.codec,
+            'blobs': count,
+            'deltas': deltas,
+            'bytes': int(size),
+            'stored_bytes': int(stored),
+            'ratio': round(size / stored, 1) if stored else None
+        }
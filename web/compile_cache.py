@@ -0,0 +1,174 @@
+"""
+Content-addressed PDF compile cache for Vibe CV Resume Builder
+Skips the Docker/TeX round trip when the exact same LaTeX source was compiled before
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+_image_digests = {}
+_image_digest_lock = threading.Lock()
+
+
+def get_image_digest(image):
+    """Resolve a Docker image name to its local image ID (cached per process)
+
+    Falls back to the image name itself when Docker is unavailable, so the
+    cache still works - it just won't notice an in-place image upgrade.
+    """
+    with _image_digest_lock:
+        if image in _image_digests:
+            return _image_digests[image]
+
+    digest = image
+    try:
+        result = subprocess.run(
+            ['docker', 'image', 'inspect', '--format', '{{.Id}}', image],
+            capture_output=True, text=True, timeout=10
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            digest = result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+
+    with _image_digest_lock:
+        _image_digests[image] = digest
+    return digest
+
+
+class CompileCache:
+    """On-disk PDF cache keyed on LaTeX source + TeX image + latexmk flags
+
+    Entries are plain PDF files named by their key. Recency is tracked through
+    the file mtime (refreshed on every hit), and the least recently used entries
+    are evicted once the total size goes over max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = sum(p.stat().st_size for p in self._entries())
+
+    @staticmethod
+    def make_key(tex_source, image_digest, flags):
+        """Build the cache key for a compile"""
+        if isinstance(tex_source, str):
+            tex_source = tex_source.encode('utf-8')
+        h = hashlib.sha256()
+        h.update(tex_source)
+        h.update(b'\0')
+        h.update(image_digest.encode('utf-8'))
+        h.update(b'\0')
+        h.update(' '.join(flags).encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.pdf"
+
+    def _entries(self):
+        return [p for p in self.cache_dir.glob('*/*.pdf') if p.is_file()]
+
+    def get(self, key, dest):
+        """Copy the cached PDF for key to dest. Returns True on a hit."""
+        path = self._path(key)
+        if not path.exists():
+            with self._lock:
+                self.misses += 1
+            return False
+
+        # Copy next to dest and rename over it, so a download in progress never sees a partial PDF
+        dest = Path(dest)
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=f'.{dest.name}.', suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp_name)
+            os.replace(tmp_name, dest)
+        except OSError as e:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            if not isinstance(e, FileNotFoundError):
+                raise
+            with self._lock:  # evicted since the exists() check
+                self.misses += 1
+            return False
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, pdf_path):
+        """Store a freshly compiled PDF under key"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file first so concurrent readers never see a partial PDF
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(pdf_path, tmp_name)
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_name, path)
+        except OSError:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        with self._lock:
+            self._total_bytes += path.stat().st_size - old_size
+            over_budget = self._total_bytes > self.max_bytes
+
+        if over_budget:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._total_bytes = total
+            self.evictions += removed
+
+    def stats(self):
+        """Return hit/miss counters and current disk usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
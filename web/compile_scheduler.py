@@ -0,0 +1,73 @@
+"""
+Compile scheduler for Vibe CV Resume Builder
+Bounds concurrent LaTeX compiles and gives each compile a private scratch directory
+"""
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class CompileQueueTimeout(Exception):
+    """Raised when a compile waited too long for a free slot"""
+
+
+class CompileScheduler:
+    """Admits at most max_concurrent compiles at a time; the rest wait in line
+
+    Each admitted compile gets a fresh directory under scratch_root (which is
+    what gets mounted into the TeX containers), removed again on every exit
+    path so .aux/.log/.fls files never pile up.
+    """
+
+    def __init__(self, scratch_root, max_concurrent=2, queue_timeout=120):
+        self.scratch_root = Path(scratch_root)
+        self.max_concurrent = max(1, max_concurrent)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.scratch_root.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def slot(self):
+        """Wait for a compile slot and yield a private scratch directory"""
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.rejected += 1
+            else:
+                self.running += 1
+        if not acquired:
+            raise CompileQueueTimeout(f'No compile slot free after {self.queue_timeout}s')
+
+        workdir = None
+        try:
+            # Inside the try: if this fails (disk full, permissions) the slot is still given back
+            workdir = Path(tempfile.mkdtemp(prefix='cv-', dir=self.scratch_root))
+            yield workdir
+        finally:
+            if workdir is not None:
+                shutil.rmtree(workdir, ignore_errors=True)
+            with self._lock:
+                self.running -= 1
+                if workdir is not None:
+                    self.completed += 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'running': self.running,
+                'waiting': self.waiting,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
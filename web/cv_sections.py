@@ -0,0 +1,143 @@
+"""
+Section-parallel CV conversion for Vibe CV Resume Builder
+Splits extracted CV text into sections, builds a prompt per section and assembles the converted parts into one document
+"""
+import re
+from collections import namedtuple
+
+HEADER = 'header'
+
+# Canonical section -> headings that start it (English and Vietnamese, matched case-insensitively)
+SECTION_HEADINGS = [
+    ('summary', r'(professional |career |executive )?(summary|profile|objective)|about me|'
+                r'tóm tắt|giới thiệu( bản thân)?|mục tiêu( nghề nghiệp)?'),
+    ('experience', r'(work |professional |relevant )?experience|employment( history)?|work history|'
+                   r'career history|kinh nghiệm( làm việc)?|quá trình làm việc'),
+    ('education', r'education( (and|&) training)?|academic background|học vấn|trình độ học vấn|đào tạo'),
+    ('skills', r'(core |technical |key |professional )?(skills|competencies|expertise)|kỹ năng'),
+    ('projects', r'(key |selected )?projects|dự án'),
+    ('certifications', r'certifications?|certificates?|licenses( (and|&) certifications)?|chứng chỉ'),
+    ('languages', r'languages?|ngoại ngữ'),
+    ('awards', r'awards?( (and|&) achievements)?|achievements|honou?rs|giải thưởng|thành tích'),
+    ('activities', r'(volunteer|extracurricular)( work| activities| experience)?|activities|hoạt động'),
+    ('references', r'references?|người tham chiếu'),
+]
+_HEADINGS = [(key, re.compile(rf'(?:{pattern})', re.IGNORECASE)) for key, pattern in SECTION_HEADINGS]
+_HEADING_DECORATION = re.compile(r'^[\s#*=\-–—•|]+|[\s#*=\-–—•|:]+$')
+MAX_HEADING_LENGTH = 40
+
+_NEWCOMMAND = re.compile(r'\\newcommand\*?\s*\{?\\([A-Za-z@]+)\}?\s*(?:\[(\d)\])?')
+_FENCE = re.compile(r'^```[a-zA-Z]*\s*\n?|\n?```\s*$')
+
+# Used when there is no v1/master.tex to borrow the preamble from
+DEFAULT_PREAMBLE = r"""\documentclass[letterpaper,11pt]{article}
+\usepackage[empty]{fullpage}
+\usepackage{titlesec}
+\usepackage{enumitem}
+\usepackage[colorlinks=true,urlcolor=blue]{hyperref}
+\usepackage{tabularx}
+\addtolength{\oddsidemargin}{-0.5in}
+\addtolength{\textwidth}{1in}
+\addtolength{\topmargin}{-.5in}
+\addtolength{\textheight}{1.0in}
+\raggedright
+\titleformat{\section}{\bfseries\large}{}{0em}{}[\titlerule]
+\newcommand{\resumeItem}[1]{\item\small{#1}}
+\newcommand{\resumeSubheading}[4]{\item
+  \begin{tabular*}{\textwidth}[t]{l@{\extracolsep{\fill}}r}
+    \textbf{#1} & \small #2 \\ \textit{#3} & \small #4 \\
+  \end{tabular*}}
+\newcommand{\resumeSubHeadingListStart}{\begin{itemize}[leftmargin=0in, label={}]}
+\newcommand{\resumeSubHeadingListEnd}{\end{itemize}}
+\newcommand{\resumeItemListStart}{\begin{itemize}}
+\newcommand{\resumeItemListEnd}{\end{itemize}}
+"""
+
+CVSection = namedtuple('CVSection', ['key', 'title', 'text'])
+
+
+def heading_key(line):
+    """Canonical section key if line is a section heading, else None"""
+    title = _HEADING_DECORATION.sub('', line)
+    if not title or len(title) > MAX_HEADING_LENGTH:
+        return None
+    for key, pattern in _HEADINGS:
+        if pattern.fullmatch(title):
+            return key
+    return None
+
+
+def split_cv_text(text):
+    """Split extracted CV text into [CVSection] in document order
+
+    Everything before the first recognised heading is the HEADER section (name,
+    contact details). A heading seen again (e.g. "Experience" twice) starts a
+    new section of its own so nothing is merged out of order.
+    """
+    sections = []
+    key, title, lines = HEADER, None, []
+    for line in text.splitlines():
+        found = heading_key(line)
+        if found:
+            if lines and any(l.strip() for l in lines):
+                sections.append(CVSection(key, title, '\n'.join(lines).strip()))
+            title = _HEADING_DECORATION.sub('', line)
+            key, title, lines = found, title.title() if title.isupper() else title, []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append(CVSection(key, title, '\n'.join(lines).strip()))
+    return sections
+
+
+def preamble_commands(preamble):
+    """'\\name (n args)' for each macro the preamble defines, for the section prompts"""
+    return [f'\\{name}' + (f' ({args} args)' if args else '') for name, args in _NEWCOMMAND.findall(preamble)]
+
+
+def section_prompts(section, preamble):
+    """(system_prompt, user_prompt) for converting one section"""
+    commands = ', '.join(preamble_commands(preamble)) or 'standard LaTeX only'
+    if section.key == HEADER:
+        shape = ("the heading at the very top of the document body: the person's name in large bold "
+                 "(\\textbf{\\LARGE Name}), then one line of contact details separated by | with "
+                 "e-mail and profile URLs as \\href links. No \\section")
+    elif section.key == 'summary':
+        shape = "a short paragraph placed right under the heading (\\noindent\\small{...}). No \\section"
+    else:
+        shape = (f"\\section{{{section.title}}} followed by its content, using the preamble's commands "
+                 "for entries and bullet lists (e.g. \\resumeSubHeadingListStart / \\resumeSubheading / "
+                 "\\resumeItemListStart / \\resumeItem when they are defined)")
+
+    system_prompt = f"""You are an expert LaTeX CV converter. You convert ONE section of a CV at a time.
+The preamble and \\begin{{document}} / \\end{{document}} are added for you and define these commands:
+{commands}
+
+CRITICAL:
+- Return ONLY the LaTeX for this part: {shape}
+- Never output \\documentclass, \\usepackage, \\begin{{document}} or \\end{{document}}
+- Keep every entry and bullet point; do not summarize or drop content
+- Every \\begin{{...}} you open must be closed
+- Properly escape special LaTeX characters: & becomes \\&, # becomes \\#, % becomes \\%, _ becomes \\_"""
+
+    user_prompt = f"""Convert this CV section to LaTeX:
+
+{section.text}
+
+Return ONLY the LaTeX code, no explanations"""
+    return system_prompt, user_prompt
+
+
+def clean_fragment(latex):
+    """Strip code fences and any document skeleton the model added around a section"""
+    latex = _FENCE.sub('', latex.strip())
+    if '\\begin{document}' in latex:
+        latex = latex.split('\\begin{document}', 1)[1]
+    latex = latex.replace('\\end{document}', '')
+    return latex.strip()
+
+
+def assemble(preamble, fragments):
+    """Join the shared preamble and the converted sections (in order) into one document"""
+    body = '\n\n'.join(f for f in fragments if f)
+    return f"{preamble.rstrip()}\n\n\\begin{{document}}\n\n{body}\n\n\\end{{document}}\n"
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
-import re
 import sys
 
+from latex_escape import escape_latex
+
 file_path = sys.argv[1]
 with open(file_path, 'r', encoding='utf-8') as f:
     content = f.read()
 
-# Fix unescaped & (but not \\&)
-content = re.sub(r'(?<!\\)&', r'\\&', content)
+# Escape stray & % _ # $ (comments, math, tables and macro parameters are left alone)
+content = escape_latex(content)
 
 with open(file_path, 'w', encoding='utf-8') as f:
     f.write(content)
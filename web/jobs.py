@@ -0,0 +1,130 @@
+"""
+Background job runner for Vibe CV Resume Builder
+Runs slow pipelines (AI -> write -> compile) off the request thread, with state kept in the database
+"""
+import json
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from models import db, Job
+
+
+class JobReporter:
+    """Handed to job functions so they can report stage progress"""
+
+    def __init__(self, job_id, flush_interval=0.5):
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = 0.0
+
+    def _job(self):
+        return db.session.get(Job, self.job_id)
+
+    def start(self, stage):
+        """Mark a stage as currently running"""
+        job = self._job()
+        job.stage = stage
+        db.session.commit()
+
+    def finish(self, stage, message='', **data):
+        """Record a finished stage (streamed to clients as it happens)"""
+        job = self._job()
+        progress = job.get_progress()
+        progress.append({'stage': stage, 'message': message, **data})
+        job.progress = json.dumps(progress)
+        db.session.commit()
+
+    def stream(self, text):
+        """Append streamed output; written to the job at most every flush_interval seconds"""
+        self._pending.append(text)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush_output()
+
+    def reset_output(self, stage, message='', **data):
+        """Drop the streamed output (e.g. rejected section edits) before it is generated again
+
+        Records a stage with reset_output=True in the same commit, so clients
+        know to discard what they have rendered so far (see /api/jobs/<id>/events).
+        """
+        self._pending = []
+        job = self._job()
+        progress = job.get_progress()
+        progress.append({'stage': stage, 'message': message, 'reset_output': True, **data})
+        job.progress = json.dumps(progress)
+        job.output = ''
+        db.session.commit()
+        self._last_flush = 0.0
+
+    def flush_output(self):
+        """Write any buffered streamed output to the job"""
+        if not self._pending:
+            return
+        job = self._job()
+        job.output = (job.output or '') + ''.join(self._pending)
+        db.session.commit()
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+
+class JobRunner:
+    """Thread pool that executes jobs inside an app context"""
+
+    def __init__(self, app, max_workers=4):
+        self.app = app
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vibe-job')
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+
+    def create(self, user_id, kind, variant_id=None, commit=True):
+        """Create a queued job row and return it (commit=False leaves it in the caller's transaction)"""
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, kind=kind, variant_id=variant_id, status='queued')
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+        return job
+
+    def submit(self, job_id, fn, *args):
+        """Run fn(reporter, *args) in the background; its return value becomes the job result"""
+        with self._lock:
+            self.queued += 1
+        return self.executor.submit(self._run, job_id, fn, args)
+
+    def _run(self, job_id, fn, args):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        with self.app.app_context():
+            try:
+                job = db.session.get(Job, job_id)
+                job.status = 'running'
+                db.session.commit()
+
+                result = fn(JobReporter(job_id), *args)
+
+                job = db.session.get(Job, job_id)
+                job.status = 'succeeded'
+                job.result = json.dumps(result)
+                db.session.commit()
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                traceback.print_exc()
+                db.session.rollback()
+                job = db.session.get(Job, job_id)
+                if job:
+                    job.status = 'failed'
+                    job.error = str(e)
+                    db.session.commit()
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self.running -= 1
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.max_workers, 'queued': self.queued, 'running': self.running}
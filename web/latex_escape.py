@@ -0,0 +1,200 @@
+"""
+LaTeX special character escaping for Vibe CV Resume Builder
+Single-pass, context-aware escaping of & % _ # $ in AI-generated LaTeX (comments, verbatim, math and tables are left alone)
+"""
+import re
+
+# Environments whose body is copied untouched
+VERBATIM_ENVS = {'verbatim', 'verbatim*', 'lstlisting', 'minted', 'comment'}
+MATH_ENVS = {'equation', 'equation*', 'align', 'align*', 'gather', 'gather*', 'multline', 'multline*',
+             'displaymath', 'math', 'eqnarray', 'eqnarray*'}
+# Environments where & is a column separator
+ALIGN_ENVS = {'tabular', 'tabular*', 'tabularx', 'tabulary', 'longtable', 'array', 'matrix', 'pmatrix',
+              'bmatrix', 'cases', 'alignat', 'alignat*', 'supertabular', 'xtabular'}
+# Commands whose first argument is a URL, label or file name, not text
+RAW_ARG_COMMANDS = {'url', 'href', 'nolinkurl', 'path', 'label', 'ref', 'pageref', 'eqref', 'autoref',
+                    'cite', 'includegraphics', 'input', 'include', 'usepackage', 'documentclass',
+                    'hypersetup', 'bibliography', 'bibliographystyle'}
+# Commands whose arguments are macro code (# is a parameter there), copied verbatim
+DEFINITION_COMMANDS = {'newcommand', 'renewcommand', 'providecommand', 'DeclareRobustCommand',
+                       'newenvironment', 'renewenvironment', 'def', 'gdef', 'edef', 'xdef'}
+
+_SPECIAL = re.compile(r'[\\%&_#$]')
+_CONTROL = re.compile(r'\\(?:([A-Za-z@]+)\*?|.)', re.DOTALL)
+_ENV_ARG = re.compile(r'\s*\{([^{}]*)\}')
+_OPTIONAL_ARG = re.compile(r'\s*\[[^\]]*\]')
+_PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n')
+
+
+def _skip_group(text, pos):
+    """End offset of the balanced {...} group starting at pos (after optional whitespace/[...])"""
+    m = _OPTIONAL_ARG.match(text, pos)
+    if m:
+        pos = m.end()
+    while pos < len(text) and text[pos] in ' \t\n':
+        pos += 1
+    if pos >= len(text) or text[pos] != '{':
+        return pos
+    depth = 0
+    i = pos
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def _skip_definition(text, pos, name):
+    """End offset of the \\newcommand / \\newenvironment / \\def whose name ends at pos"""
+    if name.endswith('def'):  # \def\name#1#2{body}
+        body = text.find('{', pos)
+        return len(text) if body == -1 else _skip_group(text, body)
+    while pos < len(text) and text[pos] in ' \t\n':
+        pos += 1
+    if text.startswith('\\', pos):  # \newcommand\name without braces
+        pos = _CONTROL.match(text, pos).end()
+    else:
+        pos = _skip_group(text, pos)
+    m = _OPTIONAL_ARG.match(text, pos)  # [n]; _skip_group takes the [default] after it
+    if m:
+        pos = m.end()
+    pos = _skip_group(text, pos)
+    if name.endswith('environment'):
+        pos = _skip_group(text, pos)
+    return pos
+
+
+def _closing_dollar(text, pos, limit):
+    """Offset of the $ closing inline math opened just before pos, or -1
+
+    Like Pandoc: the opening $ must not be followed by a space, and the closing
+    one must not follow a space or precede a digit, so "$5 and $10" is not math.
+    """
+    if pos >= limit or text[pos].isspace():
+        return -1
+    close = text.find('$', pos)
+    while close != -1 and text[close - 1] == '\\':  # \$ inside the math
+        close = text.find('$', close + 1)
+    if close == -1 or close >= limit or text[close - 1].isspace() or text[close + 1:close + 2].isdigit():
+        return -1
+    return close
+
+
+def _find_end(text, pos, closing):
+    """Offset just past closing, or the end of text"""
+    i = text.find(closing, pos)
+    return len(text) if i == -1 else i + len(closing)
+
+
+def escape_latex(text):
+    """Escape stray & % _ # $ in LaTeX text in one left-to-right pass
+
+    - Existing escapes (\\&, \\%, ...) and everything before \\begin{document} are kept as is
+    - % right after a digit ("30%") is escaped; any other % starts a comment, which is copied verbatim
+    - & is kept inside tabular-like environments, escaped elsewhere
+    - # is escaped ("Ranked #1"); macro definitions (\\newcommand, \\def, ...) are copied verbatim
+    - $...$, $$...$$, \\(...\\), \\[...\\] and math environments are copied verbatim; a $ with no
+      closing $ in the same paragraph, or one that looks like money ("$5 and $10"), is escaped
+    - verbatim environments, \\verb and URL/label/file arguments (\\href, \\url, \\label, ...) are copied verbatim
+    """
+    if not text:
+        return text
+
+    out = []
+    pos = 0
+    n = len(text)
+    start = text.find('\\begin{document}')
+    if start > 0:
+        out.append(text[:start])
+        pos = start
+    align_depth = 0
+
+    while True:
+        m = _SPECIAL.search(text, pos)
+        if not m:
+            out.append(text[pos:])
+            break
+        i = m.start()
+        out.append(text[pos:i])
+        c = text[i]
+
+        if c == '\\':
+            control = _CONTROL.match(text, i)
+            if not control:  # lone backslash at end of text
+                out.append(c)
+                pos = i + 1
+                continue
+            name = control.group(1)
+            end = control.end()
+            token = control.group(0)
+            if name in ('begin', 'end'):
+                env = _ENV_ARG.match(text, end)
+                if env:
+                    env_name = env.group(1).strip()
+                    end = env.end()
+                    if name == 'begin' and (env_name in VERBATIM_ENVS or env_name in MATH_ENVS):
+                        end = _find_end(text, end, '\\end{%s}' % env_name)
+                    elif env_name in ALIGN_ENVS:
+                        align_depth = align_depth + 1 if name == 'begin' else max(align_depth - 1, 0)
+            elif name == 'verb':
+                if end < n:
+                    end = _find_end(text, end + 1, text[end])
+            elif name in RAW_ARG_COMMANDS:
+                end = _skip_group(text, end)
+            elif name in DEFINITION_COMMANDS:
+                end = _skip_definition(text, end, name)
+            elif token == '\\(':
+                end = _find_end(text, end, '\\)')
+            elif token == '\\[':
+                end = _find_end(text, end, '\\]')
+            out.append(text[i:end])
+            pos = end
+
+        elif c == '%':
+            if i > 0 and text[i - 1].isdigit():
+                out.append('\\%')
+                pos = i + 1
+            else:
+                end = text.find('\n', i)
+                end = n if end == -1 else end
+                out.append(text[i:end])
+                pos = end
+
+        elif c == '$':
+            paragraph = _PARAGRAPH_BREAK.search(text, i)
+            limit = n if paragraph is None else paragraph.start()
+            if text.startswith('$$', i):
+                delim = '$$'
+                close = text.find(delim, i + 2)
+            else:
+                delim = '$'
+                close = _closing_dollar(text, i + 1, limit)
+            if close != -1 and close < limit:
+                end = close + len(delim)
+                out.append(text[i:end])
+                pos = end
+            else:
+                out.append('\\$')
+                pos = i + 1
+
+        elif c == '&':
+            out.append('&' if align_depth else '\\&')
+            pos = i + 1
+
+        elif c == '_':
+            out.append('\\_')
+            pos = i + 1
+
+        else:  # '#'
+            out.append('\\#')
+            pos = i + 1
+
+    return ''.join(out)
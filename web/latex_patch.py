@@ -0,0 +1,132 @@
+"""
+Section-level LaTeX patches for Vibe CV Resume Builder
+Lets the AI return edits against the master CV instead of regenerating the whole document
+"""
+import re
+
+HEADER = 'HEADER'
+
+_SECTION = re.compile(r'^[ \t]*\\section\*?\s*\{([^{}]*)\}[^\n]*\n?', re.MULTILINE)
+_BLOCK = re.compile(r'^===\s*REPLACE:\s*(.+?)\s*===[ \t]*\n(.*?)^===\s*END\s*===[ \t]*$', re.MULTILINE | re.DOTALL)
+_BLOCK_START = re.compile(r'^===\s*REPLACE:', re.MULTILINE)
+_ORDER = re.compile(r'^ORDER:\s*(.+)$', re.MULTILINE)
+
+PATCH_FORMAT_INSTRUCTIONS = f"""CRITICAL OUTPUT FORMAT (section edits - do NOT return the whole document):
+First line MUST be: MATCH_SCORE: XX%
+Then a blank line
+Then, optionally, one line giving the new order of the \\section{{...}} sections:
+ORDER: Title 1 | Title 2 | ...
+Then one block per part of the master CV you change:
+=== REPLACE: <exact section title, or {HEADER} for everything between \\begin{{document}} and the first \\section> ===
+<new LaTeX for that part, WITHOUT its \\section{{...}} line>
+=== END ===
+
+Rules:
+- The preamble is kept from the master CV automatically - never output it
+- Only output blocks for parts you actually change; unchanged parts are kept as they are
+- Section titles must match the master CV exactly; do not invent new sections
+- ORDER, if given, must list every section of the master CV exactly once
+
+Example:
+MATCH_SCORE: 75%
+
+ORDER: Professional Experience | Core Competencies | Education
+=== REPLACE: {HEADER} ===
+\\noindent ...rewritten heading and summary...
+=== END ===
+=== REPLACE: Core Competencies ===
+...rewritten section body...
+=== END ==="""
+
+
+class PatchError(ValueError):
+    """The AI's section edits do not apply cleanly to the master CV"""
+
+
+def split_sections(latex):
+    """Split a document into (preamble, header, [(title, heading_line, body)], trailer)
+
+    preamble ends with \\begin{document}, header is everything before the first
+    \\section, trailer starts at \\end{document}.
+    """
+    if '\\begin{document}' not in latex:
+        raise PatchError('master CV has no \\begin{document}')
+    preamble, _, rest = latex.partition('\\begin{document}')
+    preamble += '\\begin{document}'
+    end = rest.rfind('\\end{document}')
+    trailer = rest[end:] if end != -1 else ''
+    rest = rest[:end] if end != -1 else rest
+
+    matches = list(_SECTION.finditer(rest))
+    header = rest[:matches[0].start()] if matches else rest
+    sections = []
+    for i, m in enumerate(matches):
+        body_end = matches[i + 1].start() if i + 1 < len(matches) else len(rest)
+        sections.append((m.group(1).strip(), m.group(0), rest[m.end():body_end]))
+    return preamble, header, sections, trailer
+
+
+def parse_patch(text):
+    """Parse a patch response into (order or None, {title: new LaTeX})"""
+    replacements = {}
+    for m in _BLOCK.finditer(text):
+        title = m.group(1).strip()
+        if title in replacements:
+            raise PatchError(f'section "{title}" replaced twice')
+        replacements[title] = m.group(2)
+    if len(_BLOCK_START.findall(text)) != len(replacements):
+        raise PatchError('unterminated REPLACE block (missing === END ===)')
+
+    order = None
+    order_match = _ORDER.search(text)
+    if order_match:
+        order = [t.strip() for t in order_match.group(1).split('|') if t.strip()]
+
+    if not replacements and order is None:
+        raise PatchError('no section edits found')
+    return order, replacements
+
+
+def apply_patch(master_tex, patch_text, fix_body=None):
+    """Apply section edits to the master CV and return the full document
+
+    fix_body, if given, is applied to each replaced body (e.g. special character
+    escaping) so the untouched master text is never rewritten. Raises PatchError
+    if the edits reference unknown sections or do not form a valid document.
+    """
+    order, replacements = parse_patch(patch_text)
+    preamble, header, sections, trailer = split_sections(master_tex)
+    titles = [title for title, _, _ in sections]
+
+    unknown = [t for t in replacements if t != HEADER and t not in titles]
+    if unknown:
+        raise PatchError(f'unknown section(s): {", ".join(unknown)}')
+    if len(set(titles)) != len(titles):
+        raise PatchError('master CV has duplicate section titles')
+    if order is not None and sorted(order) != sorted(titles):
+        raise PatchError('ORDER must list every master CV section exactly once')
+
+    def body(title, original):
+        if title not in replacements:
+            return original
+        new = replacements[title]
+        # Models sometimes repeat the heading despite the instructions
+        heading = _SECTION.match(new.lstrip('\n'))
+        if heading and heading.group(1).strip() == title:
+            new = new.lstrip('\n')[heading.end():]
+        if title == HEADER and not new.startswith('\n'):
+            new = '\n\n' + new
+        if fix_body:
+            new = fix_body(new)
+        if '\\begin{document}' in new or '\\end{document}' in new or '\\documentclass' in new:
+            raise PatchError(f'section "{title}" contains document-level commands')
+        # Keep the blank line that separated this part from the next heading
+        return new.rstrip('\n') + '\n\n'
+
+    by_title = {title: (heading, text) for title, heading, text in sections}
+    parts = [preamble, body(HEADER, header)]
+    for title in (order or titles):
+        heading, text = by_title[title]
+        parts.append(heading + body(title, text))
+    parts.append(trailer)
+    return ''.join(parts)
@@ -0,0 +1,209 @@
+"""
+LaTeX pre-flight validator for Vibe CV Resume Builder
+Catches documents that can never compile (unbalanced, truncated, missing macros) in milliseconds, before a Docker compile
+"""
+import bisect
+import re
+
+# Environments whose contents TeX reads verbatim (braces and \begin/\end inside them mean nothing)
+VERBATIM_ENVIRONMENTS = ('verbatim', 'verbatim*', 'Verbatim', 'Verbatim*', 'lstlisting', 'minted', 'comment')
+
+_TOKEN = re.compile(
+    r'%[^\n]*'                                          # comment
+    r'|\\begin\s*\{(?P<verbatim>' + '|'.join(re.escape(e) for e in VERBATIM_ENVIRONMENTS) + r')\}'
+    r'.*?\\end\s*\{(?P=verbatim)\}'                     # verbatim environment, skipped whole
+    r'|\\verb\*?(?P<delim>[^\sA-Za-z*])[^\n]*?(?P=delim)'  # \verb|...|, skipped whole
+    r'|\\(?P<env>begin|end)\s*\{(?P<name>[^{}]*)\}'     # \begin{x} / \end{x}
+    r'|\\(?P<cmd>[A-Za-z@]+)'                           # control word
+    r'|\\.'                                             # control symbol (\%, \{, \\ ...)
+    r'|(?P<brace>[{}])',
+    re.DOTALL
+)
+_DEFINED_COMMAND = re.compile(r'\\(?:(?:re|provide)?newcommand|DeclareRobustCommand)\*?\s*\{?\\([A-Za-z@]+)|\\[gex]?def\s*\\([A-Za-z@]+)')
+_DEFINED_ENVIRONMENT = re.compile(r'\\(?:re)?newenvironment\*?\s*\{([^{}]+)\}')
+_MACRO_DEFINITION = re.compile(r'\\(?:re|provide)?newcommand\*?\s*\{?\\([A-Za-z@]+)\}?\s*(?:\[\d\])?\s*(?:\[[^\]]*\])?\s*(?=\{)')
+_ENV_BEGIN = re.compile(r'\\begin\s*\{([^{}]*)\}')
+_ENV_END = re.compile(r'\\end\s*\{([^{}]*)\}')
+_USED_COMMAND = re.compile(r'\\([A-Za-z@]+)')
+_USED_ENVIRONMENT = re.compile(r'\\begin\s*\{([^{}]*)\}')
+
+MAX_REPORTED = 10
+
+
+def split_preamble(latex):
+    """Return (preamble, rest) split at \\begin{document}; rest is '' if there is none"""
+    preamble, sep, rest = latex.partition('\\begin{document}')
+    return preamble, sep + rest
+
+
+def defined_commands(preamble):
+    """Names of macros defined with \\newcommand, \\renewcommand, \\def etc."""
+    return {a or b for a, b in _DEFINED_COMMAND.findall(preamble)}
+
+
+def defined_environments(preamble):
+    return set(_DEFINED_ENVIRONMENT.findall(preamble))
+
+
+def _braced(text, pos):
+    """Contents of the {...} group starting at text[pos]"""
+    depth = 0
+    for i in range(pos, len(text)):
+        c = text[i]
+        if c == '{' and text[i - 1] != '\\':
+            depth += 1
+        elif c == '}' and text[i - 1] != '\\':
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1:i]
+    return text[pos + 1:]
+
+
+def environment_macros(preamble):
+    """Macros whose definition only opens or only closes an environment, e.g. \\resumeItemListStart
+
+    Returns {name: ('begin' | 'end', environment)} so uses in the body can be balanced like \\begin/\\end.
+    """
+    macros = {}
+    for m in _MACRO_DEFINITION.finditer(preamble):
+        definition = _braced(preamble, m.end())
+        opened = _ENV_BEGIN.findall(definition)
+        closed = _ENV_END.findall(definition)
+        if len(opened) == 1 and not closed:
+            macros[m.group(1)] = ('begin', opened[0].strip())
+        elif len(closed) == 1 and not opened:
+            macros[m.group(1)] = ('end', closed[0].strip())
+    return macros
+
+
+class _Lines:
+    """Offset -> line number lookup, built only when a problem is reported"""
+
+    def __init__(self, text):
+        self.text = text
+        self._starts = None
+
+    def __call__(self, offset):
+        if self._starts is None:
+            self._starts = [m.end() for m in re.finditer('\n', self.text)]
+        return bisect.bisect_right(self._starts, offset) + 1
+
+
+def validate_latex(latex, master_tex=None):
+    """Check a document's structure in a single pass; returns a list of problems (empty if OK)
+
+    Checks the \\documentclass / \\begin{document} / \\end{document} skeleton,
+    brace balance, environment balance in the body (including list-start/end
+    macros such as \\resumeItemListStart; \\begin/\\end inside preamble macro
+    definitions are not environments), truncation, and - if master_tex is given -
+    that every macro and environment the master's preamble defines and the
+    document uses is also defined in the document's own preamble.
+    """
+    problems = []
+    line_of = _Lines(latex)
+
+    # Skeleton
+    preamble, body = split_preamble(latex)
+    if not body:
+        problems.append('Missing \\begin{document}')
+    elif '\\documentclass' not in preamble:
+        problems.append('Missing \\documentclass before \\begin{document}')
+    if latex.count('\\begin{document}') > 1:
+        problems.append('More than one \\begin{document}')
+    if '\\end{document}' not in latex:
+        problems.append('Missing \\end{document} (output looks truncated)')
+
+    # Braces, environments and command usage in one scan
+    braces = []  # offsets of open {
+    envs = []  # (name, offset) of open \begin
+    used_commands = set()
+    used_environments = set()
+    env_macros = environment_macros(preamble)
+    body_start = len(preamble)
+    for m in _TOKEN.finditer(latex):
+        if m.group('verbatim') or m.group('delim'):
+            continue
+        kind, name = m.group('env'), (m.group('name') or '').strip()
+        in_body = m.start() >= body_start
+        if m.group('cmd') in env_macros and in_body:
+            kind, name = env_macros[m.group('cmd')]
+            used_commands.add(m.group('cmd'))
+        if kind and not in_body:
+            # Part of a macro definition (e.g. \newcommand{\listend}{\end{itemize}}), balanced where it is used
+            used_environments.add(name)
+        elif m.group('brace') == '{':
+            braces.append(m.start())
+        elif m.group('brace') == '}':
+            if braces:
+                braces.pop()
+            else:
+                problems.append(f"Unmatched '}}' on line {line_of(m.start())}")
+        elif kind == 'begin':
+            envs.append((name, m.start()))
+            used_environments.add(name)
+        elif kind == 'end':
+            if envs and envs[-1][0] == name:
+                envs.pop()
+            elif any(open_name == name for open_name, _ in envs):
+                # Close the environments left open inside this one
+                while envs[-1][0] != name:
+                    open_name, offset = envs.pop()
+                    problems.append(f'\\begin{{{open_name}}} on line {line_of(offset)} is never closed')
+                envs.pop()
+            else:
+                problems.append(f'\\end{{{name}}} on line {line_of(m.start())} has no matching \\begin')
+        elif m.group('cmd'):
+            used_commands.add(m.group('cmd'))
+
+    if braces:
+        problems.append(f"{len(braces)} unclosed '{{' (first on line {line_of(braces[0])})")
+    for name, offset in envs:
+        problems.append(f'\\begin{{{name}}} on line {line_of(offset)} is never closed')
+
+    # Custom macros/environments from the master that this document uses but no longer defines
+    if master_tex:
+        master_preamble, _ = split_preamble(master_tex)
+        missing = (used_commands & defined_commands(master_preamble)) - defined_commands(preamble)
+        for name in sorted(missing):
+            problems.append(f'\\{name} is used but not defined (defined in master preamble)')
+        missing = (used_environments & defined_environments(master_preamble)) - defined_environments(preamble)
+        for name in sorted(missing):
+            problems.append(f'Environment {name} is used but not defined (defined in master preamble)')
+
+    if len(problems) > MAX_REPORTED:
+        problems = problems[:MAX_REPORTED] + [f'... and {len(problems) - MAX_REPORTED} more']
+    return problems
+
+
+def repair_latex(latex, master_tex):
+    """Fix what can be fixed without guessing; returns (latex, list of repairs made)
+
+    A missing or incomplete preamble is replaced with the master's preamble
+    (variants are always derived from the master, so its packages and macros
+    are what the body expects). Truncated or unbalanced bodies are left alone
+    for validate_latex to reject.
+    """
+    repairs = []
+    master_preamble, master_body = split_preamble(master_tex or '')
+    preamble, body = split_preamble(latex)
+    if not body or not master_body:
+        return latex, repairs
+
+    needs_preamble = '\\documentclass' not in preamble
+    if not needs_preamble:
+        used = set(_USED_COMMAND.findall(body)) | set(_USED_ENVIRONMENT.findall(body))
+        missing = ((defined_commands(master_preamble) - defined_commands(preamble)) |
+                   (defined_environments(master_preamble) - defined_environments(preamble)))
+        needs_preamble = bool(used & missing)
+    if needs_preamble:
+        latex = master_preamble + body
+        repairs.append('Restored preamble from master CV')
+    return latex, repairs
+
+
+def preflight(latex, master_tex=None):
+    """Repair then validate; returns (latex, repairs, problems)"""
+    repairs = []
+    if master_tex:
+        latex, repairs = repair_latex(latex, master_tex)
+    return latex, repairs, validate_latex(latex, master_tex)
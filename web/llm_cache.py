@@ -0,0 +1,99 @@
+"""
+Persistent LLM response cache for Vibe CV Resume Builder
+Stores AI responses in SQLite keyed on a hash of everything that determines the output
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class LLMCache:
+    """SQLite-backed response cache with TTL and size-based (least recently used) eviction"""
+
+    def __init__(self, db_path, ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_responses_last_used ON llm_responses (last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    @staticmethod
+    def make_key(provider, model, temperature, system_prompt, user_prompt, max_tokens=4000):
+        """Hash of every input that determines the response"""
+        payload = json.dumps([provider, model, temperature, max_tokens, system_prompt, user_prompt])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None if missing/expired"""
+        return self.get_any([key])
+
+    def get_any(self, keys):
+        """Return the cached response of the first key that has one (counted as one hit or miss), or None"""
+        now = time.time()
+        row = None
+        with self._connect() as conn:
+            for key in keys:
+                row = conn.execute(
+                    "SELECT response FROM llm_responses WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+                    break
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key, response, kind=None, model=None):
+        """Store a response and evict expired / least recently used entries"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, kind, model, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, model, response, now, now)
+            )
+            conn.execute("DELETE FROM llm_responses WHERE created_at <= ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        """Return hit/miss counters for this process and the number of stored entries"""
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+            }
@@ -0,0 +1,305 @@
+"""
+Shared LLM client layer for Vibe CV Resume Builder
+One place for the OpenAI/Anthropic calls, with pooled per-process clients, timeouts and retries
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import nullcontext
+
+import anthropic
+import httpx
+import openai
+
+from rate_limit import estimate_tokens
+
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    anthropic.APIConnectionError,
+    anthropic.RateLimitError,
+    anthropic.InternalServerError,
+)
+
+DEFAULT_ANTHROPIC_MODEL = 'claude-3-sonnet-20240229'
+
+
+class LLMResponse:
+    """Text plus usage and timing of one completion"""
+
+    def __init__(self, text, provider, model, usage=None, latency=0.0, attempts=1):
+        self.text = text
+        self.provider = provider
+        self.model = model
+        self.usage = usage or {}
+        self.latency = latency
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f'<LLMResponse {self.provider}/{self.model} {len(self.text)} chars>'
+
+
+def _field(obj, name):
+    """Read a usage field from an SDK model or a plain dict (newer API fields arrive as extras)"""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _usage_dict(provider, usage):
+    """Normalise provider usage into input/output and prompt-cache read/write token counts"""
+    if usage is None:
+        return {}
+    if provider == 'openai':
+        details = _field(usage, 'prompt_tokens_details')
+        return {
+            'input_tokens': _field(usage, 'prompt_tokens') or 0,
+            'output_tokens': _field(usage, 'completion_tokens') or 0,
+            'cache_read_tokens': _field(details, 'cached_tokens') or 0,
+            'cache_write_tokens': 0,  # OpenAI caches prefixes implicitly and does not report writes
+        }
+    return {
+        'input_tokens': _field(usage, 'input_tokens') or 0,
+        'output_tokens': _field(usage, 'output_tokens') or 0,
+        'cache_read_tokens': _field(usage, 'cache_read_input_tokens') or 0,
+        'cache_write_tokens': _field(usage, 'cache_creation_input_tokens') or 0,
+    }
+
+
+class LLMClient:
+    """Blocking and asyncio access to one provider through reused, connection-pooled SDK clients
+
+    The SDK's own retries are disabled; failures that are worth retrying
+    (connection errors, timeouts, 429, 5xx) are retried here with full-jitter
+    exponential backoff. base_url lets tests point the client at a local fake server.
+    """
+
+    def __init__(self, provider, api_key, model, base_url=None, timeout=60.0, max_retries=3,
+                 backoff_base=0.5, backoff_cap=8.0, max_connections=20, limiter=None):
+        if provider not in ('openai', 'anthropic'):
+            raise ValueError(f'Unknown AI provider: {provider}')
+        self.provider = provider
+        self.api_key = api_key
+        self.model = model
+        if provider == 'anthropic' and not model.startswith('claude'):
+            self.model = DEFAULT_ANTHROPIC_MODEL
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_connections = max_connections
+        self.limiter = limiter
+
+        self._lock = threading.Lock()
+        self._sync = None
+        self._async = {}  # event loop -> (async SDK client, closer); httpx async pools are loop-bound
+
+    # -- client construction -------------------------------------------------
+
+    def _limits(self):
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def _sdk_kwargs(self, http_client):
+        kwargs = {'api_key': self.api_key, 'timeout': self.timeout, 'max_retries': 0, 'http_client': http_client}
+        if self.base_url:
+            kwargs['base_url'] = self.base_url
+        return kwargs
+
+    def sync_client(self):
+        """The process-wide blocking SDK client (created once, keeps connections alive)"""
+        with self._lock:
+            if self._sync is None:
+                http_client = httpx.Client(limits=self._limits(), timeout=self.timeout)
+                sdk = openai.OpenAI if self.provider == 'openai' else anthropic.Anthropic
+                self._sync = sdk(**self._sdk_kwargs(http_client))
+            return self._sync
+
+    async def async_client(self):
+        """The asyncio SDK client for the running event loop, closed when the loop shuts down"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Loops closed without shutting down their async generators can't close their client; drop it
+            for stale in [l for l in self._async if l.is_closed()]:
+                del self._async[stale]
+            entry = self._async.get(loop)
+            created = entry is None
+            if created:
+                http_client = httpx.AsyncClient(limits=self._limits(), timeout=self.timeout)
+                sdk = openai.AsyncOpenAI if self.provider == 'openai' else anthropic.AsyncAnthropic
+                client = sdk(**self._sdk_kwargs(http_client))
+                entry = self._async[loop] = (client, self._close_with_loop(loop, client))
+        if created:
+            # Starting the generator registers it with the loop; asyncio.run() finalizes it on shutdown
+            await entry[1].__anext__()
+        return entry[0]
+
+    async def _close_with_loop(self, loop, client):
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._async.get(loop, (None,))[0] is client:
+                    del self._async[loop]
+            await client.close()
+
+    # -- request building ----------------------------------------------------
+
+    def _request(self, system_prompt, user_prompt, temperature, max_tokens, stream=False, cache_prefix=False):
+        """SDK kwargs for one call
+
+        cache_prefix marks the system prompt as a cacheable prefix (Anthropic
+        cache_control). OpenAI caches long shared prefixes automatically, so
+        there it only matters that the stable text comes first.
+        """
+        if self.provider == 'openai':
+            kwargs = {
+                'model': self.model,
+                'messages': [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                'temperature': temperature,
+                'max_tokens': max_tokens
+            }
+        else:
+            system = system_prompt
+            if cache_prefix:
+                system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+            kwargs = {
+                'model': self.model,
+                'max_tokens': max_tokens,
+                'system': system,
+                'messages': [
+                    {"role": "user", "content": user_prompt}
+                ]
+            }
+        if stream:
+            kwargs['stream'] = True
+            if self.provider == 'openai':
+                # Ask for a final usage chunk (includes cached prompt tokens)
+                kwargs['extra_body'] = {'stream_options': {'include_usage': True}}
+        return kwargs
+
+    def _parse(self, response, latency, attempts):
+        if self.provider == 'openai':
+            text = response.choices[0].message.content or ''
+        else:
+            text = response.content[0].text if response.content else ''
+        return LLMResponse(text.strip(), self.provider, self.model,
+                           usage=_usage_dict(self.provider, getattr(response, 'usage', None)),
+                           latency=latency, attempts=attempts)
+
+    def _create(self, client, kwargs):
+        if self.provider == 'openai':
+            return client.chat.completions.create(**kwargs)
+        return client.messages.create(**kwargs)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _limit(self, system_prompt, user_prompt, max_tokens):
+        if not self.limiter:
+            return nullcontext()
+        return self.limiter.limit(self.provider, estimate_tokens(system_prompt + user_prompt) + max_tokens)
+
+    # -- public API ----------------------------------------------------------
+
+    def complete(self, system_prompt, user_prompt, temperature=0.7, max_tokens=4000, cache_prefix=False):
+        """Blocking completion with retries; returns an LLMResponse"""
+        kwargs = self._request(system_prompt, user_prompt, temperature, max_tokens, cache_prefix=cache_prefix)
+        client = self.sync_client()
+        start = time.monotonic()
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._limit(system_prompt, user_prompt, max_tokens):
+                    response = self._create(client, kwargs)
+                return self._parse(response, time.monotonic() - start, attempt + 1)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"⚠️ {self.provider} call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    async def acomplete(self, system_prompt, user_prompt, temperature=0.7, max_tokens=4000, cache_prefix=False):
+        """asyncio completion with retries; returns an LLMResponse
+
+        The rate limiter is thread-based, so it is not applied here.
+        """
+        kwargs = self._request(system_prompt, user_prompt, temperature, max_tokens, cache_prefix=cache_prefix)
+        client = await self.async_client()
+        start = time.monotonic()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._create(client, kwargs)
+                return self._parse(response, time.monotonic() - start, attempt + 1)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"⚠️ {self.provider} call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def stream(self, system_prompt, user_prompt, temperature=0.7, max_tokens=4000, cache_prefix=False, usage=None):
+        """Yield text chunks as they are generated
+
+        If a dict is passed as usage it is filled with the token counts once
+        the provider reports them. Connection setup is retried; once the first
+        chunk has been yielded a failure is raised to the caller, since output
+        cannot be taken back.
+        """
+        kwargs = self._request(system_prompt, user_prompt, temperature, max_tokens, stream=True, cache_prefix=cache_prefix)
+        client = self.sync_client()
+        with self._limit(system_prompt, user_prompt, max_tokens):
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    for event in self._create(client, kwargs):
+                        text = None
+                        if self.provider == 'openai':
+                            if event.choices:
+                                text = event.choices[0].delta.content
+                            if usage is not None and getattr(event, 'usage', None):
+                                usage.update(_usage_dict('openai', event.usage))
+                        elif event.type == 'content_block_delta':
+                            text = getattr(event.delta, 'text', None)
+                        elif usage is not None and event.type == 'message_start':
+                            usage.update(_usage_dict('anthropic', event.message.usage))
+                        elif usage is not None and event.type == 'message_delta':
+                            usage['output_tokens'] = _field(event.usage, 'output_tokens') or 0
+                        if text:
+                            started = True
+                            yield text
+                    return
+                except RETRYABLE_ERRORS as e:
+                    if started or attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    print(f"⚠️ {self.provider} stream failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+    def close(self):
+        with self._lock:
+            if self._sync is not None:
+                self._sync.close()
+                self._sync = None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(provider, **kwargs):
+    """Return the shared LLMClient for provider and these settings, creating it on first use"""
+    key = (provider, tuple(sorted(kwargs.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = LLMClient(provider, **kwargs)
+            _clients[key] = client
+        return client
@@ -0,0 +1,352 @@
+"""
+Multi-provider LLM routing for Vibe CV Resume Builder
+Per-provider circuit breakers and latency histograms, with hedged requests to a second provider when the first is slow
+"""
+import bisect
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from llm_client import RETRYABLE_ERRORS
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 45, 60, 90, 120, 180)
+# Hedge delay used until a provider has MIN_SAMPLES latencies, and the floor for the learned p95
+DEFAULT_HEDGE_DELAY = 10.0
+MIN_HEDGE_DELAY = 1.0
+MIN_SAMPLES = 20
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts (for reporting) plus a window of recent samples (for quantiles)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=200):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+            self._recent.append(seconds)
+
+    def quantile(self, q, min_samples=MIN_SAMPLES):
+        """q-quantile of the recent window, or None with fewer than min_samples samples"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self):
+        p50, p95 = self.quantile(0.5, 1), self.quantile(0.95, 1)
+        with self._lock:
+            return {
+                'count': self.count,
+                'sum': round(self.sum, 3),
+                'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+                'p50': round(p50, 3) if p50 is not None else None,
+                'p95': round(p95, 3) if p95 is not None else None
+            }
+
+
+class CircuitBreaker:
+    """Stops sending requests to a provider after failure_threshold consecutive failures
+
+    After reset_timeout seconds one trial request is let through (half-open):
+    success closes the breaker again, failure re-opens it for another period.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a request may be sent now (claims the trial slot when half-open)"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def is_open(self):
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class LLMRouter:
+    """Sends each call to the preferred healthy provider and hedges slow ones to the next
+
+    clients are LLMClients in order of preference. A provider whose breaker
+    is open is skipped (fail-over). If the chosen provider has not answered
+    (complete) or produced its first chunk (stream) after the hedge delay -
+    fixed, or its recent p95 - the same request goes to the next healthy
+    provider and whichever finishes first wins; a failure before any output
+    fails over straight away. The losing request runs to completion in the
+    background (blocking SDK calls cannot be cancelled) and only feeds the
+    latency histogram. Exposes complete() and stream() like LLMClient.
+    """
+
+    def __init__(self, clients, hedge_delay=None, failure_threshold=5, reset_timeout=30, max_workers=32):
+        self.clients = list(clients)
+        self.hedge_delay = hedge_delay
+        self.breakers = {c.provider: CircuitBreaker(failure_threshold, reset_timeout) for c in self.clients}
+        self.latency = {c.provider: LatencyHistogram() for c in self.clients}
+        self.first_chunk = {c.provider: LatencyHistogram() for c in self.clients}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-router')
+
+    @property
+    def provider(self):
+        return self.clients[0].provider
+
+    @property
+    def model(self):
+        return self.clients[0].model
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _next_client(self, used):
+        """Next provider in preference order whose breaker lets a request through"""
+        for client in self.clients:
+            if client not in used and self.breakers[client.provider].allow():
+                return client
+        return None
+
+    def _first_client(self):
+        # With every breaker open, still try the preferred provider rather than fail without a request
+        return self._next_client(()) or self.clients[0]
+
+    def _delay(self, histogram, client):
+        if self.hedge_delay:
+            return self.hedge_delay
+        p95 = histogram[client.provider].quantile(0.95)
+        return max(MIN_HEDGE_DELAY, p95) if p95 is not None else DEFAULT_HEDGE_DELAY
+
+    def _record(self, client, error=None):
+        # Only outages count against a provider; e.g. a 400 means it is up and answering
+        if error is None or not isinstance(error, RETRYABLE_ERRORS):
+            self.breakers[client.provider].record_success()
+        else:
+            self.breakers[client.provider].record_failure()
+
+    def _complete_one(self, client, args, kwargs):
+        start = time.monotonic()
+        try:
+            response = client.complete(*args, **kwargs)
+        except Exception as e:
+            self._record(client, e)
+            raise
+        self._record(client)
+        self.latency[client.provider].observe(time.monotonic() - start)
+        return response
+
+    def complete(self, system_prompt, user_prompt, **kwargs):
+        """Blocking completion from the first provider to answer; returns an LLMResponse"""
+        args = (system_prompt, user_prompt)
+        primary = self._first_client()
+        used = [primary]
+        futures = {self._pool.submit(self._complete_one, primary, args, kwargs): primary}
+        deadline = time.monotonic() + self._delay(self.latency, primary)
+        hedged = len(self.clients) < 2
+        errors = []
+
+        while futures:
+            timeout = None if hedged else max(0, deadline - time.monotonic())
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                client = futures.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    print(f"⚠️ {client.provider} call failed: {type(e).__name__}: {e}")
+                    errors.append(e)
+                    continue
+                if client is not primary and hedged and not errors:
+                    self._count('hedge_wins')
+                return response
+
+            if not hedged:
+                # Slow (no result yet) or failed (nothing left running): bring in the next provider
+                hedged = True
+                secondary = self._next_client(used)
+                if secondary:
+                    used.append(secondary)
+                    self._count('failovers' if errors else 'hedges')
+                    print(f"🔀 {'Failing over' if errors else 'Hedging'} {primary.provider} -> {secondary.provider}")
+                    futures[self._pool.submit(self._complete_one, secondary, args, kwargs)] = secondary
+        raise errors[0]
+
+    def _pump(self, client, args, kwargs, events, stop):
+        """Run one provider's stream in a pool thread, forwarding (client, kind, value) events"""
+        usage = {}
+        start = time.monotonic()
+        first = True
+        chunks = client.stream(*args, usage=usage, **kwargs)
+        try:
+            for text in chunks:
+                if stop.is_set():
+                    return
+                if first:
+                    self.first_chunk[client.provider].observe(time.monotonic() - start)
+                    first = False
+                events.put((client, 'chunk', text))
+        except Exception as e:
+            self._record(client, e)
+            events.put((client, 'error', e))
+            return
+        finally:
+            chunks.close()
+        self._record(client)
+        self.latency[client.provider].observe(time.monotonic() - start)
+        events.put((client, 'done', usage))
+
+    def stream(self, system_prompt, user_prompt, usage=None, **kwargs):
+        """Yield text chunks from the first provider to start producing output
+
+        If a dict is passed as usage it is filled with the winner's token counts
+        plus 'provider' and 'model'. Once a provider has yielded output the
+        stream stays with it, and a later failure is raised to the caller.
+        """
+        args = (system_prompt, user_prompt)
+        events = queue.Queue()
+        stops = {}
+
+        def start(client):
+            stops[client] = threading.Event()
+            self._pool.submit(self._pump, client, args, kwargs, events, stops[client])
+
+        primary = self._first_client()
+        start(primary)
+        deadline = time.monotonic() + self._delay(self.first_chunk, primary)
+        hedged = len(self.clients) < 2
+        running = 1
+        winner = None
+        errors = []
+
+        try:
+            while True:
+                timeout = None if hedged or winner else max(0, deadline - time.monotonic())
+                try:
+                    client, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    client, kind, value = None, 'slow', None
+
+                if kind == 'error' and client is not winner:
+                    print(f"⚠️ {client.provider} stream failed: {type(value).__name__}: {value}")
+                    errors.append(value)
+                    running -= 1
+                if kind in ('slow', 'error') and winner is None:
+                    if not hedged:
+                        hedged = True
+                        secondary = self._next_client(list(stops))
+                        if secondary:
+                            self._count('failovers' if errors else 'hedges')
+                            print(f"🔀 {'Failing over' if errors else 'Hedging'} {primary.provider} -> {secondary.provider} (stream)")
+                            start(secondary)
+                            running += 1
+                    if not running:
+                        raise errors[0]
+                    continue
+
+                if winner is None:
+                    winner = client
+                    if client is not primary and not errors:
+                        self._count('hedge_wins')
+                    for other, stop in stops.items():
+                        if other is not winner:
+                            stop.set()
+                if client is not winner:
+                    continue
+                if kind == 'chunk':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:  # done
+                    if usage is not None:
+                        usage.update(value, provider=client.provider, model=client.model)
+                    return
+        finally:
+            for stop in stops.values():
+                stop.set()
+
+    def stats(self):
+        """Breaker state, latency histograms and hedge counters per provider"""
+        providers = {}
+        for client in self.clients:
+            breaker = self.breakers[client.provider]
+            providers[client.provider] = {
+                'model': client.model,
+                'breaker': breaker.state,
+                'consecutive_failures': breaker.failures,
+                'breaker_trips': breaker.trips,
+                'latency': self.latency[client.provider].stats(),
+                'first_chunk': self.first_chunk[client.provider].stats(),
+                'hedge_delay': round(self._delay(self.latency, client), 3),
+                'stream_hedge_delay': round(self._delay(self.first_chunk, client), 3)
+            }
+        return {
+            'providers': providers,
+            'order': [c.provider for c in self.clients],
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'failovers': self.failovers
+        }
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def get_llm_router(clients, **kwargs):
+    """Return the shared LLMRouter for this provider order, creating it on first use"""
+    key = tuple(c.provider for c in clients)
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = LLMRouter(clients, **kwargs)
+            _routers[key] = router
+        return router
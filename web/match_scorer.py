@@ -0,0 +1,142 @@
+"""
+Local CV/job description match scorer for Vibe CV Resume Builder
+Deterministic, offline BM25-style keyword coverage score - no LLM call needed
+"""
+import math
+import re
+
+import numpy as np
+
+# Terms that say the most about fit get extra weight
+SKILL_TERMS = {
+    'sql', 'python', 'java', 'javascript', 'typescript', 'c#', 'c++', 'go', 'kotlin', 'php', 'r',
+    'spring', 'spring boot', 'hibernate', 'react', 'angular', 'vue', 'node.js', '.net',
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'kafka', 'redis', 'oracle', 'mysql', 'postgresql',
+    'mongodb', 'rest', 'api', 'microservices', 'git', 'linux', 'etl', 'power bi', 'tableau', 'excel',
+    'jira', 'confluence', 'visio', 'axure', 'balsamiq', 'figma', 'uml', 'bpmn', 'erd', 'postman',
+    'agile', 'scrum', 'kanban', 'waterfall', 'brd', 'brs', 'srs', 'frd', 'use case', 'user story',
+    'user stories', 'wireframe', 'wireframes', 'prototype', 'prototypes', 'uat', 'testing',
+    'business analysis', 'requirements', 'data analysis', 'machine learning', 'fintech', 'banking',
+    'securities', 'payment', 'e-payment', 'lending', 'insurance', 'core banking', 'credit',
+}
+SENIORITY_TERMS = {
+    'intern', 'internship', 'fresher', 'junior', 'middle', 'mid', 'senior', 'lead', 'principal',
+    'manager', 'head', 'director', 'architect', 'years', 'year',
+}
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is', 'it',
+    'its', 'of', 'on', 'or', 'that', 'the', 'their', 'this', 'to', 'was', 'we', 'will', 'with', 'you',
+    'your', 'our', 'all', 'any', 'can', 'into', 'other', 'such', 'than', 'who', 'within', 'etc',
+    'able', 'ability', 'strong', 'good', 'work', 'working', 'team', 'experience', 'knowledge', 'skills',
+}
+SKILL_WEIGHT = 3.0
+SENIORITY_WEIGHT = 2.0
+OTHER_WEIGHT = 0.5
+
+_LATEX_COMMAND = re.compile(r'\\[A-Za-z@]+\*?')
+_LATEX_SYMBOL = re.compile(r'[{}\[\]$~^\\]')
+_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]')
+
+
+def tokenize(text):
+    """Lowercased unigrams + bigrams, with LaTeX commands and stopwords removed"""
+    text = _LATEX_COMMAND.sub(' ', text or '')
+    text = _LATEX_SYMBOL.sub(' ', text).lower()
+    words = [w for w in _TOKEN.findall(text) if w not in STOPWORDS and (len(w) > 2 or w in SKILL_TERMS)]
+    bigrams = [f'{a} {b}' for a, b in zip(words, words[1:])]
+    # Only keep bigrams that name a known skill; arbitrary word pairs are mostly noise
+    return words + [bg for bg in bigrams if bg in SKILL_TERMS]
+
+
+def term_weight(term):
+    if term in SKILL_TERMS:
+        return SKILL_WEIGHT
+    if term in SENIORITY_TERMS:
+        return SENIORITY_WEIGHT
+    return OTHER_WEIGHT
+
+
+class MatchScorer:
+    """Scores how well a CV covers the (weighted, BM25-saturated) terms of job descriptions
+
+    For every job description term t:
+        q(t) = idf(t) * weight(t) * tf_jd(t) * (k1 + 1) / (tf_jd(t) + k1 * (1 - b + b * len_jd / avg_len_jd))
+    and the coverage is sum(q(t) * cv(t)) / sum(q(t)) where cv(t) = tf_cv / (tf_cv + 0.5)
+    is a saturated measure of how much evidence for t the CV contains. The
+    score is 100 * sqrt(coverage), which spreads typical coverages (0.2-0.6)
+    over roughly the same range the LLM reports. IDF is computed over the
+    batch of job descriptions, so terms that appear in every JD (boilerplate)
+    count less when scoring many at once.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, cv_text, jd_text):
+        """Score one CV against one job description (0-100)"""
+        return int(self.score_many(cv_text, [jd_text])[0])
+
+    def score_many(self, cv_text, jd_texts):
+        """Score one CV against many job descriptions at once; returns an int array (0-100)"""
+        if not jd_texts:
+            return np.zeros(0, dtype=int)
+
+        # Build a sparse (doc, term, tf) representation of the job descriptions
+        vocab = {}
+        doc_idx, term_idx, tfs, doc_len = [], [], [], []
+        for d, jd in enumerate(jd_texts):
+            tokens = tokenize(jd)
+            doc_len.append(len(tokens))
+            counts = {}
+            for t in tokens:
+                counts[t] = counts.get(t, 0) + 1
+            for t, tf in counts.items():
+                doc_idx.append(d)
+                term_idx.append(vocab.setdefault(t, len(vocab)))
+                tfs.append(tf)
+
+        n_docs = len(jd_texts)
+        doc_idx = np.asarray(doc_idx, dtype=np.int64)
+        term_idx = np.asarray(term_idx, dtype=np.int64)
+        tfs = np.asarray(tfs, dtype=np.float64)
+        doc_len = np.asarray(doc_len, dtype=np.float64)
+        if not len(term_idx):
+            return np.zeros(n_docs, dtype=int)
+
+        # Per-term statistics
+        terms = list(vocab)
+        weights = np.fromiter((term_weight(t) for t in terms), dtype=np.float64, count=len(terms))
+        df = np.bincount(term_idx, minlength=len(terms)).astype(np.float64)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        cv_counts = {}
+        for t in tokenize(cv_text):
+            if t in vocab:
+                cv_counts[vocab[t]] = cv_counts.get(vocab[t], 0) + 1
+        cv_tf = np.zeros(len(terms), dtype=np.float64)
+        if cv_counts:
+            cv_tf[list(cv_counts)] = list(cv_counts.values())
+        cv_evidence = cv_tf / (cv_tf + 0.5)
+
+        # BM25-saturated query weights for every (doc, term) pair
+        avg_len = doc_len.mean() or 1.0
+        norm = self.k1 * (1 - self.b + self.b * doc_len[doc_idx] / avg_len)
+        q = idf[term_idx] * weights[term_idx] * tfs * (self.k1 + 1) / (tfs + norm)
+
+        total = np.bincount(doc_idx, weights=q, minlength=n_docs)
+        covered = np.bincount(doc_idx, weights=q * cv_evidence[term_idx], minlength=n_docs)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.where(total > 0, covered / total, 0.0)
+        return np.clip(np.rint(np.sqrt(ratio) * 100), 0, 100).astype(int)
+
+
+def top_terms_missing(cv_text, jd_text, limit=10):
+    """Highest-weighted job description terms the CV never mentions (for triage hints)"""
+    cv_terms = set(tokenize(cv_text))
+    counts = {}
+    for t in tokenize(jd_text):
+        if t not in cv_terms:
+            counts[t] = counts.get(t, 0) + 1
+    ranked = sorted(counts, key=lambda t: (-term_weight(t) * math.log1p(counts[t]), t))
+    return ranked[:limit]
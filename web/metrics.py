@@ -0,0 +1,286 @@
+"""
+Prometheus metrics for Vibe CV Resume Builder
+Counters, gauges and histograms kept in process and rendered in the text exposition format, with worker processes sharing them through METRICS_DIR
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds: LLM calls, compiles, HTTP requests
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+# Seconds: single database statements
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+# Tokens per LLM call
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.registry = registry
+        self._values = {}  # tuple of label values -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        if self.registry is not None:
+            self.registry.ensure_flusher()
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {'type': self.kind, 'help': self.help, 'labels': list(self.labelnames), 'values': values}
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (in-flight requests, queue depths)"""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Bucketed observations; a value is [count per bucket (last one +Inf), sum]"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), registry=None, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), [list(counts), total]] for key, (counts, total) in self._values.items()]
+        return {'type': self.kind, 'help': self.help, 'labels': list(self.labelnames),
+                'buckets': list(self.buckets), 'values': values}
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots):
+    """Combine {name: metric snapshot} dicts from several processes
+
+    Counters and histograms are summed, including those of processes that
+    have exited, so totals never go backwards when a worker is replaced.
+    Gauges are summed over the snapshots marked live only.
+    """
+    merged = {}
+    for snapshot, live in snapshots:
+        for name, metric in snapshot.items():
+            if metric['type'] == 'gauge' and not live:
+                continue
+            target = merged.setdefault(name, {**metric, 'values': {}})
+            for key, value in metric['values']:
+                key = tuple(key)
+                current = target['values'].get(key)
+                if metric['type'] == 'histogram':
+                    if current is None or len(current[0]) != len(value[0]):
+                        target['values'][key] = [list(value[0]), value[1]]
+                    else:
+                        target['values'][key] = [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1]]
+                else:
+                    target['values'][key] = (current or 0) + value
+    for metric in merged.values():
+        metric['values'] = [[list(key), value] for key, value in metric['values'].items()]
+    return merged
+
+
+def render(snapshot):
+    """Prometheus text exposition of a (merged) snapshot"""
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key, value in sorted(metric['values']):
+            pairs = list(zip(metric['labels'], key))
+            if metric['type'] != 'histogram':
+                lines.append(f'{name}{_labels(pairs)} {_number(value)}')
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(list(metric['buckets']) + [float('inf')], counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(pairs + [('le', _number(bound))])} {cumulative}")
+            lines.append(f'{name}_sum{_labels(pairs)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(pairs)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsRegistry:
+    """Named metrics of this process, plus collectors that set gauges just before a scrape
+
+    With a directory, every process that records something writes its snapshot
+    to <directory>/<pid>.json (every flush_interval seconds, on scrape and at
+    exit) and a scrape served by any of them merges all files. Clear the
+    directory when the server is restarted as a whole, not when single workers are.
+    """
+
+    def __init__(self, directory=None, flush_interval=5):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._after_fork)
+            atexit.register(self._flush_at_exit)
+
+    def _register(self, cls, name, help, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labels, registry=self, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labels):
+                raise ValueError(f'Metric {name} is already registered differently')
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def add_collector(self, fn):
+        """Call fn() before every snapshot (e.g. to copy queue depths into gauges)"""
+        self._collectors.append(fn)
+        return fn
+
+    def snapshot(self):
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"⚠️ Metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def _after_fork(self):
+        # A forked worker starts from zero; its parent's counts stay in the parent's file
+        self._lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric._reset()
+        self._flusher_pid = None
+
+    def ensure_flusher(self):
+        """Start this process's background flusher (no-op without a directory or if already running)"""
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name='vibe-metrics', daemon=True).start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _flush_at_exit(self):
+        if self._flusher_pid == os.getpid():
+            self.flush()
+
+    def flush(self):
+        """Write this process's snapshot to its file"""
+        if not self.directory:
+            return
+        path = self.directory / f'{os.getpid()}.json'
+        partial = path.with_suffix(f'.tmp{threading.get_ident()}')
+        try:
+            partial.write_text(json.dumps({'pid': os.getpid(), 'metrics': self.snapshot()}))
+            os.replace(partial, path)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics to {path}: {e}")
+
+    def render(self):
+        """Prometheus text for this process, or for all processes sharing the directory"""
+        if not self.directory:
+            return render(self.snapshot())
+        self.ensure_flusher()
+        self.flush()
+        snapshots = []
+        for path in self.directory.glob('*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # being replaced, or removed by a restart
+            snapshots.append((data['metrics'], data['pid'] == os.getpid() or _pid_alive(data['pid'])))
+        return render(merge(snapshots))
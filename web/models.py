@@ -3,6 +3,7 @@ Database models for Vibe CV Resume Builder
 """
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+import json
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -40,7 +41,10 @@ class CVMaster(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
-    latex_content = db.Column(db.Text, nullable=False)
+    latex_content = db.Column(db.Text, nullable=False)  # '' once the document lives in blobs
+    content_hash = db.Column(db.String(64), index=True)  # blobs.hash of the LaTeX document
+    file_hash = db.Column(db.String(64), index=True)  # sha256 of the uploaded file (re-upload cache)
+    text_hash = db.Column(db.String(64), index=True)  # text_fingerprint() of its extracted text
     original_filename = db.Column(db.String(255))
     version = db.Column(db.Integer, default=1)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -62,13 +66,107 @@ class CVVariant(db.Model):
     job_description = db.Column(db.Text)
     match_score = db.Column(db.Integer, nullable=True)  # AI match percentage (0-100)
     has_tex = db.Column(db.Boolean, default=False)
+    tex_hash = db.Column(db.String(64), index=True)  # blobs.hash of main.tex
     has_pdf = db.Column(db.Boolean, default=False)
+    has_job_desc = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Add unique constraint
     __table_args__ = (
         db.UniqueConstraint('user_id', 'folder_name', name='_user_folder_uc'),
+        # Keyset pagination of a user's variants, newest first
+        db.Index('ix_cv_variants_user_created', 'user_id', 'created_at', 'id'),
     )
     
+    def to_list_item(self):
+        """Listing entry built from columns only (no filesystem access)"""
+        return {
+            'folder': self.folder_name,
+            'company': self.company or self.folder_name,
+            'role': self.role,
+            'has_tex': bool(self.has_tex),
+            'has_pdf': bool(self.has_pdf),
+            'has_job_desc': bool(self.has_job_desc),
+            'match_score': self.match_score,
+            'created': self.created_at.strftime('%Y-%m-%d') if self.created_at else None
+        }
+    
     def __repr__(self):
         return f'<CVVariant {self.folder_name} user_id={self.user_id}>'
+
+
+class Job(db.Model):
+    """Background job (e.g. AI optimize -> write -> compile for a variant)"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    variant_id = db.Column(db.Integer, db.ForeignKey('cv_variants.id', ondelete='SET NULL'), nullable=True, index=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, succeeded, failed
+    stage = db.Column(db.String(50))  # stage currently running (or last one run)
+    progress = db.Column(db.Text, default='[]')  # JSON list of finished stages
+    output = db.Column(db.Text)  # AI output streamed so far
+    result = db.Column(db.Text)  # JSON result once succeeded
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+    
+    def get_progress(self):
+        return json.loads(self.progress or '[]')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.get_progress(),
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+
+class LLMCall(db.Model):
+    """One AI provider call with its token usage (including prompt-cache reads/writes)"""
+    __tablename__ = 'llm_calls'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), index=True)  # optimize, convert, ...
+    provider = db.Column(db.String(50))
+    model = db.Column(db.String(100))
+    input_tokens = db.Column(db.Integer, default=0)
+    output_tokens = db.Column(db.Integer, default=0)
+    cache_read_tokens = db.Column(db.Integer, default=0)
+    cache_write_tokens = db.Column(db.Integer, default=0)
+    raw_input_tokens = db.Column(db.Integer)  # estimated input before the prompt was minimized (prompt_budget.py)
+    latency_ms = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<LLMCall {self.kind} {self.provider}/{self.model}>'
+
+
+class Blob(db.Model):
+    """Compressed, content-addressed document (see blob_store.py)"""
+    __tablename__ = 'blobs'
+    
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 of the uncompressed text
+    codec = db.Column(db.String(16), nullable=False)  # zstd, zlib or raw
+    base_hash = db.Column(db.String(64), index=True)  # compressed against this blob's text, if set
+    data = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    stored_size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Blob {self.hash[:12]} {self.codec} {self.stored_size}/{self.size}>'
@@ -0,0 +1,181 @@
+"""
+Prompt token budget for Vibe CV Resume Builder
+Shrinks the master CV and job description before they are sent to the AI (comments, whitespace, preamble, JD boilerplate)
+"""
+import re
+
+from latex_validator import defined_commands, defined_environments, split_preamble
+
+# Environments whose contents are printed as typed - left exactly as they are
+_VERBATIM = re.compile(r'(\\begin\{(verbatim\*?|lstlisting|minted|comment)\}.*?\\end\{\2\})', re.DOTALL)
+# % not escaped by a backslash (\% is a literal percent sign, \\% is a line break then a comment)
+_COMMENT = re.compile(r'(?<!\\)((?:\\\\)*)%.*$')
+# % inside \url{...} / the first argument of \href{...} is part of the URL
+_URL = re.compile(r'\\(?:url|href)\s*\{[^{}]*\}')
+_SPACES = re.compile(r'[ \t]+')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+_DOCUMENTCLASS = re.compile(r'\\documentclass\s*(\[[^\]]*\])?\s*\{[^{}]*\}')
+_USEPACKAGE = re.compile(r'\\usepackage\s*(?:\[[^\]]*\])?\s*\{([^{}]*)\}')
+
+# Headings of job-description parts that say nothing about the role (English and Vietnamese)
+JD_BOILERPLATE_HEADINGS = (
+    r"((our|employee) )?(benefits|perks)( (and|&) (benefits|perks))?|what we offer|"
+    r"what'?s in it for you|(here'?s a taste of )?what'?s on offer|where (and how )?you('ll| can| will)? work|why (join|work with) us|compensation( (and|&) benefits)?|"
+    r"about (us|the company|our company)|who we are|our (mission|story|values|culture)|life at .+|"
+    r"working (time|hours)( (and|&) location)?|work(ing)? location|location|"
+    r"how to apply|application process|contact( us| information)?|equal (employment )?opportunity|eeo( statement)?|privacy notice|"
+    r"quyền lợi|phúc lợi|chế độ( đãi ngộ| phúc lợi)?|đãi ngộ|thu nhập|về chúng tôi|giới thiệu công ty|"
+    r"thời gian làm việc|địa điểm làm việc|cách thức ứng tuyển|hồ sơ( ứng tuyển)?"
+)
+# Headings of the parts that describe the role; only these (or another boilerplate heading) end a skipped section
+JD_SECTION_HEADINGS = (
+    r"((the|your|key|main|core|primary|job|role) )*(role|position|job|opportunity|responsibilit(y|ies)|duties|tasks|"
+    r"requirements?|qualifications?|skills?|experience|description|overview|summary|profile)"
+    r"( (and|&|/) [\w ]+)?( \(.*\))?|"
+    r"about (the|this|your) (role|job|position|group|team|opportunity)( .*)?|(the|your) team|"
+    r"what you('d|'ll| will| would)( be)? (do|doing|bring|need|work on)( .*)?|what we('re| are) looking for|"
+    r"who you are|you('re| are) (probably )?a (good |great )?(match|fit)( .*)?|"
+    r"must[- ]haves?|nice[- ]to[- ]haves?|bonus points|"
+    r"(preferred|required|minimum|basic|technical) (qualifications|skills|experience)|tech(nical)? stack|"
+    r"mô tả công việc|yêu cầu( công việc| ứng viên)?|trách nhiệm( công việc)?|nhiệm vụ|kỹ năng|kinh nghiệm|vị trí"
+)
+# Paragraphs dropped wherever they appear: EEO statements, hiring-process notes, job-board chrome
+JD_BOILERPLATE_PARAGRAPHS = (
+    r'equal (employment )?opportunit|regardless of (race|gender|age|religion|sex)|without regard to|'
+    r'reasonable (adjustments?|accommodations?)|pronouns you use|interviews? (are|will be) (conducted|held)|'
+    r'hiring (process|experience|decisions?)|recruitment partner|only shortlisted|privacy (policy|notice)|'
+    r'personal data|background check|e-verify|how do you compare|'
+    r'mức độ phù hợp và xếp hạng|chỉ liên hệ (những )?ứng viên|nộp hồ sơ'
+)
+_JD_BOILERPLATE_HEADING = re.compile(rf'(?:{JD_BOILERPLATE_HEADINGS})', re.IGNORECASE)
+_JD_SECTION_HEADING = re.compile(rf'(?:{JD_SECTION_HEADINGS})', re.IGNORECASE)
+_JD_BOILERPLATE_PARAGRAPH = re.compile(JD_BOILERPLATE_PARAGRAPHS, re.IGNORECASE)
+_JD_DECORATION = re.compile(r'^[\s#*_>]+|[\s#*_:?]+$')
+_JD_RULE = re.compile(r'^\s*([-*_=])\1{2,}\s*$')
+_JD_BULLET = re.compile(r'^\s*([•\-*–·▪●]|\d+[.)])\s')
+MAX_JD_HEADING_WORDS = 8
+# Below this much text left after filtering, the filter is assumed to have misfired
+MIN_JD_CHARS = 200
+
+
+def strip_latex_comments(latex):
+    """Remove % comments; a comment-only line disappears, a line-end % that glues lines together is kept"""
+    lines = []
+    for line in latex.split('\n'):
+        if '%' not in line:
+            lines.append(line)
+            continue
+        urls = []
+
+        def hide(match):
+            urls.append(match.group(0))
+            return f'\x00{len(urls) - 1}\x00'
+
+        hidden = _URL.sub(hide, line)
+        m = _COMMENT.search(hidden)
+        if m is None:
+            lines.append(line)
+            continue
+        code = hidden[:m.start()] + m.group(1)
+        if not code.strip():
+            continue
+        if not code[-1].isspace():
+            code += '%'  # "...{%" suppresses the end-of-line space; keep that meaning
+        lines.append(re.sub(r'\x00(\d+)\x00', lambda u: urls[int(u.group(1))], code.rstrip()))
+    return '\n'.join(lines)
+
+
+def collapse_latex_whitespace(latex):
+    """Drop indentation and trailing spaces, squeeze runs of spaces and of blank lines (TeX ignores all of it)"""
+    latex = '\n'.join(_SPACES.sub(' ', line).strip() for line in latex.split('\n'))
+    return _BLANK_LINES.sub('\n\n', latex).strip()
+
+
+def minify_latex(latex):
+    """LaTeX with comments and insignificant whitespace removed; verbatim-like environments are untouched"""
+    parts = _VERBATIM.split(latex)
+    out = []
+    # split() with two groups yields: text, whole verbatim block, env name, text, ...
+    for i in range(0, len(parts), 3):
+        out.append(collapse_latex_whitespace(strip_latex_comments(parts[i])))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return '\n'.join(part for part in out if part)
+
+
+def preamble_summary(preamble):
+    """A few lines describing a preamble (class, packages, macros) that stand in for it in a prompt"""
+    preamble = strip_latex_comments(preamble)
+    lines = []
+    documentclass = _DOCUMENTCLASS.search(preamble)
+    if documentclass:
+        lines.append(documentclass.group(0))
+    packages = [p.strip() for group in _USEPACKAGE.findall(preamble) for p in group.split(',') if p.strip()]
+    if packages:
+        lines.append('Packages: ' + ', '.join(dict.fromkeys(packages)))
+    commands = sorted(defined_commands(preamble))
+    if commands:
+        lines.append('Commands: ' + ', '.join(f'\\{name}' for name in commands))
+    environments = sorted(defined_environments(preamble))
+    if environments:
+        lines.append('Environments: ' + ', '.join(environments))
+    return '\n'.join(lines)
+
+
+def restore_preamble(latex, preamble):
+    """Put the server-side preamble back in front of an AI response that left it out"""
+    if '\\documentclass' in latex or '\\documentclass' not in preamble:
+        return latex
+    body = latex.strip()
+    if '\\begin{document}' not in body:
+        body = f'\\begin{{document}}\n{body}\n\\end{{document}}'
+    return f'{preamble.rstrip()}\n\n{body}\n'
+
+
+def _jd_heading(line):
+    """The line's text if it looks like a job-description heading, else None"""
+    if _JD_BULLET.match(line):
+        return None
+    title = _JD_DECORATION.sub('', line).replace('\u2019', "'")
+    if not title or title.endswith('.') or len(title.split()) > MAX_JD_HEADING_WORDS:
+        return None
+    return title
+
+
+def strip_jd_boilerplate(text):
+    """Job description without benefits/about-us/how-to-apply sections, EEO and hiring-process paragraphs
+
+    A boilerplate heading drops everything up to the next known role heading
+    (Responsibilities, Requirements, ...) or boilerplate heading; short lines
+    in between such as "Competitive salary" look like headings but do not end it. Whitespace
+    and blank lines are collapsed as well. If the filter would leave almost nothing, the
+    description is only whitespace-collapsed instead.
+    """
+    kept = []
+    skipping = False
+    for line in text.split('\n'):
+        line = _SPACES.sub(' ', line).strip()
+        if _JD_RULE.match(line):
+            continue
+        heading = _jd_heading(line)
+        if heading and _JD_BOILERPLATE_HEADING.fullmatch(heading):
+            skipping = True
+        elif heading and _JD_SECTION_HEADING.fullmatch(heading):
+            skipping = False
+        if skipping or (line and _JD_BOILERPLATE_PARAGRAPH.search(line)):
+            continue
+        if line:
+            kept.append(line)
+    filtered = '\n'.join(kept).strip()
+    if len(filtered) < min(MIN_JD_CHARS, len(text.strip())):
+        return '\n'.join(line for line in (_SPACES.sub(' ', l).strip() for l in text.split('\n')) if line)
+    return filtered
+
+
+def minimize_cv(master_tex):
+    """(preamble_summary, minified body) of a master CV; the full preamble stays on the server"""
+    preamble, body = split_preamble(master_tex)
+    if not body:
+        return '', minify_latex(master_tex)
+    return preamble_summary(preamble), minify_latex(body)
@@ -0,0 +1,94 @@
+"""
+LLM rate limiting for Vibe CV Resume Builder
+Per-provider concurrency caps and tokens-per-minute budgets shared by every AI call in the process
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token for English/LaTeX)"""
+    return len(text or '') // 4 + 1
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at tokens_per_minute"""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        """Block until amount tokens are available, then take them"""
+        # A single request larger than the whole budget still has to go through eventually
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+
+class LLMRateLimiter:
+    """Caps in-flight requests and tokens per minute for each provider
+
+    limits maps provider name -> (max_concurrent, tokens_per_minute); a value of
+    0 disables that particular limit. Providers without an entry are unlimited.
+    """
+
+    def __init__(self, limits):
+        self._semaphores = {}
+        self._buckets = {}
+        for provider, (max_concurrent, tokens_per_minute) in limits.items():
+            if max_concurrent:
+                self._semaphores[provider] = threading.BoundedSemaphore(max_concurrent)
+            if tokens_per_minute:
+                self._buckets[provider] = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self.in_flight = {provider: 0 for provider in limits}
+        self.waiting = {provider: 0 for provider in limits}
+
+    @contextmanager
+    def limit(self, provider, tokens):
+        """Hold a concurrency slot and spend `tokens` from the provider's budget"""
+        semaphore = self._semaphores.get(provider)
+        bucket = self._buckets.get(provider)
+
+        with self._lock:
+            self.waiting[provider] = self.waiting.get(provider, 0) + 1
+        try:
+            if semaphore:
+                semaphore.acquire()
+            try:
+                if bucket:
+                    bucket.consume(tokens)
+            except BaseException:
+                if semaphore:
+                    semaphore.release()
+                raise
+        finally:
+            with self._lock:
+                self.waiting[provider] -= 1
+
+        with self._lock:
+            self.in_flight[provider] = self.in_flight.get(provider, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight[provider] -= 1
+            if semaphore:
+                semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': dict(self.in_flight), 'waiting': dict(self.waiting)}
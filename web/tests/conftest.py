@@ -0,0 +1,69 @@
+"""
+Shared pytest setup for Vibe CV Resume Builder
+The app's modules live directly in web/, so make them importable from the tests
+"""
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def fake_api():
+    """benchmarks/fake_llm_server on a free port; fake_api.client(provider) builds an LLMClient pointed at it
+
+    Set scripted_errors to inject failures. Clients are closed when the test ends.
+    """
+    from benchmarks.fake_llm_server import FakeLLM, serve
+    from llm_client import LLMClient
+
+    llm = FakeLLM(ttft_ms=0, tokens_per_sec=1e6, response_tokens=50, sigma=0, seed=1, cache_min_tokens=50)
+    server = serve(0, llm)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    clients = []
+
+    def client(provider, **kwargs):
+        kwargs.setdefault('backoff_base', 0)
+        kwargs.setdefault('model', 'gpt-4' if provider == 'openai' else 'claude-3-5-sonnet')
+        base_url = url + ('/v1' if provider == 'openai' else '')
+        clients.append(LLMClient(provider, api_key='test-key', base_url=base_url, timeout=5, **kwargs))
+        return clients[-1]
+
+    llm.client = client
+    yield llm
+    for c in clients:
+        c.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app.py imported against a throwaway database, variants dir and caches, with no AI keys"""
+    tmp = tmp_path_factory.mktemp('app')
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{tmp / 'vibe_cv.db'}",
+        VARIANTS_DIR=str(tmp / 'v1'),
+        LLM_CACHE_PATH=str(tmp / 'llm_cache.db'),
+        COMPILE_CACHE_DIR=str(tmp / 'compile_cache'),
+        TEX_WORK_DIR=str(tmp / 'tex_work'),
+        METRICS_DIR='',
+        OPENAI_API_KEY='',
+        ANTHROPIC_API_KEY='',
+    )
+    (tmp / 'v1').mkdir()
+    import app
+    return app
+
+
+@pytest.fixture
+def admin(app_module):
+    """Test client logged in as the default admin"""
+    client = app_module.app.test_client()
+    client.post('/login', data={'email': 'admin@vibe-cv.com', 'password': 'admin123'})
+    return client
@@ -0,0 +1,109 @@
+"""
+Tests for blob_store.py and backfill_blobs.py: deduplicated, compressed LaTeX blobs and moving existing documents into them
+"""
+import random
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+import backfill_blobs
+import blob_store
+from blob_store import BlobStore, compress, content_hash, decompress
+from models import db, Blob, CVMaster, CVVariant, User
+
+MASTER = (Path(__file__).resolve().parents[2] / 'v1' / 'master.tex').read_text(encoding='utf-8')
+VARIANT = MASTER.replace('\\begin{document}', '\\begin{document}\n% tailored for Acme Bank', 1)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "blobs.db"}'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'raw', pytest.param('zstd', marks=pytest.mark.skipif(
+    blob_store.zstandard is None, reason='zstandard not installed'))])
+def test_codecs_round_trip(codec):
+    data = MASTER.encode('utf-8')
+    assert decompress(compress(data, codec), codec) == data
+    base = data[:-100]
+    assert decompress(compress(data, codec, dictionary=base), codec, dictionary=base) == data
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        compress(b'x', 'lz4')
+
+
+def test_put_is_idempotent_and_compressed(app):
+    store = BlobStore(codec='zlib')
+    digest = store.put(MASTER)
+    assert digest == content_hash(MASTER) and store.put(MASTER) == digest
+    db.session.commit()
+    blob = db.session.get(Blob, digest)
+    assert Blob.query.count() == 1
+    assert blob.size == len(MASTER.encode('utf-8')) and blob.stored_size < blob.size / 2
+
+
+def test_variant_is_stored_as_a_delta_against_its_master(app):
+    store = BlobStore(codec='zlib')
+    digest = store.put(VARIANT, base=MASTER)
+    db.session.commit()
+    blob = db.session.get(Blob, digest)
+    assert blob.base_hash == content_hash(MASTER)
+    assert blob.stored_size < len(compress(VARIANT.encode('utf-8'), 'zlib')) / 4
+    # A fresh store (empty LRU) decodes the delta through its base
+    assert BlobStore(codec='zlib').get(digest) == VARIANT
+    assert store.stats()['deltas'] == 1
+
+
+def test_unrelated_base_is_not_used(app):
+    store = BlobStore(codec='zlib')
+    noise = ''.join(random.Random(0).choice('0123456789abcdef') for _ in range(2000))
+    digest = store.put(noise, base=MASTER)
+    db.session.commit()
+    assert db.session.get(Blob, digest).base_hash is None
+    assert BlobStore().get('0' * 64) is None and BlobStore().get(None) is None
+
+
+def test_backfill_moves_documents_into_blobs(app, tmp_path, monkeypatch):
+    v1 = tmp_path / 'v1'
+    (v1 / 'acme-ba').mkdir(parents=True)
+    (v1 / 'acme-ba' / 'main.tex').write_text(VARIANT, encoding='utf-8')
+    (v1 / 'user_1_master.tex').write_text(MASTER, encoding='utf-8')
+    (v1 / 'master.tex').write_text(MASTER, encoding='utf-8')
+    monkeypatch.setattr(backfill_blobs, 'V1_DIR', v1)
+    monkeypatch.setattr(backfill_blobs, 'MASTER_TEX', v1 / 'master.tex')
+
+    user = User(email='backfill@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(CVMaster(user_id=user.id, latex_content=MASTER, is_active=True, version=1))
+    db.session.add(CVVariant(user_id=user.id, folder_name='acme-ba', has_tex=True))
+    db.session.add(Blob(hash='f' * 64, codec='raw', data=b'orphan', size=6, stored_size=6))
+    db.session.commit()
+
+    store = BlobStore(codec='zlib')
+    backfill_blobs.backfill_masters(store, clear_inline=True)
+    backfill_blobs.backfill_variants(store)
+    backfill_blobs.prune_files()
+    backfill_blobs.collect_garbage()
+
+    cv_master = CVMaster.query.one()
+    variant = CVVariant.query.one()
+    assert cv_master.latex_content == '' and store.get(cv_master.content_hash) == MASTER
+    assert db.session.get(Blob, variant.tex_hash).base_hash == cv_master.content_hash
+    assert BlobStore(codec='zlib').get(variant.tex_hash) == VARIANT
+    assert not (v1 / 'acme-ba' / 'main.tex').exists() and not (v1 / 'user_1_master.tex').exists()
+    assert db.session.get(Blob, 'f' * 64) is None and Blob.query.count() == 2
+
+    # Running it again finds nothing left to move
+    backfill_blobs.backfill_masters(store)
+    backfill_blobs.backfill_variants(store)
+    assert Blob.query.count() == 2
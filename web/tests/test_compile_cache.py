@@ -0,0 +1,42 @@
+"""
+Tests for compile_cache.py: hits replace the served PDF atomically, misses leave it alone
+"""
+from compile_cache import CompileCache
+
+FLAGS = ['-pdf', '-interaction=nonstopmode']
+
+
+def test_hit_replaces_dest_without_touching_open_readers(tmp_path):
+    cache = CompileCache(tmp_path / 'cache')
+    compiled = tmp_path / 'compiled.pdf'
+    compiled.write_bytes(b'%PDF-new' * 1000)
+    key = CompileCache.make_key('\\documentclass{article}', 'image', FLAGS)
+    cache.put(key, compiled)
+
+    variant_dir = tmp_path / 'variant'
+    variant_dir.mkdir()
+    dest = variant_dir / 'main.pdf'
+    dest.write_bytes(b'%PDF-old')
+    with open(dest, 'rb') as download:  # a download already streaming the old PDF
+        assert cache.get(key, dest)
+        assert download.read() == b'%PDF-old'
+    assert dest.read_bytes() == compiled.read_bytes()
+    assert [p.name for p in variant_dir.iterdir()] == ['main.pdf']  # no temp file left behind
+    assert cache.stats()['hits'] == 1
+
+
+def test_miss_leaves_dest_alone(tmp_path):
+    cache = CompileCache(tmp_path / 'cache')
+    dest = tmp_path / 'main.pdf'
+    dest.write_bytes(b'%PDF-old')
+    assert not cache.get(CompileCache.make_key('x', 'image', FLAGS), dest)
+    assert dest.read_bytes() == b'%PDF-old'
+    assert [p.name for p in tmp_path.iterdir() if p.is_file()] == ['main.pdf']
+    assert cache.stats()['misses'] == 1
+
+
+def test_key_depends_on_image_and_flags():
+    key = CompileCache.make_key('source', 'image', FLAGS)
+    assert key != CompileCache.make_key('source', 'image:2', FLAGS)
+    assert key != CompileCache.make_key('source', 'image', FLAGS + ['-bibtex-'])
+    assert key == CompileCache.make_key(b'source', 'image', FLAGS)
@@ -0,0 +1,44 @@
+"""
+Tests for compile_scheduler.py: slot limits, scratch dir cleanup and giving slots back on failure
+"""
+import tempfile
+
+import pytest
+
+from compile_scheduler import CompileQueueTimeout, CompileScheduler
+
+
+def test_scratch_dir_removed_after_use(tmp_path):
+    scheduler = CompileScheduler(tmp_path, max_concurrent=1)
+    with scheduler.slot() as workdir:
+        (workdir / 'main.tex').write_text('x')
+        assert scheduler.stats()['running'] == 1
+    assert not workdir.exists()
+    assert scheduler.stats()['running'] == 0 and scheduler.stats()['completed'] == 1
+
+
+def test_full_queue_times_out(tmp_path):
+    scheduler = CompileScheduler(tmp_path, max_concurrent=1, queue_timeout=0.05)
+    with scheduler.slot():
+        with pytest.raises(CompileQueueTimeout):
+            with scheduler.slot():
+                pass
+    assert scheduler.stats()['rejected'] == 1
+
+
+def test_slot_released_when_scratch_dir_fails(tmp_path, monkeypatch):
+    scheduler = CompileScheduler(tmp_path, max_concurrent=1, queue_timeout=0.05)
+
+    def no_space(*args, **kwargs):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(tempfile, 'mkdtemp', no_space)
+    for _ in range(3):
+        with pytest.raises(OSError):
+            with scheduler.slot():
+                pass
+    monkeypatch.undo()
+
+    with scheduler.slot() as workdir:  # capacity is intact
+        assert workdir.is_dir()
+    assert scheduler.stats() == {'max_concurrent': 1, 'running': 0, 'waiting': 0, 'completed': 1, 'rejected': 0}
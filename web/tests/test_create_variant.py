@@ -0,0 +1,46 @@
+"""
+Tests for queuing AI optimization from /api/create-variant and /api/create-variants-batch
+"""
+import pytest
+
+
+@pytest.fixture
+def submitted(app_module, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(app_module.job_runner, 'submit', lambda job_id, *args: jobs.append(job_id))
+    return jobs
+
+
+def create(admin, name):
+    return admin.post('/api/create-variant', json={
+        'company_name': name, 'role_name': 'Analyst', 'job_description': 'SQL and stakeholder workshops.'})
+
+
+def create_batch(admin, name):
+    return admin.post('/api/create-variants-batch', json={'variants': [
+        {'company': f'{name} {i}', 'role': 'Analyst', 'job_description': 'SQL and stakeholder workshops.'}
+        for i in range(2)]})
+
+
+def test_no_job_without_a_key_for_the_configured_provider(app_module, admin, submitted, monkeypatch):
+    # A key for the other provider alone does not make get_ai_client usable
+    monkeypatch.setattr(app_module, 'AI_PROVIDER', 'anthropic')
+    monkeypatch.setattr(app_module, 'OPENAI_API_KEY', 'test-key')
+    assert app_module.get_ai_client() is None
+
+    response = create(admin, 'Gating Off')
+    assert response.status_code == 200 and 'job_id' not in response.get_json()
+    response = create_batch(admin, 'Gating Off Batch')
+    assert response.status_code == 200
+    assert all('job_id' not in item for item in response.get_json()['variants'])
+    assert submitted == []
+
+
+def test_jobs_are_queued_when_a_client_is_available(app_module, admin, submitted, monkeypatch):
+    monkeypatch.setattr(app_module, 'get_ai_client', lambda: object())
+
+    response = create(admin, 'Gating On')
+    assert response.status_code == 202 and response.get_json()['job_id'] in submitted
+    response = create_batch(admin, 'Gating On Batch')
+    assert response.status_code == 202
+    assert [item['job_id'] for item in response.get_json()['variants']] == submitted[1:]
@@ -0,0 +1,110 @@
+"""
+Tests for cv_sections.py and convert_cv_sections: splitting a CV, converting sections in parallel and the whole-CV fallback
+"""
+import re
+import threading
+import time
+
+import pytest
+
+from cv_sections import HEADER, assemble, clean_fragment, split_cv_text
+from llm_client import LLMResponse
+
+CV = """Jane Doe
+jane@example.com | Hanoi
+
+SUMMARY
+Business analyst with 6 years in core banking.
+
+Work Experience
+Senior BA, Acme Bank, 2020-now
+
+Học vấn
+BSc Information Systems
+
+Skills:
+SQL, BPMN, Power BI
+
+Experience
+Intern, Beta Corp, 2018
+"""
+
+
+def test_split_keeps_document_order_and_repeated_headings():
+    sections = split_cv_text(CV)
+    assert [(s.key, s.title) for s in sections] == [
+        (HEADER, None), ('summary', 'Summary'), ('experience', 'Work Experience'), ('education', 'Học vấn'),
+        ('skills', 'Skills'), ('experience', 'Experience')]
+    assert sections[0].text == 'Jane Doe\njane@example.com | Hanoi'
+    assert sections[-1].text == 'Intern, Beta Corp, 2018'
+
+
+def test_fragments_are_cleaned_and_assembled_in_order():
+    fragment = '```latex\n\\documentclass{article}\n\\begin{document}\n\\section{Skills}\nSQL\n\\end{document}\n```'
+    assert clean_fragment(fragment) == '\\section{Skills}\nSQL'
+    latex = assemble('\\documentclass{article}\n', ['A', '', 'B'])
+    assert latex == '\\documentclass{article}\n\n\\begin{document}\n\nA\n\nB\n\n\\end{document}\n'
+
+
+class SectionClient:
+    """Answers section prompts with the section text under its own \\section; tracks concurrency"""
+
+    provider = 'openai'
+
+    def __init__(self, model, fail_on=None):
+        self.model = model
+        self.fail_on = fail_on
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def complete(self, system_prompt, user_prompt, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(0.02)
+            if 'Convert this CV to LaTeX format' in user_prompt:
+                text = '\\documentclass{article}\n\\begin{document}\nWhole CV\n\\end{document}\n'
+            else:
+                section = user_prompt.split('\n\n')[1]
+                if self.fail_on and self.fail_on in section:
+                    raise RuntimeError('section failed')
+                text = f'```latex\n\\section{{Part}}\n{section}\n```'
+            return LLMResponse(text, self.provider, self.model, usage={'input_tokens': 10, 'output_tokens': 5},
+                               latency=0.02)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def sections_mode(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'CONVERT_MODE', 'sections')
+    monkeypatch.setattr(app_module, 'CONVERT_SECTION_CONCURRENCY', 2)
+
+
+def convert(app_module, monkeypatch, client):
+    monkeypatch.setattr(app_module, 'get_ai_client', lambda: client)
+    with app_module.app.app_context():
+        latex = app_module.convert_cv_to_latex(CV, use_cache=False)
+        calls = app_module.LLMCall.query.filter_by(model=client.model).all()
+    return latex, sorted(call.kind for call in calls)
+
+
+def test_sections_are_merged_in_order_with_bounded_concurrency(app_module, monkeypatch, sections_mode):
+    client = SectionClient('sections-merge-test')
+    latex, kinds = convert(app_module, monkeypatch, client)
+    body = latex.split('\\begin{document}', 1)[1]
+    positions = [body.index(text) for text in ('Jane Doe', 'core banking', 'Acme Bank', 'BSc', 'SQL, BPMN', 'Beta Corp')]
+    assert positions == sorted(positions)
+    assert '```' not in latex and app_module.validate_latex(latex) == []
+    assert client.peak == 2
+    assert kinds == ['convert_section'] * 6
+
+
+def test_failed_section_falls_back_to_whole_cv_and_records_completed_calls(app_module, monkeypatch, sections_mode):
+    client = SectionClient('sections-fallback-test', fail_on='BSc')
+    latex, kinds = convert(app_module, monkeypatch, client)
+    assert re.search(r'\\begin\{document\}\nWhole CV', latex)
+    assert kinds == ['convert'] + ['convert_section'] * 5
@@ -0,0 +1,115 @@
+"""
+Tests for db_config.py: database URLs, SQLite connection tuning, query timing and the startup schema upgrade
+"""
+import sqlite3
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import inspect, text
+
+from db_config import configure_database, database_uri, engine_options, observe_queries, upgrade_schema
+from models import db, User
+
+
+def make_app(path):
+    app = Flask(__name__)
+    configure_database(app, db, path)
+    return app
+
+
+def test_database_uri():
+    assert database_uri('/data/vibe_cv.db') == 'sqlite:////data/vibe_cv.db'
+    assert database_uri('/data/vibe_cv.db', 'postgres://u:p@db/vibe') == 'postgresql://u:p@db/vibe'
+    assert database_uri('/data/vibe_cv.db', 'mysql://u:p@db/vibe') == 'mysql://u:p@db/vibe'
+
+
+def test_engine_options_per_backend():
+    sqlite_options = engine_options('sqlite:///x.db', busy_timeout_ms=2000)
+    assert sqlite_options['connect_args'] == {'timeout': 2.0, 'check_same_thread': False}
+    server_options = engine_options('postgresql://db/vibe')
+    assert server_options['pool_pre_ping'] and 'connect_args' not in server_options
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(tmp_path):
+    app = make_app(tmp_path / 'wal.db')
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+
+
+def test_concurrent_writers_wait_instead_of_failing(tmp_path):
+    app = make_app(tmp_path / 'writers.db')
+    with app.app_context():
+        db.create_all()
+    errors = []
+
+    def write(n):
+        try:
+            with app.app_context():
+                for i in range(20):
+                    db.session.add(User(email=f'writer{n}-{i}@example.com', password_hash='x'))
+                    db.session.commit()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with app.app_context():
+        assert User.query.count() == 80
+
+
+def test_observe_queries_labels_operations(tmp_path):
+    class Histogram:
+        def __init__(self):
+            self.operations = []
+
+        def observe(self, seconds, operation):
+            self.operations.append(operation)
+
+    app = make_app(tmp_path / 'observe.db')
+    histogram = Histogram()
+    observe_queries(app, db, histogram)
+    with app.app_context():
+        db.create_all()
+        histogram.operations.clear()
+        db.session.add(User(email='observe@example.com', password_hash='x'))
+        db.session.commit()
+        User.query.all()
+    assert {'insert', 'select'} <= set(histogram.operations)
+
+
+@pytest.fixture
+def old_database(tmp_path):
+    """A database from before cv_variants had listing/blob columns and indexes"""
+    path = tmp_path / 'old.db'
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE cv_variants (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                     'folder_name VARCHAR(255) NOT NULL, company VARCHAR(255), created_at DATETIME)')
+        conn.execute("INSERT INTO cv_variants (user_id, folder_name) VALUES (1, 'old-variant')")
+    return path
+
+
+def test_upgrade_schema_adds_missing_columns_and_indexes(old_database):
+    app = make_app(old_database)
+    with app.app_context():
+        db.create_all()
+    added = upgrade_schema(app, db)
+    assert {'cv_variants.tex_hash', 'cv_variants.match_score'} <= set(added)
+    assert all(name.startswith('cv_variants.') for name in added)
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        columns = {col['name'] for col in inspector.get_columns('cv_variants')}
+        assert {column.name for column in db.metadata.tables['cv_variants'].columns} <= columns
+        indexes = {index['name'] for index in inspector.get_indexes('cv_variants')}
+        assert {index.name for index in db.metadata.tables['cv_variants'].indexes} <= indexes
+        with db.engine.connect() as conn:
+            assert conn.execute(text('SELECT folder_name FROM cv_variants')).scalar() == 'old-variant'
+    assert upgrade_schema(app, db) == []
@@ -0,0 +1,49 @@
+"""
+Tests for jobs.py: streamed output buffering and resetting it before a regeneration
+"""
+import pytest
+from flask import Flask
+
+from jobs import JobReporter
+from models import db, Job, User
+
+
+@pytest.fixture
+def job(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "jobs.db"}'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User(email='jobs@example.com')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.flush()
+        job = Job(id='a' * 32, user_id=user.id, kind='create_variant', status='running', stage='ai')
+        db.session.add(job)
+        db.session.commit()
+        yield job
+        db.session.remove()
+
+
+def test_stream_is_buffered_until_flushed(job):
+    reporter = JobReporter(job.id, flush_interval=60)
+    reporter.stream('MATCH')  # first call flushes (nothing written before)
+    reporter.stream('_SCORE')
+    assert db.session.get(Job, job.id).output == 'MATCH'
+    reporter.flush_output()
+    assert db.session.get(Job, job.id).output == 'MATCH_SCORE'
+
+
+def test_reset_output_clears_output_and_records_stage(job):
+    reporter = JobReporter(job.id, flush_interval=60)
+    reporter.finish('score', 'Match: 70%', match_score=70)
+    reporter.stream('=== REPLACE: Skills ===\n')
+    reporter.stream('unflushed edits')
+    reporter.reset_output('regenerate', 'Section edits failed, regenerating the full CV')
+    reporter.stream('\\documentclass{article}')
+
+    job = db.session.get(Job, job.id)
+    assert job.output == '\\documentclass{article}'
+    assert [entry['stage'] for entry in job.get_progress()] == ['score', 'regenerate']
+    assert job.get_progress()[-1]['reset_output'] is True
@@ -0,0 +1,49 @@
+"""
+Tests for latex_escape.py: escaping stray special characters in AI-generated LaTeX
+"""
+import pytest
+
+from latex_escape import escape_latex
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Ranked #1 in class', r'Ranked \#1 in class'),
+    ('Tickets ##12 and #abc', r'Tickets \#\#12 and \#abc'),
+    ('R&D, 30% faster, snake_case', r'R\&D, 30\% faster, snake\_case'),
+    (r'Already \& escaped \% \_ \# \$', r'Already \& escaped \% \_ \# \$'),
+    ('Budget $5 and $10 per user', r'Budget \$5 and \$10 per user'),
+    ('Price $5-$10 a month', r'Price \$5-\$10 a month'),
+    ('Saved $200', r'Saved \$200'),
+    ('a $ 5 $ b', r'a \$ 5 \$ b'),
+])
+def test_text_is_escaped(text, expected):
+    assert escape_latex(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    r'Solved $x^2 + y_1$ and $\alpha$, costs $\$5$',
+    r'Display $$a_1 & b$$ and \(c_2\) and \[d_3\]',
+    r'\newcommand{\role}[1]{\textbf{#1}}',
+    r'\renewcommand\entry[2][x]{#1 #2}',
+    r'\def\pair#1#2{#1_#2}',
+    r'\newenvironment{box}[1]{\begin{center}#1}{\end{center}}',
+    r'\begin{tabular}{ll} a & b \\ \end{tabular}',
+    r'\href{https://x.com/a_b#top}{Link} % comment with # & _',
+    r'\verb|a_b#1|',
+])
+def test_latex_code_is_kept(text):
+    assert escape_latex(text) == text
+
+
+def test_macro_parameters_only_kept_inside_definitions():
+    text = r'\newcommand{\rank}[1]{No.~#1} \rank{3}, ranked #1'
+    assert escape_latex(text) == r'\newcommand{\rank}[1]{No.~#1} \rank{3}, ranked \#1'
+
+
+def test_preamble_is_left_alone():
+    text = '\\documentclass{article}\n\\def\\x{#}\n\\begin{document}\n#1 & $5\n\\end{document}\n'
+    assert escape_latex(text) == '\\documentclass{article}\n\\def\\x{#}\n\\begin{document}\n\\#1 \\& \\$5\n\\end{document}\n'
+
+
+def test_unclosed_math_is_escaped_per_paragraph():
+    assert escape_latex('Cost $5\n\nthen $x$') == 'Cost \\$5\n\nthen $x$'
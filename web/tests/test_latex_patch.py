@@ -0,0 +1,108 @@
+"""
+Tests for latex_patch.py: applying the AI's section edits to the master CV
+"""
+import pytest
+
+from latex_patch import PatchError, apply_patch, parse_patch
+
+MASTER = r"""\documentclass{article}
+\newcommand{\role}[1]{\textbf{#1}}
+\begin{document}
+\noindent Jane Doe
+
+\section{Summary}
+Business analyst.
+
+\section{Experience}
+\role{Analyst} at Bank.
+
+\section{Education}
+BSc.
+
+\end{document}
+"""
+
+
+def patch(*blocks, order=None):
+    lines = ['MATCH_SCORE: 80%', '']
+    if order:
+        lines.append('ORDER: ' + ' | '.join(order))
+    for title, body in blocks:
+        lines += [f'=== REPLACE: {title} ===', body, '=== END ===']
+    return '\n'.join(lines)
+
+
+def test_replaces_only_the_named_section():
+    result = apply_patch(MASTER, patch(('Summary', 'Senior business analyst, banking.')))
+    assert 'Senior business analyst, banking.' in result
+    assert 'Business analyst.' not in result
+    assert r'\role{Analyst} at Bank.' in result
+    assert result.startswith(r'\documentclass{article}') and result.rstrip().endswith(r'\end{document}')
+
+
+def test_header_and_order():
+    result = apply_patch(MASTER, patch(('HEADER', r'\noindent Jane Q. Doe'),
+                                       order=['Experience', 'Summary', 'Education']))
+    assert 'Jane Q. Doe' in result
+    assert result.index(r'\section{Experience}') < result.index(r'\section{Summary}') < result.index(r'\section{Education}')
+
+
+def test_repeated_heading_is_dropped():
+    result = apply_patch(MASTER, patch(('Education', '\\section{Education}\nMSc.')))
+    assert result.count(r'\section{Education}') == 1
+    assert 'MSc.' in result
+
+
+def test_fix_body_only_touches_replaced_sections():
+    result = apply_patch(MASTER, patch(('Summary', 'R&D lead.')), fix_body=lambda s: s.replace('&', r'\&'))
+    assert r'R\&D lead.' in result
+    assert r'\role{Analyst} at Bank.' in result
+
+
+def test_unknown_section_rejected():
+    with pytest.raises(PatchError, match='unknown section'):
+        apply_patch(MASTER, patch(('Projects', 'New.')))
+
+
+def test_incomplete_order_rejected():
+    with pytest.raises(PatchError, match='ORDER'):
+        apply_patch(MASTER, patch(order=['Experience', 'Summary']))
+
+
+def test_document_commands_rejected():
+    with pytest.raises(PatchError, match='document-level'):
+        apply_patch(MASTER, patch(('Summary', '\\end{document}')))
+
+
+def test_unterminated_block_rejected():
+    with pytest.raises(PatchError, match='unterminated'):
+        parse_patch('MATCH_SCORE: 80%\n\n=== REPLACE: Summary ===\nNew text\n')
+
+
+def test_full_document_is_not_a_patch():
+    with pytest.raises(PatchError, match='no section edits'):
+        parse_patch('MATCH_SCORE: 80%\n\n' + MASTER)
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_rejected_patch_is_not_cached(app_module, fake_api, monkeypatch, streaming):
+    monkeypatch.setattr(app_module, 'get_ai_client', lambda: fake_api.client('openai'))
+
+    def optimize(applies):
+        args = (MASTER, f'Patch cache test, streaming={streaming}', '')
+
+        def cache_if(response):
+            return applies
+
+        if streaming:
+            return ''.join(app_module.stream_ai_to_optimize_cv(*args, output_mode='patch', cache_if=cache_if))
+        return app_module.call_ai_to_optimize_cv(*args, output_mode='patch', cache_if=cache_if)
+
+    with app_module.app.app_context():
+        # Edits that did not apply: every retry asks the AI again
+        optimize(False)
+        optimize(False)
+        assert fake_api.requests == 2
+        optimize(True)
+        optimize(True)
+    assert fake_api.requests == 3
@@ -0,0 +1,93 @@
+"""
+Tests for latex_validator.py: pre-flight structure checks before a Docker compile
+"""
+from latex_validator import preflight, validate_latex
+
+MASTER = r"""\documentclass{article}
+\newcommand{\resumeItemListStart}{\begin{itemize}}
+\newcommand{\resumeItemListEnd}{\end{itemize}}
+\newcommand{\role}[1]{\textbf{#1}}
+\begin{document}
+\section{Experience}
+\role{Analyst}
+\resumeItemListStart
+  \item Built dashboards
+\resumeItemListEnd
+\end{document}
+"""
+
+
+def test_valid_document_has_no_problems():
+    assert validate_latex(MASTER, MASTER) == []
+
+
+def test_end_defined_before_begin_in_preamble():
+    latex = (
+        '\\documentclass{article}\n'
+        '\\newcommand{\\listend}{\\end{itemize}}\n'
+        '\\newcommand{\\liststart}{\\begin{itemize}}\n'
+        '\\begin{document}\n'
+        '\\liststart\n'
+        '\\item One\n'
+        '\\listend\n'
+        '\\end{document}\n'
+    )
+    assert validate_latex(latex) == []
+
+
+def test_environment_macros_still_balanced_in_body():
+    latex = MASTER.replace('\\resumeItemListEnd\n', '')
+    assert validate_latex(latex) == ['\\begin{itemize} on line 8 is never closed']
+
+
+def test_newenvironment_definition_is_not_an_environment():
+    latex = (
+        '\\documentclass{article}\n'
+        '\\newenvironment{skills}{\\begin{itemize}}{\\end{itemize}}\n'
+        '\\begin{document}\n'
+        '\\begin{skills}\\item SQL\\end{skills}\n'
+        '\\end{document}\n'
+    )
+    assert validate_latex(latex) == []
+
+
+def test_verb_and_verbatim_contents_are_skipped():
+    latex = (
+        '\\documentclass{article}\n'
+        '\\begin{document}\n'
+        'Use \\verb|{| and \\verb+\\end{itemize}+ here.\n'
+        '\\begin{verbatim}\n'
+        'if (x) { \\begin{itemize}\n'
+        '\\end{verbatim}\n'
+        '\\end{document}\n'
+    )
+    assert validate_latex(latex) == []
+
+
+def test_unbalanced_braces_and_environments_are_reported():
+    latex = (
+        '\\documentclass{article}\n'
+        '\\begin{document}\n'
+        '\\textbf{Jane\n'
+        '\\end{itemize}\n'
+        '\\end{document}\n'
+    )
+    assert validate_latex(latex) == [
+        '\\end{itemize} on line 4 has no matching \\begin',
+        "1 unclosed '{' (first on line 3)",
+    ]
+
+
+def test_truncated_document():
+    latex = MASTER.split('\\resumeItemListEnd')[0]
+    problems = validate_latex(latex)
+    assert 'Missing \\end{document} (output looks truncated)' in problems
+
+
+def test_preflight_restores_preamble_with_missing_macro():
+    _, body = MASTER.split('\\begin{document}')
+    latex = '\\documentclass{article}\n\\begin{document}' + body
+    repaired, repairs, problems = preflight(latex, MASTER)
+    assert repairs == ['Restored preamble from master CV']
+    assert problems == []
+    assert repaired == MASTER
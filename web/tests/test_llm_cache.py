@@ -0,0 +1,59 @@
+"""
+Tests for llm_cache.py: keys, hits/misses, TTL and least-recently-used eviction
+"""
+import time
+
+from llm_cache import LLMCache
+
+
+def test_key_covers_every_input():
+    base = ('openai', 'gpt-4-turbo', 0.7, 'system', 'user')
+    key = LLMCache.make_key(*base)
+    assert key == LLMCache.make_key(*base)
+    assert key != LLMCache.make_key('openai', 'gpt-4-turbo', 0.2, 'system', 'user')
+    assert key != LLMCache.make_key('openai', 'gpt-4-turbo', 0.7, 'system', 'user 2')
+    assert key != LLMCache.make_key(*base, max_tokens=8000)
+
+
+def test_hit_and_miss(tmp_path):
+    cache = LLMCache(tmp_path / 'cache.db')
+    assert cache.get('k') is None
+    cache.put('k', 'response', kind='optimize', model='m')
+    assert cache.get('k') == 'response'
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+
+def test_get_any_returns_the_first_key_found(tmp_path):
+    cache = LLMCache(tmp_path / 'cache.db')
+    cache.put('secondary', 'from secondary')
+    assert cache.get_any(['primary', 'secondary']) == 'from secondary'
+    cache.put('primary', 'from primary')
+    assert cache.get_any(['primary', 'secondary']) == 'from primary'
+    assert cache.get_any(['a', 'b']) is None
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+def test_expired_entries_miss(tmp_path):
+    cache = LLMCache(tmp_path / 'cache.db', ttl_seconds=0.05)
+    cache.put('k', 'response')
+    time.sleep(0.06)
+    assert cache.get('k') is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = LLMCache(tmp_path / 'cache.db', max_entries=2)
+    cache.put('a', '1')
+    time.sleep(0.01)
+    cache.put('b', '2')
+    time.sleep(0.01)
+    cache.get('a')  # a is now more recent than b
+    time.sleep(0.01)
+    cache.put('c', '3')
+    assert cache.get('b') is None
+    assert cache.get('a') == '1' and cache.get('c') == '3'
+    assert cache.stats()['entries'] == 2
+
+
+def test_shared_between_instances(tmp_path):
+    LLMCache(tmp_path / 'cache.db').put('k', 'response')
+    assert LLMCache(tmp_path / 'cache.db').get('k') == 'response'
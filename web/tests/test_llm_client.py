@@ -0,0 +1,90 @@
+"""
+Tests for llm_client.py: blocking, streaming and asyncio calls with retries, against the fake provider API
+"""
+import asyncio
+
+import anthropic
+import openai
+import pytest
+
+from llm_client import LLMClient, get_llm_client
+
+SYSTEM = 'You are an expert LaTeX CV converter. Return ONLY the LaTeX code.'
+USER = 'Convert this CV to LaTeX format: Jane Doe, business analyst.'
+
+
+@pytest.mark.parametrize('provider', ['openai', 'anthropic'])
+def test_complete(fake_api, provider):
+    client = fake_api.client(provider)
+    response = client.complete(SYSTEM, USER, max_tokens=500)
+    assert response.text.startswith('\\documentclass')
+    assert (response.provider, response.attempts) == (provider, 1)
+    assert response.usage['input_tokens'] > 0 and response.usage['output_tokens'] > 0
+
+
+@pytest.mark.parametrize('provider', ['openai', 'anthropic'])
+def test_stream_yields_chunks_and_fills_usage(fake_api, provider):
+    client = fake_api.client(provider)
+    usage = {}
+    chunks = list(client.stream(SYSTEM, USER, usage=usage))
+    assert len(chunks) > 1
+    assert ''.join(chunks).startswith('\\documentclass')
+    assert usage['input_tokens'] > 0 and usage['output_tokens'] > 0
+
+
+@pytest.mark.parametrize('provider', ['openai', 'anthropic'])
+def test_acomplete_closes_its_client_with_the_loop(fake_api, provider):
+    client = fake_api.client(provider)
+
+    async def two_calls():
+        first, second = await asyncio.gather(client.acomplete(SYSTEM, USER), client.acomplete(SYSTEM, USER))
+        assert len(client._async) == 1  # one pooled client per loop
+        return first, second
+
+    for _ in range(2):
+        first, second = asyncio.run(two_calls())
+        assert first.text and second.text
+        assert client._async == {}
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retries_rate_limits_and_server_errors(fake_api, status):
+    fake_api.scripted_errors = [status, status]
+    response = fake_api.client('openai', max_retries=3).complete(SYSTEM, USER)
+    assert response.attempts == 3
+    assert fake_api.requests == 3
+
+
+def test_stream_setup_is_retried(fake_api):
+    fake_api.scripted_errors = [503]
+    chunks = list(fake_api.client('anthropic', max_retries=1).stream(SYSTEM, USER))
+    assert ''.join(chunks).startswith('\\documentclass')
+    assert fake_api.requests == 2
+
+
+def test_gives_up_after_max_retries(fake_api):
+    fake_api.scripted_errors = [500, 500, 500]
+    with pytest.raises(anthropic.InternalServerError):
+        fake_api.client('anthropic', max_retries=1).complete(SYSTEM, USER)
+    assert fake_api.requests == 2
+
+
+def test_client_errors_are_not_retried(fake_api):
+    fake_api.scripted_errors = [400]
+    with pytest.raises(openai.BadRequestError):
+        fake_api.client('openai', max_retries=3).complete(SYSTEM, USER)
+    assert fake_api.requests == 1
+
+
+def test_backoff_is_capped_full_jitter():
+    client = LLMClient('openai', api_key='k', model='gpt-4', backoff_base=0.5, backoff_cap=2.0)
+    delays = [client._backoff(attempt) for attempt in range(8) for _ in range(50)]
+    assert min(delays) >= 0 and max(delays) <= 2.0
+
+
+def test_shared_clients_are_per_settings():
+    first = get_llm_client('openai', api_key='k', model='gpt-4', timeout=30)
+    assert get_llm_client('openai', api_key='k', model='gpt-4', timeout=30) is first
+    other = get_llm_client('openai', api_key='k', model='gpt-4o', timeout=30)
+    assert other is not first and other.model == 'gpt-4o'
+    assert get_llm_client('openai', api_key='k', model='gpt-4', timeout=5).timeout == 5
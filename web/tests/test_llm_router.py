@@ -0,0 +1,199 @@
+"""
+Tests for llm_router.py: circuit breaker states, fail-over and hedging with stub providers
+"""
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from llm_client import LLMResponse
+from llm_router import CircuitBreaker, LLMRouter
+
+
+def outage():
+    """A retryable provider error (counts against the breaker)"""
+    return openai.APIConnectionError(request=httpx.Request('POST', 'https://api.example.com/v1/chat/completions'))
+
+
+class StubClient:
+    """Stands in for LLMClient: fixed delay, optional error, canned text"""
+
+    def __init__(self, provider, delay=0.0, error=None, text=None, fail_after_chunks=None):
+        self.provider = provider
+        self.model = f'{provider}-model'
+        self.delay = delay
+        self.error = error
+        self.text = text or f'answer from {provider}'
+        self.fail_after_chunks = fail_after_chunks
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, system_prompt, user_prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return LLMResponse(self.text, self.provider, self.model, usage={'input_tokens': 10, 'output_tokens': 5})
+
+    def stream(self, system_prompt, user_prompt, usage=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error and self.fail_after_chunks is None:
+            raise self.error
+        for i, word in enumerate(self.text.split(' ')):
+            if self.fail_after_chunks is not None and i == self.fail_after_chunks:
+                raise self.error
+            yield word + ' '
+        if usage is not None:
+            usage.update(input_tokens=10, output_tokens=5)
+
+
+def router(*clients, **kwargs):
+    kwargs.setdefault('hedge_delay', 5)
+    return LLMRouter(clients, **kwargs)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+            assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        assert breaker.trips == 1
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        assert not breaker.allow()
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()  # trial already running
+
+    def test_half_open_success_closes(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow() and breaker.allow()
+
+    def test_half_open_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_failure()  # a single failed trial is enough
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        assert breaker.trips == 2
+
+
+class TestComplete:
+    def test_uses_preferred_provider(self):
+        primary, secondary = StubClient('openai'), StubClient('anthropic')
+        response = router(primary, secondary).complete('system', 'user')
+        assert response.provider == 'openai'
+        assert secondary.calls == 0
+
+    def test_fails_over_on_outage(self):
+        primary, secondary = StubClient('openai', error=outage()), StubClient('anthropic')
+        llm = router(primary, secondary)
+        assert llm.complete('system', 'user').provider == 'anthropic'
+        assert llm.failovers == 1 and llm.hedges == 0
+        assert llm.breakers['openai'].failures == 1
+
+    def test_open_breaker_skips_provider(self):
+        primary, secondary = StubClient('openai', error=outage()), StubClient('anthropic')
+        llm = router(primary, secondary, failure_threshold=1, reset_timeout=60)
+        llm.complete('system', 'user')
+        assert llm.complete('system', 'user').provider == 'anthropic'
+        assert primary.calls == 1
+
+    def test_hedges_slow_provider(self):
+        primary, secondary = StubClient('openai', delay=0.5), StubClient('anthropic')
+        llm = router(primary, secondary, hedge_delay=0.05)
+        assert llm.complete('system', 'user').provider == 'anthropic'
+        assert llm.hedges == 1 and llm.hedge_wins == 1
+
+    def test_client_error_does_not_trip_breaker(self):
+        primary, secondary = StubClient('openai', error=ValueError('bad request')), StubClient('anthropic')
+        llm = router(primary, secondary, failure_threshold=1)
+        llm.complete('system', 'user')
+        assert llm.breakers['openai'].state == CircuitBreaker.CLOSED
+
+    def test_raises_when_every_provider_fails(self):
+        llm = router(StubClient('openai', error=outage()), StubClient('anthropic', error=outage()))
+        with pytest.raises(openai.APIConnectionError):
+            llm.complete('system', 'user')
+
+
+class TestStream:
+    def test_streams_from_preferred_provider(self):
+        usage = {}
+        llm = router(StubClient('openai', text='one two three'), StubClient('anthropic'))
+        assert ''.join(llm.stream('system', 'user', usage=usage)) == 'one two three '
+        assert usage['provider'] == 'openai' and usage['output_tokens'] == 5
+
+    def test_hedges_slow_first_chunk(self):
+        usage = {}
+        primary, secondary = StubClient('openai', delay=0.5), StubClient('anthropic', text='fast')
+        llm = router(primary, secondary, hedge_delay=0.05)
+        assert ''.join(llm.stream('system', 'user', usage=usage)) == 'fast '
+        assert usage['provider'] == 'anthropic'
+        assert llm.hedges == 1 and llm.hedge_wins == 1
+
+    def test_fails_over_before_output(self):
+        llm = router(StubClient('openai', error=outage()), StubClient('anthropic', text='backup'))
+        assert ''.join(llm.stream('system', 'user')) == 'backup '
+        assert llm.failovers == 1
+
+    def test_failure_after_output_is_raised(self):
+        primary = StubClient('openai', text='one two three', error=outage(), fail_after_chunks=1)
+        llm = router(primary, StubClient('anthropic'))
+        chunks = []
+        with pytest.raises(openai.APIConnectionError):
+            for chunk in llm.stream('system', 'user'):
+                chunks.append(chunk)
+        assert chunks == ['one ']
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_responses_are_cached_under_the_provider_that_answered(app_module, monkeypatch, streaming):
+    primary = StubClient('openai', error=outage())
+    secondary = StubClient('anthropic', text='MATCH_SCORE: 80% \\documentclass{article}')
+    monkeypatch.setattr(app_module, 'get_ai_client', lambda: router(primary, secondary))
+    job = f'Router cache test, streaming={streaming}'
+
+    def optimize():
+        if streaming:
+            return ''.join(app_module.stream_ai_to_optimize_cv('master', job, ''))
+        return app_module.call_ai_to_optimize_cv('master', job, '')
+
+    with app_module.app.app_context():
+        assert optimize().strip() == secondary.text
+        with app_module.llm_cache._connect() as conn:
+            models = conn.execute("SELECT model FROM llm_responses WHERE response = ? ORDER BY created_at DESC",
+                                  (secondary.text,)).fetchall()
+        assert models[0] == ('anthropic-model',)
+
+        # The primary is back: the secondary's answer is still found in the cache
+        primary.error = None
+        assert optimize().strip() == secondary.text
+    assert (primary.calls, secondary.calls) == (1, 1)
@@ -0,0 +1,81 @@
+"""
+Tests for match_scorer.py: ranking job descriptions locally and the score fallback when the AI leaves out MATCH_SCORE
+"""
+import pytest
+
+from match_scorer import MatchScorer, tokenize, top_terms_missing
+
+CV = r"""\section{Experience}
+\resumeItem{Senior business analyst in core banking: SQL reporting, BPMN process models, UAT with Jira}
+\resumeItem{Wrote BRD and SRS documents, ran Agile Scrum ceremonies for the lending team}
+\section{Skills}
+SQL, Power BI, BPMN, UML, Jira, Confluence"""
+
+JDS = {
+    'fit': 'Senior Business Analyst for core banking. SQL, BPMN, UAT, Jira, BRD and SRS. Agile Scrum lending team.',
+    'partial': 'Data analyst: SQL and Power BI dashboards, Python, machine learning, Tableau, Kubernetes.',
+    'none': 'Registered nurse for the night shift at a pediatric hospital ward. Patient care and triage.',
+}
+
+
+def test_tokenize_drops_latex_and_keeps_skill_bigrams():
+    assert tokenize(r'\resumeItem{Core banking and C# with SQL}') == ['core', 'banking', 'c#', 'sql', 'core banking']
+
+
+def test_ranks_job_descriptions_by_fit():
+    scores = dict(zip(JDS, MatchScorer().score_many(CV, list(JDS.values()))))
+    assert scores['fit'] > scores['partial'] > scores['none']
+    assert scores['none'] == 0 and 0 < scores['fit'] <= 100
+
+
+def test_single_score_and_empty_inputs():
+    scorer = MatchScorer()
+    assert scorer.score(CV, JDS['fit']) == MatchScorer().score_many(CV, [JDS['fit']])[0]
+    assert len(scorer.score_many(CV, [])) == 0
+    assert list(scorer.score_many(CV, ['', 'a an the'])) == [0, 0]
+
+
+def test_missing_terms_put_skills_first():
+    missing = top_terms_missing(CV, JDS['partial'])
+    assert missing[:4] == ['kubernetes', 'machine learning', 'python', 'tableau']
+    assert 'sql' not in missing
+
+
+def test_match_scores_endpoint_sorts_best_first(app_module, admin, monkeypatch):
+    monkeypatch.setattr(app_module, 'get_user_master_tex', lambda user_id: CV)
+    response = admin.post('/api/match-scores', json={'job_descriptions': list(JDS.values()), 'explain': True})
+    scores = response.get_json()['scores']
+    assert [item['index'] for item in scores] == [0, 1, 2]
+    assert scores[0]['match_score'] >= scores[1]['match_score'] >= scores[2]['match_score']
+    assert 'kubernetes' in scores[1]['missing_terms']
+
+
+class QuietReporter:
+    """Job reporter that ignores every progress call"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+@pytest.mark.parametrize('ai_response, expected', [
+    ('MATCH_SCORE: 42%\n\\documentclass{article}\n\\begin{document}\nCV\n\\end{document}\n', 42),
+    ('\\documentclass{article}\n\\begin{document}\nCV\n\\end{document}\n', None),
+])
+def test_pipeline_falls_back_to_the_local_score(app_module, monkeypatch, ai_response, expected):
+    monkeypatch.setattr(app_module, 'AI_STREAMING', False)
+    monkeypatch.setattr(app_module, 'AI_OUTPUT_MODE', 'full')
+    monkeypatch.setattr(app_module, 'get_user_master_tex', lambda user_id: CV)
+    monkeypatch.setattr(app_module, 'call_ai_to_optimize_cv', lambda *args, **kwargs: ai_response)
+    monkeypatch.setattr(app_module, 'compile_variant_pdf', lambda folder_name: (False, 'not compiled in tests'))
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(email='admin@vibe-cv.com').first()
+        variant = app_module.CVVariant(user_id=user.id, folder_name=f'score-fallback-{expected}', company='Acme',
+                                       role='BA', job_description=JDS['fit'], has_job_desc=True)
+        app_module.db.session.add(variant)
+        app_module.db.session.commit()
+        (app_module.V1_DIR / variant.folder_name).mkdir()
+        result = app_module.run_variant_pipeline(QuietReporter(), variant.id)
+
+    local = MatchScorer().score(CV, JDS['fit'])
+    assert result['match_score'] == (expected if expected is not None else local)
+    assert ('(local estimate)' in result['message']) == (expected is None)
@@ -0,0 +1,84 @@
+"""
+Tests for metrics.py and /metrics: the Prometheus text format, multi-process merging and bounded route labels
+"""
+import json
+import os
+import re
+
+import pytest
+
+from metrics import CONTENT_TYPE, MetricsRegistry
+
+
+def test_render_text_format():
+    registry = MetricsRegistry()
+    registry.counter('jobs_total', 'Jobs run', ('kind',)).inc(3, kind='create "variant"\n')
+    registry.gauge('depth', 'Queue depth').set(2.5)
+    latency = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, route='/a')
+
+    assert registry.render().splitlines() == [
+        '# HELP depth Queue depth',
+        '# TYPE depth gauge',
+        'depth 2.5',
+        '# HELP jobs_total Jobs run',
+        '# TYPE jobs_total counter',
+        'jobs_total{kind="create \\"variant\\"\\n"} 3',
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_labels_and_registration_are_checked():
+    registry = MetricsRegistry()
+    counter = registry.counter('calls_total', 'Calls', ('provider',))
+    with pytest.raises(ValueError):
+        counter.inc(provider='openai', model='gpt-4')
+    assert registry.counter('calls_total', 'Calls', ('provider',)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge('calls_total', 'Calls', ('provider',))
+
+
+def test_processes_share_totals_through_the_directory(tmp_path):
+    registry = MetricsRegistry(tmp_path, flush_interval=60)
+    registry.counter('calls_total', 'Calls').inc(2)
+    registry.gauge('in_flight', 'In flight').set(1)
+    # A worker that has exited: its counter still counts, its gauge does not
+    dead_pid = 2 ** 22 + 1  # above Linux's largest pid_max
+    (tmp_path / f'{dead_pid}.json').write_text(json.dumps({'pid': dead_pid, 'metrics': {
+        'calls_total': {'type': 'counter', 'help': 'Calls', 'labels': [], 'values': [[[], 5]]},
+        'in_flight': {'type': 'gauge', 'help': 'In flight', 'labels': [], 'values': [[[], 7]]},
+    }}))
+    text = registry.render()
+    assert 'calls_total 7' in text.splitlines() and 'in_flight 1' in text.splitlines()
+    assert (tmp_path / f'{os.getpid()}.json').exists()
+
+
+def route_labels(text):
+    return set(re.findall(r'vibe_http_request_duration_seconds_count\{route="([^"]*)"', text))
+
+
+def test_metrics_endpoint_uses_route_templates(app_module, admin):
+    admin.get('/api/download-pdf/some-folder-1')
+    admin.get('/api/download-pdf/some-folder-2')
+    admin.get('/no/such/page/12345')
+    response = admin.get('/metrics')
+    assert response.status_code == 200 and response.headers['Content-Type'] == CONTENT_TYPE
+    routes = route_labels(response.get_data(as_text=True))
+    assert {'/api/download-pdf/<folder_name>', 'unmatched'} <= routes
+    assert not any('some-folder' in route or '12345' in route for route in routes)
+    assert 'vibe_queue_depth{queue="compile",state="waiting"}' in response.get_data(as_text=True)
+
+
+def test_metrics_token(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'scrape-secret')
+    client = app_module.app.test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
@@ -0,0 +1,67 @@
+"""
+Tests for /api/download-pdf: ETag/Last-Modified validators, 304s, Range requests and the X-Accel-Redirect offload
+"""
+import os
+
+import pytest
+
+PDF = b'%PDF-1.5\n' + bytes(range(256)) * 8 + b'\n%%EOF\n'
+URL = '/api/download-pdf/pdf-download'
+
+
+@pytest.fixture
+def pdf_file(app_module, admin):
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(email='admin@vibe-cv.com').first()
+        if not app_module.CVVariant.query.filter_by(user_id=user.id, folder_name='pdf-download').first():
+            app_module.db.session.add(app_module.CVVariant(user_id=user.id, folder_name='pdf-download', has_pdf=True))
+            app_module.db.session.commit()
+    path = app_module.V1_DIR / 'pdf-download' / 'main.pdf'
+    path.parent.mkdir(exist_ok=True)
+    path.write_bytes(PDF)
+    return path
+
+
+def test_full_download_carries_validators(admin, pdf_file):
+    response = admin.get(URL)
+    assert response.status_code == 200 and response.data == PDF
+    assert response.headers['ETag'] and response.headers['Last-Modified']
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert {'private', 'no-cache'} <= {part.strip() for part in response.headers['Cache-Control'].split(',')}
+    assert 'pdf-download-cv.pdf' in response.headers['Content-Disposition']
+
+
+def test_revalidation_answers_304(admin, pdf_file):
+    first = admin.get(URL)
+    assert admin.get(URL, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert admin.get(URL, headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+
+    # A recompiled PDF gets a new ETag, so the old one no longer matches
+    pdf_file.write_bytes(PDF + b'%recompiled\n')
+    stat = pdf_file.stat()
+    os.utime(pdf_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = admin.get(URL, headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200 and second.headers['ETag'] != first.headers['ETag']
+
+
+def test_range_request_returns_partial_content(admin, pdf_file):
+    response = admin.get(URL, headers={'Range': 'bytes=0-99'})
+    assert response.status_code == 206 and response.data == PDF[:100]
+    assert response.headers['Content-Range'] == f'bytes 0-99/{len(PDF)}'
+    tail = admin.get(URL, headers={'Range': 'bytes=-7'})
+    assert tail.status_code == 206 and tail.data == PDF[-7:]
+
+
+def test_x_accel_hands_the_body_to_nginx(app_module, admin, pdf_file, monkeypatch):
+    monkeypatch.setattr(app_module, 'PDF_SENDFILE', 'x-accel')
+    response = admin.get(URL)
+    assert response.status_code == 200 and response.data == b''
+    assert response.headers['X-Accel-Redirect'] == app_module.PDF_ACCEL_PREFIX + 'pdf-download/main.pdf'
+    assert admin.get(URL, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_other_users_are_refused(app_module, pdf_file):
+    client = app_module.app.test_client()
+    client.post('/register', data={'email': 'pdf@example.com', 'password': 'secret1', 'confirm_password': 'secret1'})
+    client.post('/login', data={'email': 'pdf@example.com', 'password': 'secret1'})
+    assert client.get(URL).status_code == 403
@@ -0,0 +1,68 @@
+"""
+Tests for prompt_budget.py: shrinking the job description before it is sent to the AI
+"""
+from prompt_budget import strip_jd_boilerplate
+
+JD = """\
+## Senior Data Analyst
+
+About us
+We are a fast-growing fintech serving millions of customers across Southeast Asia.
+Our culture is built on trust.
+
+What you’d be doing
+- Build self-service dashboards in Power BI for the credit risk team
+- Model loan performance data in SQL and dbt
+
+Benefits
+Competitive salary
+13th month bonus
+Flexible hours
+Hybrid work, 2 days in office
+Premium health insurance for you and your family
+
+Requirements
+- 4+ years of analytics experience with SQL and Python
+- Experience with credit risk or lending products
+
+Nice to have
+- Airflow, Looker
+
+How to apply
+Send your CV to jobs@example.com
+We are an equal opportunity employer and welcome applicants regardless of gender or age.
+"""
+
+
+def test_boilerplate_sections_are_dropped_until_a_role_heading():
+    text = strip_jd_boilerplate(JD)
+    assert text.split('\n') == [
+        '## Senior Data Analyst',
+        'What you’d be doing',
+        '- Build self-service dashboards in Power BI for the credit risk team',
+        '- Model loan performance data in SQL and dbt',
+        'Requirements',
+        '- 4+ years of analytics experience with SQL and Python',
+        '- Experience with credit risk or lending products',
+        'Nice to have',
+        '- Airflow, Looker',
+    ]
+
+
+def test_vietnamese_headings():
+    jd = (
+        'Mô tả công việc\n- Phân tích yêu cầu nghiệp vụ cho hệ thống ngân hàng lõi và viết tài liệu BRD, SRS chi tiết\n'
+        'Quyền lợi\nLương tháng 13\nBảo hiểm sức khỏe\nDu lịch hàng năm\n'
+        'Yêu cầu ứng viên\n- Tối thiểu 3 năm kinh nghiệm BA trong lĩnh vực tài chính, thành thạo SQL và UML\n'
+    )
+    assert strip_jd_boilerplate(jd).split('\n') == [
+        'Mô tả công việc',
+        '- Phân tích yêu cầu nghiệp vụ cho hệ thống ngân hàng lõi và viết tài liệu BRD, SRS chi tiết',
+        'Yêu cầu ứng viên',
+        '- Tối thiểu 3 năm kinh nghiệm BA trong lĩnh vực tài chính, thành thạo SQL và UML',
+    ]
+
+
+def test_description_that_is_all_boilerplate_is_only_collapsed():
+    jd = 'Benefits\n  Competitive   salary\n\n\nFlexible hours\n'
+    assert strip_jd_boilerplate(jd) == 'Benefits\nCompetitive salary\nFlexible hours'
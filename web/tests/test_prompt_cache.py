@@ -0,0 +1,71 @@
+"""
+Tests for the cache-friendly optimize prompt layout and prompt-cache usage accounting, against the fake provider API
+"""
+from pathlib import Path
+
+import pytest
+
+from llm_client import _usage_dict
+
+MASTER = (Path(__file__).resolve().parents[2] / 'v1' / 'master.tex').read_text(encoding='utf-8')
+TEMPLATE = (Path(__file__).resolve().parents[2] / 'prompts' / 'job_desc_match.md').read_text(encoding='utf-8')
+JD_A = 'Business Analyst at Acme Bank. Requirements: SQL, BPMN, stakeholder workshops, core banking.'
+JD_B = 'Data Analyst at Beta Retail. Requirements: Python, Power BI, A/B testing, demand forecasting.'
+
+
+def test_anthropic_system_block_carries_cache_control(fake_api):
+    fake_api.client('anthropic').complete('stable prefix', 'question', cache_prefix=True)
+    system = fake_api.received[-1]['system']
+    assert system == [{'type': 'text', 'text': 'stable prefix', 'cache_control': {'type': 'ephemeral'}}]
+    fake_api.client('anthropic').complete('stable prefix', 'question')
+    assert fake_api.received[-1]['system'] == 'stable prefix'
+
+
+@pytest.mark.parametrize('minimize', [False, True])
+@pytest.mark.parametrize('output_mode', ['full', 'patch'])
+def test_job_description_only_in_user_message(app_module, minimize, output_mode):
+    system_a, user_a = app_module.build_optimize_prompts(MASTER, JD_A, TEMPLATE, output_mode, minimize=minimize)
+    system_b, user_b = app_module.build_optimize_prompts(MASTER, JD_B, TEMPLATE, output_mode, minimize=minimize)
+    # Same master CV, different jobs: the whole system prompt is a shared, cacheable prefix
+    assert system_a == system_b
+    assert 'Acme Bank' not in system_a and 'Beta Retail' not in system_b
+    assert user_a.endswith(JD_A) and user_b.endswith(JD_B)
+    assert '\\begin{document}' not in user_a
+    # Instructions and template, then the master CV at the end of the stable part
+    assert system_a.index(TEMPLATE[:200]) < system_a.index('MASTER CV (LaTeX):')
+    assert system_a.rstrip().endswith('\\end{document}')
+
+
+def test_usage_fields_map_to_cache_counts():
+    assert _usage_dict('anthropic', {'input_tokens': 40, 'output_tokens': 9, 'cache_read_input_tokens': 1200,
+                                     'cache_creation_input_tokens': 0}) == {
+        'input_tokens': 40, 'output_tokens': 9, 'cache_read_tokens': 1200, 'cache_write_tokens': 0}
+    assert _usage_dict('openai', {'prompt_tokens': 1300, 'completion_tokens': 9,
+                                  'prompt_tokens_details': {'cached_tokens': 1152}}) == {
+        'input_tokens': 1300, 'output_tokens': 9, 'cache_read_tokens': 1152, 'cache_write_tokens': 0}
+
+
+@pytest.mark.parametrize('provider, streaming', [('anthropic', False), ('anthropic', True), ('openai', False),
+                                                  ('openai', True)])
+def test_second_job_reads_the_master_cv_from_the_prompt_cache(app_module, admin, fake_api, monkeypatch,
+                                                              provider, streaming):
+    model = f"{'claude' if provider == 'anthropic' else 'gpt'}-cache-test-{'stream' if streaming else 'complete'}"
+    client = fake_api.client(provider, model=model)
+    monkeypatch.setattr(app_module, 'get_ai_client', lambda: client)
+    with app_module.app.app_context():
+        for jd in (JD_A, JD_B):
+            if streaming:
+                list(app_module.stream_ai_to_optimize_cv(MASTER, jd, TEMPLATE, use_cache=False))
+            else:
+                app_module.call_ai_to_optimize_cv(MASTER, jd, TEMPLATE, use_cache=False)
+        rows = app_module.LLMCall.query.filter_by(model=client.model).order_by(app_module.LLMCall.id).all()
+
+    first, second = rows
+    if provider == 'anthropic':
+        assert first.cache_write_tokens > 0 and first.cache_read_tokens == 0
+        assert second.cache_read_tokens == first.cache_write_tokens and second.cache_write_tokens == 0
+    else:
+        assert first.cache_read_tokens == 0
+        assert second.cache_read_tokens > 0
+    usage = admin.get('/api/llm/usage').get_json()['optimize']
+    assert usage['cache_read_tokens'] >= second.cache_read_tokens > 0
@@ -0,0 +1,97 @@
+"""
+Tests for text_extraction.py: PDF page ranges in a process pool, DOCX text, limits and the timeout
+"""
+import time
+
+import docx
+import pytest
+
+from text_extraction import ExtractionError, TextExtractor, text_fingerprint
+
+
+def make_pdf(path, n_pages):
+    """A minimal PDF whose page i reads "Page i" """
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>',
+               '<< /Type /Pages /Kids [{}] /Count {} >>'.format(
+                   ' '.join(f'{4 + 2 * i} 0 R' for i in range(n_pages)), n_pages),
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    for i in range(1, n_pages + 1):
+        stream = f'BT /F1 12 Tf 72 720 Td (Page {i}) Tj ET'
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * (i - 1)} 0 R >>')
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    path.write_bytes(out)
+    return path
+
+
+def page_numbers(text):
+    return [int(line.split()[1]) for line in text.splitlines() if line.startswith('Page ')]
+
+
+@pytest.fixture(scope='module')
+def pooled():
+    extractor = TextExtractor(max_workers=2, pages_per_task=3, max_pages=8, timeout=20)
+    yield extractor
+    if extractor._executor:
+        extractor._executor.shutdown()
+
+
+def test_fingerprint_ignores_whitespace_and_unicode_forms():
+    assert text_fingerprint('Jane  Doe\n\nﬁntech analyst') == text_fingerprint('Jane Doe fintech analyst')
+    assert text_fingerprint('Jane Doe') != text_fingerprint('John Doe')
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_page_ranges_are_joined_in_page_order(tmp_path, pooled, workers):
+    extractor = pooled if workers else TextExtractor(max_workers=0, pages_per_task=3, max_pages=8)
+    text = extractor.extract(make_pdf(tmp_path / 'cv.pdf', 7), 'pdf')
+    assert page_numbers(text) == list(range(1, 8))
+
+
+def test_pages_past_the_limit_are_ignored(tmp_path, pooled):
+    assert page_numbers(pooled.extract(make_pdf(tmp_path / 'long.pdf', 12), 'pdf')) == list(range(1, 9))
+
+
+def test_docx_paragraphs_and_tables_in_order(tmp_path):
+    document = docx.Document()
+    document.add_paragraph('Jane Doe')
+    table = document.add_table(rows=2, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1)).text = 'Skills'
+    table.cell(0, 2).text = 'SQL'
+    table.cell(1, 0).text = 'Tools'
+    table.cell(1, 2).text = 'Jira'
+    document.add_paragraph('References on request')
+    document.save(tmp_path / 'cv.docx')
+    text = TextExtractor(max_workers=0).extract(tmp_path / 'cv.docx', 'docx')
+    assert text == 'Jane Doe\nSkills | SQL\nTools | Jira\nReferences on request'
+
+
+def test_rejected_and_unreadable_files(tmp_path):
+    extractor = TextExtractor(max_workers=0, max_bytes=100)
+    with pytest.raises(ExtractionError, match='too large'):
+        extractor.extract(make_pdf(tmp_path / 'big.pdf', 3), 'pdf')
+    (tmp_path / 'broken.pdf').write_bytes(b'not a pdf')
+    with pytest.raises(ExtractionError, match='Could not read PDF'):
+        extractor.extract(tmp_path / 'broken.pdf', 'pdf')
+    assert extractor.stats()['failed'] == 2
+
+
+def test_slow_extraction_times_out_and_replaces_the_pool(tmp_path):
+    extractor = TextExtractor(max_workers=1, timeout=0.5)
+    try:
+        with pytest.raises(ExtractionError, match='timed out'):
+            extractor._run([(time.sleep, (10,))], time.monotonic() + 0.5)
+        assert extractor.timeouts == 1 and extractor._executor is None
+        assert page_numbers(extractor.extract(make_pdf(tmp_path / 'cv.pdf', 2), 'pdf')) == [1, 2]
+    finally:
+        if extractor._executor:
+            extractor._executor.shutdown()
@@ -0,0 +1,54 @@
+"""
+Tests for re-upload dedup in /api/upload-cv: a user's own converted CV is reused, other users' uploads are not reported
+"""
+import io
+
+import docx
+import pytest
+
+LATEX = '\\documentclass{article}\n\\begin{document}\nDedup Tester, business analyst.\n\\end{document}\n'
+
+
+@pytest.fixture
+def cv_docx():
+    document = docx.Document()
+    document.add_paragraph('Dedup Tester')
+    document.add_paragraph('Business analyst, 5 years in core banking, SQL and BPMN.')
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def conversions(app_module, monkeypatch):
+    calls = []
+
+    def convert(cv_text, use_cache=True):
+        calls.append(cv_text)
+        return LATEX
+
+    monkeypatch.setattr(app_module, 'convert_cv_to_latex', convert)
+    monkeypatch.setattr(app_module, 'get_ai_client', lambda: object())
+    return calls
+
+
+def upload(client, data):
+    response = client.post('/api/upload-cv', data={'cv_file': (io.BytesIO(data), 'cv.docx')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_reupload_reuses_only_the_users_own_conversion(app_module, admin, cv_docx, conversions):
+    first = upload(admin, cv_docx)
+    assert first['cached'] is False and len(conversions) == 1
+    assert upload(admin, cv_docx)['cached'] is True
+    assert len(conversions) == 1
+
+    other = app_module.app.test_client()
+    other.post('/register', data={'email': 'dedup@example.com', 'password': 'secret1',
+                                  'confirm_password': 'secret1'})
+    other.post('/login', data={'email': 'dedup@example.com', 'password': 'secret1'})
+    second = upload(other, cv_docx)
+    assert second['cached'] is False and len(conversions) == 2
+    assert second['master_file'] != first['master_file']
@@ -0,0 +1,55 @@
+"""
+Tests for /api/variants: keyset pagination over (created_at, id), newest first
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def lister(app_module):
+    """Logged-in client for a fresh user with 5 variants, two of them created in the same instant"""
+    client = app_module.app.test_client()
+    client.post('/register', data={'email': 'listing@example.com', 'password': 'secret1',
+                                   'confirm_password': 'secret1'})
+    client.post('/login', data={'email': 'listing@example.com', 'password': 'secret1'})
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(email='listing@example.com').first()
+        base = datetime(2025, 1, 1)
+        for i, minutes in enumerate([0, 10, 10, 20, 30]):
+            app_module.db.session.add(app_module.CVVariant(
+                user_id=user.id, folder_name=f'listing-{i}', company=f'Company {i}', role='BA',
+                created_at=base + timedelta(minutes=minutes)))
+        app_module.db.session.commit()
+    return client
+
+
+def test_pages_cover_every_variant_once_newest_first(lister):
+    folders, cursor, pages = [], None, 0
+    while True:
+        body = lister.get('/api/variants', query_string={'limit': 2, **({'cursor': cursor} if cursor else {})}).get_json()
+        folders += [v['folder'] for v in body['variants']]
+        pages += 1
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    # Ties on created_at are broken by id, descending
+    assert folders == ['listing-4', 'listing-3', 'listing-2', 'listing-1', 'listing-0']
+    assert pages == 3
+
+
+def test_page_size_is_capped(app_module, lister, monkeypatch):
+    monkeypatch.setattr(app_module, 'VARIANTS_MAX_PAGE_SIZE', 3)
+    body = lister.get('/api/variants?limit=100').get_json()
+    assert len(body['variants']) == 3 and body['next_cursor']
+
+
+def test_listing_only_sees_own_variants(admin, lister):
+    folders = [v['folder'] for v in admin.get('/api/variants?limit=100').get_json()['variants']]
+    assert not any(folder.startswith('listing-') for folder in folders)
+
+
+@pytest.mark.parametrize('query', ['cursor=not-a-cursor', 'limit=0'])
+def test_bad_arguments_are_rejected(lister, query):
+    response = lister.get(f'/api/variants?{query}')
+    assert response.status_code == 400 and response.get_json()['error']
@@ -0,0 +1,220 @@
+"""
+LaTeX compile engines for Vibe CV Resume Builder
+Runs latexmk either in a fresh container per compile or in a pool of warm containers
+"""
+import atexit
+import itertools
+import os
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+
+def _container_workdir(workspace, workdir):
+    """Map a host directory under the workspace to its path inside the container"""
+    rel = Path(workdir).resolve().relative_to(Path(workspace).resolve()).as_posix()
+    return '/workspace' if rel == '.' else f'/workspace/{rel}'
+
+
+class DockerRunEngine:
+    """One `docker run --rm` per compile (slow, but needs no long-lived state)"""
+
+    def __init__(self, image, workspace):
+        self.image = image
+        self.workspace = Path(workspace)
+
+    def run(self, workdir, command, timeout):
+        """Run command inside workdir (which must live under the workspace)"""
+        return subprocess.run([
+            'docker', 'run', '--rm',
+            '-v', f'{self.workspace}:/workspace',
+            '-w', _container_workdir(self.workspace, workdir),
+            self.image,
+            *command
+        ], capture_output=True, text=True, timeout=timeout)
+
+    def warm_up(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+    def stats(self):
+        return {'engine': 'docker'}
+
+
+class _Worker:
+    """A long-lived TeX container"""
+
+    def __init__(self, name):
+        self.name = name
+        self.jobs = 0
+        self.last_check = time.monotonic()
+
+
+class TexWorkerPool:
+    """Pool of warm TeX containers that compiles are dispatched to with `docker exec`
+
+    Containers are started lazily up to `size`, health-checked when they have
+    been idle for `health_interval` seconds, and recycled after `max_jobs`
+    compiles or after any compile that timed out (latexmk may still be running).
+    """
+
+    def __init__(self, image, workspace, size=2, max_jobs=50, health_interval=30, acquire_timeout=120):
+        self.image = image
+        self.workspace = Path(workspace)
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.health_interval = health_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._workers = set()
+        self._seq = itertools.count(1)
+        self.jobs_done = 0
+        self.recycled = 0
+        atexit.register(self.shutdown)
+
+    def _start_worker(self):
+        name = f"vibe-tex-{os.getpid()}-{next(self._seq)}"
+        subprocess.run([
+            'docker', 'run', '-d', '--rm',
+            '--name', name,
+            '-v', f'{self.workspace}:/workspace',
+            '-w', '/workspace',
+            self.image,
+            'sleep', 'infinity'
+        ], capture_output=True, text=True, timeout=120, check=True)
+        print(f"🐳 Started TeX worker {name}")
+        worker = _Worker(name)
+        with self._lock:
+            self._workers.add(worker.name)
+        return worker
+
+    def _stop_worker(self, worker):
+        with self._lock:
+            self._workers.discard(worker.name)
+        try:
+            subprocess.run(['docker', 'rm', '-f', worker.name], capture_output=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def _healthy(self, worker):
+        try:
+            result = subprocess.run(['docker', 'exec', worker.name, 'true'], capture_output=True, timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+    def _spawn(self):
+        """Start a worker in a slot that was already reserved in self._live"""
+        try:
+            return self._start_worker()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            raise
+
+    def _acquire(self):
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_grow = self._live < self.size
+                if can_grow:
+                    self._live += 1
+            if can_grow:
+                return self._spawn()
+            try:
+                worker = self._idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise RuntimeError('No TeX worker available (pool exhausted)')
+
+        if time.monotonic() - worker.last_check > self.health_interval:
+            if not self._healthy(worker):
+                print(f"⚠️ TeX worker {worker.name} failed health check, replacing")
+                self._stop_worker(worker)
+                with self._lock:
+                    self.recycled += 1
+                return self._spawn()
+            worker.last_check = time.monotonic()
+        return worker
+
+    def _release(self, worker, broken=False):
+        worker.jobs += 1
+        with self._lock:
+            self.jobs_done += 1
+        if broken or worker.jobs >= self.max_jobs:
+            self._stop_worker(worker)
+            with self._lock:
+                self._live -= 1
+                self.recycled += 1
+            return
+        worker.last_check = time.monotonic()
+        self._idle.put(worker)
+
+    def run(self, workdir, command, timeout):
+        """Run command inside workdir (which must live under the workspace) on a warm worker"""
+        container_dir = _container_workdir(self.workspace, workdir)
+        worker = self._acquire()
+        broken = False
+        try:
+            return subprocess.run([
+                'docker', 'exec',
+                '-w', container_dir,
+                worker.name,
+                *command
+            ], capture_output=True, text=True, timeout=timeout)
+        except (subprocess.TimeoutExpired, OSError):
+            broken = True
+            raise
+        finally:
+            self._release(worker, broken=broken)
+
+    def warm_up(self):
+        """Start workers until the pool is full"""
+        while True:
+            with self._lock:
+                if self._live >= self.size:
+                    return
+                self._live += 1
+            try:
+                self._idle.put(self._spawn())
+            except Exception as e:
+                print(f"⚠️ Could not start TeX worker: {e}")
+                return
+
+    def shutdown(self):
+        """Remove every container this pool started"""
+        with self._lock:
+            names = list(self._workers)
+            self._workers.clear()
+            self._live = 0
+        for name in names:
+            try:
+                subprocess.run(['docker', 'rm', '-f', name], capture_output=True, timeout=30)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'engine': 'pool',
+                'size': self.size,
+                'live': self._live,
+                'idle': self._idle.qsize(),
+                'jobs_done': self.jobs_done,
+                'recycled': self.recycled,
+                'max_jobs_per_worker': self.max_jobs,
+            }
+
+
+def create_engine(kind, image, workspace, pool_size=2, max_jobs=50, health_interval=30):
+    """Build the compile engine selected by TEX_ENGINE"""
+    if kind == 'pool':
+        return TexWorkerPool(image, workspace, size=pool_size, max_jobs=max_jobs, health_interval=health_interval)
+    return DockerRunEngine(image, workspace)
@@ -0,0 +1,192 @@
+"""
+CV text extraction for Vibe CV Resume Builder
+Runs PyPDF2 / python-docx in a process pool (PDF page ranges in parallel) so uploads never hold the GIL of a web worker
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import unicodedata
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ExtractionError(ValueError):
+    """The document was rejected (too large, too many pages, unreadable or too slow)"""
+
+
+def text_fingerprint(text):
+    """sha256 of extracted text with Unicode forms and whitespace normalized
+
+    The same CV exported twice (new PDF timestamp, different producer, .docx
+    re-saved) gives different bytes but the same fingerprint.
+    """
+    normalized = ' '.join(unicodedata.normalize('NFKC', text).split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _pdf_pages_text(path, start, end):
+    """Text of pages [start, end) and the document's page count (runs in a pool worker)"""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    count = len(reader.pages)
+    parts = []
+    for i in range(start, min(end, count)):
+        parts.append(reader.pages[i].extract_text() or '')
+    return count, '\n'.join(parts)
+
+
+def _docx_text(path):
+    """Paragraph and table text in document order (runs in a pool worker)"""
+    from docx import Document
+    from docx.table import Table
+
+    doc = Document(path)
+    parts = []
+    for block in doc.iter_inner_content():
+        if isinstance(block, Table):
+            for row in block.rows:
+                cells = []
+                for cell in row.cells:
+                    # Merged cells come back once per grid column
+                    text = cell.text.strip()
+                    if text and (not cells or cells[-1] != text):
+                        cells.append(text)
+                if cells:
+                    parts.append(' | '.join(cells))
+        else:
+            parts.append(block.text)
+    return '\n'.join(parts)
+
+
+def _worker_context():
+    """forkserver where available, else spawn; never fork
+
+    Forking the threaded web server would copy locks held by other threads
+    into the workers. Both methods import the main script again in each worker
+    (as __mp_main__), so it must be safe to import; under gunicorn that is
+    gunicorn's own entry point, and app.py skips its startup when it is run directly.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class TextExtractor:
+    """Extracts text from uploaded CVs in worker processes
+
+    PDFs are read in page ranges of pages_per_task: the first range also
+    reports the page count, then the remaining ranges run in parallel and
+    the parts are joined in page order. Documents over max_bytes are
+    rejected, pages past max_pages are ignored, and extraction that takes
+    longer than timeout seconds fails (its workers are killed and the pool
+    is replaced). With max_workers=0 everything runs in the calling thread.
+    """
+
+    def __init__(self, max_workers=2, max_bytes=10 * 1024 * 1024, max_pages=20, pages_per_task=4, timeout=30):
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.pages_per_task = max(1, pages_per_task)
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_worker_context())
+            return self._executor
+
+    def _reset_pool(self, executor, kill=False):
+        """Drop a broken or stuck pool; the next call starts a fresh one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        if kill:
+            for process in processes:
+                process.terminate()
+
+    def _run(self, calls, deadline):
+        """Run [(fn, args), ...] and return their results in order, within deadline"""
+        if not self.max_workers:
+            return [fn(*args) for fn, args in calls]
+
+        executor = self._pool()
+        try:
+            futures = [executor.submit(fn, *args) for fn, args in calls]
+        except BrokenProcessPool:
+            self._reset_pool(executor)
+            executor = self._pool()
+            futures = [executor.submit(fn, *args) for fn, args in calls]
+
+        done, pending = wait(futures, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_EXCEPTION)
+        errors = [f.exception() for f in done if f.exception() is not None]
+        for future in pending:
+            future.cancel()
+        if errors:
+            if any(isinstance(e, BrokenProcessPool) for e in errors):
+                self._reset_pool(executor)
+            raise errors[0]
+        if pending:
+            self.timeouts += 1
+            self._reset_pool(executor, kill=True)
+            raise ExtractionError(f'Text extraction timed out after {self.timeout}s')
+        return [f.result() for f in futures]
+
+    def _check_size(self, path):
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            raise ExtractionError(f'File is too large ({size / 1024 / 1024:.1f} MB, max '
+                                  f'{self.max_bytes / 1024 / 1024:.0f} MB)')
+
+    def extract_pdf(self, path):
+        """Text of a PDF (at most max_pages pages)"""
+        path = str(path)
+        self._check_size(path)
+        deadline = time.monotonic() + self.timeout
+        step = self.pages_per_task
+
+        count, first = self._run([(_pdf_pages_text, (path, 0, min(step, self.max_pages)))], deadline)[0]
+        pages = min(count, self.max_pages)
+        if count > self.max_pages:
+            print(f"⚠️  PDF has {count} pages, extracting the first {self.max_pages}")
+        ranges = [(path, start, min(start + step, pages)) for start in range(step, pages, step)]
+        rest = self._run([(_pdf_pages_text, args) for args in ranges], deadline) if ranges else []
+        return '\n'.join([first] + [text for _, text in rest])
+
+    def extract_docx(self, path):
+        """Paragraph and table text of a DOCX file"""
+        path = str(path)
+        self._check_size(path)
+        return self._run([(_docx_text, (path,))], time.monotonic() + self.timeout)[0]
+
+    def extract(self, path, file_ext):
+        """Text of an uploaded CV, stripped; raises ExtractionError when it is rejected or unreadable"""
+        try:
+            text = self.extract_pdf(path) if file_ext == 'pdf' else self.extract_docx(path)
+        except ExtractionError:
+            self.failed += 1
+            raise
+        except Exception as e:
+            self.failed += 1
+            raise ExtractionError(f'Could not read {file_ext.upper()} file: {e}') from e
+        self.completed += 1
+        return text.strip()
+
+    def stats(self):
+        return {
+            'workers': self.max_workers,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timeouts': self.timeouts
+        }